@@ -8,134 +8,163 @@ USAGE:
 3. Open Scripting workspace
 4. Load this script
 5. Run it (Alt+P)
-6. Copy the entire console output
-7. Paste it back to Claude for generator script updates
+6. Read the grouped bone report in the console
+
+EXPORT MODE (scriptable, no copy/paste):
+Reads every bone in one foreach_get pass and writes a skeleton spec
+(<path>.json + <path>.npz, see skeleton_spec.py) with names, parent
+indices and categories that SkeletonGenerator can load directly.
+
+    blender --background --python analyze_skeleton.py -- \\
+        --input Untitled.glb other.glb --export skeletons/ --quiet
+
+--input   .glb/.gltf files to import one at a time (default: current scene)
+--export  spec path for a single armature, or a folder for several inputs
+--quiet   skip the console bone report (the symmetry / joint gap check is always printed)
+--symmetric  export only the center + left bones; the right side is mirrored on load
 
 This script reads the ACTUAL bone positions from your manually adjusted skeleton.
 """
 
+import argparse
+import os
+import sys
+
 import bpy
-from mathutils import Vector
+import numpy as np
+
+# Sibling modules (skeleton_spec, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import scene_data
+from rig_math import mat3_to_rolls, transform_points
+from skeleton_spec import SkeletonSpec, categorize_bones, format_report, format_symmetry_report
+
+
+def find_armature():
+    """First armature object in the scene, or None"""
+    for obj in bpy.data.objects:
+        if obj.type == 'ARMATURE':
+            return obj
+    return None
+
+
+def extract_skeleton_spec(armature):
+    """Read all bones with foreach_get and return a world-space SkeletonSpec"""
+    bones = armature.data.bones
+    count = len(bones)
+
+    heads = np.empty(count * 3, dtype=np.float32)
+    tails = np.empty(count * 3, dtype=np.float32)
+    matrices = np.empty(count * 16, dtype=np.float32)
+    bones.foreach_get("head_local", heads)
+    bones.foreach_get("tail_local", tails)
+    bones.foreach_get("matrix_local", matrices)
+
+    # One vectorized step to world space for every bone
+    world = np.array(armature.matrix_world, dtype=np.float64)
+    heads = transform_points(world, heads)
+    tails = transform_points(world, tails)
+
+    # foreach_get flattens matrices column by column
+    rotations = matrices.reshape(-1, 4, 4).transpose(0, 2, 1)[:, :3, :3]
+    world_rotation = world[:3, :3] / np.linalg.norm(world[:3, :3], axis=0)
+    rolls = mat3_to_rolls(world_rotation @ rotations)
+
+    names = [bone.name for bone in bones]
+    index = {name: i for i, name in enumerate(names)}
+    parents = [index[bone.parent.name] if bone.parent else -1 for bone in bones]
+
+    return SkeletonSpec(names, parents, heads, tails, rolls, categories=categorize_bones(names))
 
-def analyze_armature():
-    """Analyze the armature in the scene and print all bone data"""
+
+def analyze_armature(export_path=None, verbose=True, symmetric=False):
+    """Analyze the armature in the scene, print the bone report and optionally export it"""
 
     print("\n" + "=" * 80)
     print("KHAOS SKELETON ANALYSIS")
     print("=" * 80)
 
     # Find the armature
-    armature = None
-    for obj in bpy.data.objects:
-        if obj.type == 'ARMATURE':
-            armature = obj
-            break
+    armature = find_armature()
 
     if not armature:
         print("ERROR: No armature found in the scene!")
         print("Make sure you have imported your .glb file with the armature.")
-        return
+        return None
 
     print(f"\nFound armature: {armature.name}")
     print(f"Total bones: {len(armature.data.bones)}")
 
-    # Switch to object mode to read bone data
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    # Group bones by type for easier reading
-    bone_groups = {
-        'Spine': [],
-        'Head': [],
-        'Arms_L': [],
-        'Arms_R': [],
-        'Fingers_L': [],
-        'Fingers_R': [],
-        'Legs_L': [],
-        'Legs_R': [],
-        'Other': []
-    }
-
-    # Categorize bones
-    for bone in armature.data.bones:
-        name = bone.name
-
-        if 'Root' in name or 'Spine' in name or 'Neck' in name:
-            bone_groups['Spine'].append(bone)
-        elif 'Head' in name:
-            bone_groups['Head'].append(bone)
-        elif ('Shoulder' in name or 'Arm' in name or 'Hand' in name) and '.L' in name:
-            bone_groups['Arms_L'].append(bone)
-        elif ('Shoulder' in name or 'Arm' in name or 'Hand' in name) and '.R' in name:
-            bone_groups['Arms_R'].append(bone)
-        elif ('Thumb' in name or 'Index' in name or 'Middle' in name or 'Ring' in name or 'Pinky' in name) and '.L' in name:
-            bone_groups['Fingers_L'].append(bone)
-        elif ('Thumb' in name or 'Index' in name or 'Middle' in name or 'Ring' in name or 'Pinky' in name) and '.R' in name:
-            bone_groups['Fingers_R'].append(bone)
-        elif ('Leg' in name or 'Foot' in name or 'Toe' in name) and '.L' in name:
-            bone_groups['Legs_L'].append(bone)
-        elif ('Leg' in name or 'Foot' in name or 'Toe' in name) and '.R' in name:
-            bone_groups['Legs_R'].append(bone)
-        else:
-            bone_groups['Other'].append(bone)
-
-    # Print bones by group
-    print("\n" + "-" * 80)
-    print("BONE POSITIONS (World Space)")
-    print("-" * 80)
-
-    for group_name, bones in bone_groups.items():
-        if not bones:
-            continue
-
-        print(f"\n### {group_name} ###")
-        for bone in bones:
-            # Get world space positions
-            head = armature.matrix_world @ bone.head_local
-            tail = armature.matrix_world @ bone.tail_local
-
-            print(f"\n  {bone.name}:")
-            print(f"    Head: ({head.x:.4f}, {head.y:.4f}, {head.z:.4f})")
-            print(f"    Tail: ({tail.x:.4f}, {tail.y:.4f}, {tail.z:.4f})")
-
-            if bone.parent:
-                print(f"    Parent: {bone.parent.name}")
-
-    # Print Python code format for easy copy/paste
-    print("\n" + "=" * 80)
-    print("PYTHON CODE FORMAT (for generator script)")
-    print("=" * 80)
-
-    print("\n# Copy these bone definitions into your skeleton generator:")
-    print("\ndef build_extracted_skeleton(self):")
-    print("    \"\"\"Build skeleton from extracted bone data\"\"\"")
+    # Switch to object mode to read bone data (edit bones are only synced on exit)
+    scene_data.ensure_object_mode()
 
-    for group_name, bones in bone_groups.items():
-        if not bones:
-            continue
+    spec = extract_skeleton_spec(armature)
 
-        print(f"\n    # {group_name}")
-        for bone in bones:
-            head = armature.matrix_world @ bone.head_local
-            tail = armature.matrix_world @ bone.tail_local
-            parent = f'"{bone.parent.name}"' if bone.parent else 'None'
+    if verbose:
+        # Skip the title lines, they were printed above
+        print("\n".join(format_report(spec)[4:]))
+    else:
+        # Asymmetric pairs and disconnected chains are worth seeing even in quiet runs
+        print("\n".join(format_symmetry_report(spec)))
 
-            print(f"    self.add_bone(")
-            print(f"        \"{bone.name}\",")
-            print(f"        parent_name={parent},")
-            print(f"        head_pos=Vector(({head.x:.4f}, {head.y:.4f}, {head.z:.4f})),")
-            print(f"        tail_pos=Vector(({tail.x:.4f}, {tail.y:.4f}, {tail.z:.4f}))")
-            print(f"    )")
+    if export_path:
+        base = spec.save(export_path, symmetric=symmetric)
+        print("\n" + "=" * 80)
+        print(f"✓ Skeleton spec written: {base}.json + {base}.npz")
+        print("=" * 80)
 
     print("\n" + "=" * 80)
     print("ANALYSIS COMPLETE!")
     print("=" * 80)
-    print("\nNext steps:")
-    print("1. Copy the PYTHON CODE FORMAT section above")
-    print("2. Paste it to Claude")
-    print("3. Claude will update the generator script with these exact positions")
-    print("=" * 80 + "\n")
+    if not export_path:
+        print("\nNext steps:")
+        print("1. Re-run with --export <path> to write a skeleton spec")
+        print("2. Load it with SkeletonGenerator().generate(spec_path=<path>)")
+        print("=" * 80 + "\n")
+
+    return spec
+
+
+def import_model(filepath):
+    """Reset to an empty scene and import one glTF file"""
+    bpy.ops.wm.read_homefile(use_empty=True)
+    bpy.ops.import_scene.gltf(filepath=filepath)
+
+
+def parse_args(argv):
+    """Parse the arguments after Blender's '--' separator"""
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="analyze_skeleton.py")
+    parser.add_argument("--input", nargs="*", default=[], help=".glb/.gltf files to analyze")
+    parser.add_argument("--export", default=None, help="spec path, or folder when several inputs are given")
+    parser.add_argument("--quiet", action="store_true", help="skip the console bone report")
+    parser.add_argument("--symmetric", action="store_true", help="export the center + left bones only")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Analyze the current scene, or each --input file in turn"""
+    args = parse_args(sys.argv)
+
+    if not args.input:
+        analyze_armature(export_path=args.export, verbose=not args.quiet, symmetric=args.symmetric)
+        return
+
+    for filepath in args.input:
+        import_model(filepath)
+        export_path = None
+        if args.export:
+            if len(args.input) > 1 or args.export.endswith(os.sep):
+                stem = os.path.splitext(os.path.basename(filepath))[0]
+                export_path = os.path.join(args.export, stem)
+            else:
+                export_path = args.export
+        analyze_armature(export_path=export_path, verbose=not args.quiet, symmetric=args.symmetric)
 
 
 # Run the analysis
 if __name__ == "__main__":
-    analyze_armature()
+    main()
@@ -0,0 +1,439 @@
+"""
+Animation Baker for Khaos Project
+Parametric player clips, baked over all frames and keyframe-reduced for .glb export
+
+USAGE:
+    python animation_bake.py                          # bake every clip, print the key reduction
+    python animation_bake.py --tolerance 0.5 --fps 60  # mm
+    python headless_character.py --animations         # character .glb with the baked clips
+
+CLIPS (Player.gd state -> clip):
+    IDLE        idle_loop       breathing: spine, shoulders and head
+    MOVING      walk_loop       leg/arm swing, knee flex, hip bob
+    SPRINTING   sprint_loop     larger swing, forward lean
+    DODGING     dodge           forward roll with tuck
+    ATTACKING   attack_light    one-handed right swing
+    ATTACKING   attack_heavy    two-handed overhead swing with lunge
+    PARRYING    parry           left forearm guard
+
+Looping clip names end in "_loop", which Godot's scene importer turns
+into looping animations. The state, loop flag and hit window (attacks, in
+seconds) are stored in each animation's extras.
+
+HOW IT WORKS:
+1. A clip is a list of tracks: a bone, an armature-space axis and a curve
+   of the clip phase (wave() for cycles, envelope() for one-shots). Left/right
+   pairs come from mirrored(), so both sides stay symmetric
+2. All frames are evaluated at once: curves give (F,) angles, the rotations
+   about each joint become bone-space pose rotations, and pose_kernel.py
+   computes every frame's bone matrices in one batched FK pass
+3. Each bone's parent-relative rotation/translation curve is keyframe
+   reduced (Douglas-Peucker: keep the frame where slerp/lerp between the
+   kept keys deviates most, until every frame is within tolerance);
+   constant channels keep a single key. The tolerance is a distance: a
+   rotation may be off by tolerance / reach, reach being how far the bone's
+   subtree extends from its head, so long chains keep more keys than tips
+4. The reduced curves are resampled and run through FK again, and the
+   largest joint position error is reported
+5. Channels are written as glTF LINEAR samplers (glb_writer.py), sharing
+   identical keyframe time arrays
+
+Pure NumPy - no bpy import.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Sibling modules (pose_kernel, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+from pose_kernel import PoseRig, pose_basis_matrices
+from rig_math import (Y_UP_TO_Z_UP, Z_UP_TO_Y_UP, accumulate_world_matrices, axis_angle_to_mat3,
+                      mat3_to_quaternions, quaternions_to_mat3)
+from skeleton_spec import DEFAULT_SKELETON, SkeletonSpec
+
+FPS = 30
+DEFAULT_TOLERANCE = 0.001  # meters of joint/tip movement per channel
+# Lever arm floor for tip bones (and rigs loaded without bone lengths)
+MIN_REACH = 0.1
+
+# Armature-space axes (Blender: +X is the character's right, +Y forward, +Z up).
+# A positive X rotation swings a hanging limb forward and tips the spine back.
+AXES = {
+    "x": np.array([1.0, 0.0, 0.0]),
+    "y": np.array([0.0, 1.0, 0.0]),
+    "z": np.array([0.0, 0.0, 1.0]),
+}
+
+
+# ----------------------------------------------------------------------
+# Clip description
+# ----------------------------------------------------------------------
+
+def wave(amplitude, cycles=1, phase=0.0, offset=0.0):
+    """Looping sine curve of the clip phase u (0..1)"""
+    return lambda u: offset + amplitude * np.sin(2.0 * np.pi * (cycles * u + phase))
+
+
+def envelope(*points):
+    """One-shot curve through (u, value) keys, eased with smoothstep between them"""
+    keys = np.array(points, dtype=np.float64)
+
+    def curve(u):
+        u = np.clip(u, keys[0, 0], keys[-1, 0])
+        i = np.clip(np.searchsorted(keys[:, 0], u, side="right") - 1, 0, len(keys) - 2)
+        s = (u - keys[i, 0]) / np.maximum(keys[i + 1, 0] - keys[i, 0], 1e-9)
+        s = s * s * (3.0 - 2.0 * s)
+        return keys[i, 1] + (keys[i + 1, 1] - keys[i, 1]) * s
+    return curve
+
+
+def rotate(bone, axis, curve):
+    """Rotation track: curve in degrees about an armature axis through the bone's head"""
+    return ("rotation", bone, axis, curve)
+
+
+def move(bone, axis, curve):
+    """Location track: curve in meters along an armature axis"""
+    return ("translation", bone, axis, curve)
+
+
+def mirrored(stem, axis, curve, opposite=False):
+    """Rotation tracks for <stem>.L and <stem>.R (right side mirrored across X, half a cycle later if opposite)"""
+    sign = 1.0 if axis == "x" else -1.0
+    if opposite:
+        right = lambda u: sign * curve(u + 0.5)  # noqa: E731
+    else:
+        right = lambda u: sign * curve(u)  # noqa: E731
+    return [rotate(f"{stem}.L", axis, curve), rotate(f"{stem}.R", axis, right)]
+
+
+def clip(name, state, duration, tracks, loop=False, **extras):
+    """Clip dict: tracks evaluated over `duration` seconds"""
+    return {"name": name, "state": state, "duration": duration, "loop": loop, "tracks": tracks, "extras": extras}
+
+
+def player_clips():
+    """The player state machine clips (Player.gd PlayerState)"""
+    spine = ["Spine_01", "Spine_02", "Spine_03"]
+    return [
+        clip("idle_loop", "IDLE", 3.0, loop=True, tracks=[
+            *[rotate(bone, "x", wave(1.2)) for bone in spine],
+            rotate("Neck", "x", wave(-1.5)),
+            rotate("Head", "x", wave(1.0, phase=0.1)),
+            *mirrored("Shoulder", "y", wave(1.5, phase=0.05)),
+            *mirrored("UpperArm", "y", wave(1.0, offset=3.0)),
+        ]),
+        clip("walk_loop", "MOVING", 1.0, loop=True, tracks=[
+            *mirrored("UpperLeg", "x", wave(25.0), opposite=True),
+            *mirrored("LowerLeg", "x", wave(20.0, phase=0.25, offset=-20.0), opposite=True),
+            *mirrored("Foot", "x", wave(10.0, phase=0.5), opposite=True),
+            *mirrored("UpperArm", "x", wave(-15.0), opposite=True),
+            *mirrored("ForeArm", "x", wave(-8.0, offset=12.0), opposite=True),
+            rotate("Spine_02", "z", wave(4.0)),
+            move("Root", "z", wave(0.02, cycles=2, phase=0.25)),
+        ]),
+        clip("sprint_loop", "SPRINTING", 0.6, loop=True, tracks=[
+            *mirrored("UpperLeg", "x", wave(40.0, offset=10.0), opposite=True),
+            *mirrored("LowerLeg", "x", wave(40.0, phase=0.25, offset=-45.0), opposite=True),
+            *mirrored("Foot", "x", wave(15.0, phase=0.5), opposite=True),
+            *mirrored("UpperArm", "x", wave(-35.0), opposite=True),
+            *mirrored("ForeArm", "x", wave(-15.0, offset=60.0), opposite=True),
+            rotate("Spine_01", "x", wave(2.0, cycles=2, offset=-12.0)),
+            rotate("Spine_02", "z", wave(7.0)),
+            rotate("Head", "x", lambda u: np.full_like(u, 10.0)),
+            move("Root", "z", wave(0.04, cycles=2, phase=0.25, offset=-0.03)),
+        ]),
+        clip("dodge", "DODGING", 0.7, tracks=[
+            rotate("Root", "x", envelope((0.0, 0.0), (0.15, 0.0), (0.85, -360.0), (1.0, -360.0))),
+            move("Root", "y", envelope((0.0, 0.0), (1.0, 2.5))),
+            move("Root", "z", envelope((0.0, 0.0), (0.3, -0.3), (0.7, -0.3), (1.0, 0.0))),
+            *[rotate(bone, "x", envelope((0.0, 0.0), (0.25, -35.0), (0.8, -35.0), (1.0, 0.0))) for bone in spine],
+            *mirrored("UpperLeg", "x", envelope((0.0, 0.0), (0.25, 100.0), (0.8, 100.0), (1.0, 0.0))),
+            *mirrored("LowerLeg", "x", envelope((0.0, 0.0), (0.25, -120.0), (0.8, -120.0), (1.0, 0.0))),
+            *mirrored("UpperArm", "x", envelope((0.0, 0.0), (0.25, 70.0), (0.8, 70.0), (1.0, 0.0))),
+            *mirrored("ForeArm", "x", envelope((0.0, 0.0), (0.25, 60.0), (0.8, 60.0), (1.0, 0.0))),
+        ]),
+        clip("attack_light", "ATTACKING", 0.5, hit_window=[0.2, 0.3], tracks=[
+            rotate("UpperArm.R", "x", envelope((0.0, 0.0), (0.3, 120.0), (0.55, -20.0), (1.0, 0.0))),
+            rotate("UpperArm.R", "y", envelope((0.0, 0.0), (0.3, -30.0), (0.55, 10.0), (1.0, 0.0))),
+            rotate("ForeArm.R", "x", envelope((0.0, 0.0), (0.3, 60.0), (0.55, 5.0), (1.0, 0.0))),
+            rotate("Spine_02", "z", envelope((0.0, 0.0), (0.3, -25.0), (0.55, 30.0), (1.0, 0.0))),
+            rotate("Spine_03", "z", envelope((0.0, 0.0), (0.3, -10.0), (0.55, 12.0), (1.0, 0.0))),
+        ]),
+        clip("attack_heavy", "ATTACKING", 1.2, hit_window=[0.8, 0.95], tracks=[
+            *mirrored("UpperArm", "x", envelope((0.0, 0.0), (0.45, 160.0), (0.6, 160.0), (0.75, 20.0),
+                                                (1.0, 0.0))),
+            *mirrored("ForeArm", "x", envelope((0.0, 0.0), (0.45, 40.0), (0.75, 0.0), (1.0, 0.0))),
+            rotate("Spine_01", "x", envelope((0.0, 0.0), (0.45, 10.0), (0.6, 10.0), (0.75, -25.0), (1.0, 0.0))),
+            rotate("Spine_02", "x", envelope((0.0, 0.0), (0.45, 8.0), (0.6, 8.0), (0.75, -15.0), (1.0, 0.0))),
+            rotate("UpperLeg.L", "x", envelope((0.0, 0.0), (0.6, 0.0), (0.75, 30.0), (1.0, 0.0))),
+            rotate("LowerLeg.L", "x", envelope((0.0, 0.0), (0.6, 0.0), (0.75, -30.0), (1.0, 0.0))),
+            rotate("UpperLeg.R", "x", envelope((0.0, 0.0), (0.6, 0.0), (0.75, -15.0), (1.0, 0.0))),
+            move("Root", "z", envelope((0.0, 0.0), (0.6, 0.0), (0.75, -0.08), (1.0, 0.0))),
+        ]),
+        clip("parry", "PARRYING", 0.4, tracks=[
+            rotate("UpperArm.L", "x", envelope((0.0, 0.0), (0.3, 80.0), (0.7, 80.0), (1.0, 0.0))),
+            rotate("UpperArm.L", "y", envelope((0.0, 0.0), (0.3, -20.0), (0.7, -20.0), (1.0, 0.0))),
+            rotate("ForeArm.L", "x", envelope((0.0, 0.0), (0.3, 75.0), (0.7, 75.0), (1.0, 0.0))),
+            rotate("Spine_02", "z", envelope((0.0, 0.0), (0.3, 10.0), (0.7, 10.0), (1.0, 0.0))),
+        ]),
+    ]
+
+
+# ----------------------------------------------------------------------
+# Evaluation
+# ----------------------------------------------------------------------
+
+def sample_times(duration, fps=FPS):
+    """Frame times from 0 to duration inclusive (loops end on their first pose)"""
+    return np.linspace(0.0, duration, max(int(round(duration * fps)), 1) + 1)
+
+
+def clip_pose(rig, clip, phases):
+    """(F, N, 3, 3) bone-space pose rotations and (F, N, 3) locations at the clip phases"""
+    frames, count = len(phases), len(rig)
+    index = {name: i for i, name in enumerate(rig.names)}
+    rotations = np.broadcast_to(np.eye(3), (frames, count, 3, 3)).copy()
+    offsets = np.zeros((frames, count, 3))
+
+    for kind, bone, axis, curve in clip["tracks"]:
+        i = index.get(bone)
+        if i is None:
+            continue  # bone dropped by a reduced rig
+        values = np.broadcast_to(curve(phases), (frames,)).astype(np.float64)
+        if kind == "rotation":
+            turn = axis_angle_to_mat3(np.tile(AXES[axis], (frames, 1)), np.radians(values))
+            rotations[:, i] = turn @ rotations[:, i]
+        else:
+            offsets[:, i] += values[:, None] * AXES[axis]
+
+    # Armature-space rotations about the joint -> the bone's own rest frame (PoseBone.rotation)
+    rest = rig.rest_matrices[:, :3, :3]
+    rest_t = rest.swapaxes(-1, -2)
+    return rest_t @ rotations @ rest, (rest_t @ offsets[..., None])[..., 0]
+
+
+def gltf_local_matrices(rig, rotations, translations):
+    """(F, N, 4, 4) parent-relative glTF node matrices for a pose (roots carry the Y-up conversion)"""
+    local = rig.rest_local @ pose_basis_matrices(rotations, translations)
+    roots = rig.parents < 0
+    local[:, roots] = Z_UP_TO_Y_UP @ local[:, roots]
+    return local
+
+
+def continuous_quaternions(quaternions):
+    """Flip signs along time so consecutive keys stay in one hemisphere (slerp takes the short way)"""
+    q = np.array(quaternions)
+    if len(q) > 1:
+        signs = np.sign(np.sum(q[1:] * q[:-1], axis=-1))
+        signs[signs == 0] = 1.0
+        q[1:] *= np.cumprod(signs, axis=0)[..., None]
+    return q
+
+
+# ----------------------------------------------------------------------
+# Keyframe reduction
+# ----------------------------------------------------------------------
+
+def slerp(q0, q1, s):
+    """Spherical interpolation of (K, 4) quaternion pairs at (K,) fractions"""
+    dot = np.sum(q0 * q1, axis=-1)
+    q1 = np.where(dot[:, None] < 0.0, -q1, q1)
+    theta = np.arccos(np.clip(np.abs(dot), 0.0, 1.0))
+    sin = np.sin(theta)
+    small = sin < 1e-6
+    safe = np.where(small, 1.0, sin)
+    w0 = np.where(small, 1.0 - s, np.sin((1.0 - s) * theta) / safe)
+    w1 = np.where(small, s, np.sin(s * theta) / safe)
+    q = w0[:, None] * q0 + w1[:, None] * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def lerp(v0, v1, s):
+    """Linear interpolation of (K, 3) vector pairs at (K,) fractions"""
+    return v0 + (v1 - v0) * s[:, None]
+
+
+def quaternion_error(a, b):
+    """Rotation angle (radians) between (K, 4) quaternions"""
+    return 2.0 * np.arccos(np.clip(np.abs(np.sum(a * b, axis=-1)), 0.0, 1.0))
+
+
+def vector_error(a, b):
+    """Distance between (K, 3) vectors"""
+    return np.linalg.norm(a - b, axis=-1)
+
+
+CHANNEL_KINDS = {
+    "rotation": (slerp, quaternion_error),
+    "translation": (lerp, vector_error),
+}
+
+
+def reduce_keys(times, values, tolerance, path):
+    """Indices of the frames to keep as keys so interpolation stays within tolerance of every frame"""
+    interpolate, error = CHANNEL_KINDS[path]
+    last = len(values) - 1
+    if error(values, np.broadcast_to(values[0], values.shape)).max() <= tolerance:
+        return np.array([0])
+
+    keep = {0, last}
+    pending = [(0, last)]
+    while pending:
+        a, b = pending.pop()
+        if b - a < 2:
+            continue
+        between = np.arange(a + 1, b)
+        s = (times[between] - times[a]) / (times[b] - times[a])
+        approx = interpolate(np.broadcast_to(values[a], (len(between),) + values.shape[1:]),
+                             np.broadcast_to(values[b], (len(between),) + values.shape[1:]), s)
+        deviation = error(approx, values[between])
+        worst = int(np.argmax(deviation))
+        if deviation[worst] > tolerance:
+            split = int(between[worst])
+            keep.add(split)
+            pending += [(a, split), (split, b)]
+    return np.array(sorted(keep))
+
+
+def sample_keys(key_times, key_values, times, path):
+    """Evaluate a reduced channel at the given times"""
+    if len(key_times) == 1:
+        return np.repeat(key_values, len(times), axis=0)
+    interpolate = CHANNEL_KINDS[path][0]
+    i = np.clip(np.searchsorted(key_times, times, side="right") - 1, 0, len(key_times) - 2)
+    s = np.clip((times - key_times[i]) / (key_times[i + 1] - key_times[i]), 0.0, 1.0)
+    return interpolate(key_values[i], key_values[i + 1], s)
+
+
+# ----------------------------------------------------------------------
+# Baking
+# ----------------------------------------------------------------------
+
+def bone_reach(rig):
+    """(N,) farthest extent of each bone's subtree from its head, at least MIN_REACH"""
+    heads = rig.rest_matrices[:, :3, 3]
+    reach = np.maximum(rig.lengths, MIN_REACH)
+    # Children before parents: a parent reaches as far as any child plus the offset to it
+    for level in reversed(rig.levels[1:]):
+        parents = rig.parents[level]
+        extent = np.linalg.norm(heads[level] - heads[parents], axis=1) + reach[level]
+        np.maximum.at(reach, parents, extent)
+    return reach
+
+
+def bake_clip(rig, clip, fps=FPS, tolerance=DEFAULT_TOLERANCE, reach=None):
+    """
+    Sample one clip, reduce its channels and measure the reduction error.
+
+    Returns {"name", "duration", "extras", "channels", "stats"}; every
+    channel is {"bone", "path", "times", "values"} with values in glTF
+    parent-relative space. Every bone gets a rotation channel (one key when
+    it does not move) so switching clips never leaves a bone posed;
+    translation channels exist only for bones with location tracks.
+    """
+    times = sample_times(clip["duration"], fps)
+    rotations, translations = clip_pose(rig, clip, times / clip["duration"])
+    world = Z_UP_TO_Y_UP @ rig.evaluate(rotations, translations)
+    local = gltf_local_matrices(rig, rotations, translations)
+
+    moved = {bone for kind, bone, _, _ in clip["tracks"] if kind == "translation"}
+    reach = bone_reach(rig) if reach is None else reach
+    channels = []
+    for i, name in enumerate(rig.names):
+        curves = {"rotation": continuous_quaternions(mat3_to_quaternions(local[:, i, :3, :3]))}
+        if name in moved:
+            curves["translation"] = local[:, i, :3, 3]
+        for path, values in curves.items():
+            limit = tolerance / reach[i] if path == "rotation" else tolerance
+            keys = reduce_keys(times, values, limit, path)
+            channels.append({"bone": i, "path": path, "times": times[keys], "values": values[keys]})
+
+    # Play the reduced curves back through FK and compare joint positions
+    reduced = local.copy()
+    for channel in channels:
+        values = sample_keys(channel["times"], channel["values"], times, channel["path"])
+        if channel["path"] == "rotation":
+            reduced[:, channel["bone"], :3, :3] = quaternions_to_mat3(values)
+        else:
+            reduced[:, channel["bone"], :3, 3] = values
+    reduced_world = accumulate_world_matrices(rig.parents, reduced, rig.levels)
+    joint_error = np.linalg.norm(reduced_world[..., :3, 3] - world[..., :3, 3], axis=-1)
+
+    extras = {"state": clip["state"], "loop": clip["loop"], **clip["extras"]}
+    return {
+        "name": clip["name"],
+        "duration": clip["duration"],
+        "extras": extras,
+        "channels": channels,
+        "stats": {
+            "frames": len(times),
+            "samples": len(times) * len(channels),
+            "keys": sum(len(channel["times"]) for channel in channels),
+            "max_error": float(joint_error.max()),
+        },
+    }
+
+
+def bake_clips(rig, clips=None, fps=FPS, tolerance=DEFAULT_TOLERANCE):
+    """Bake every clip (default: player_clips()) for one rig"""
+    clips = player_clips() if clips is None else clips
+    reach = bone_reach(rig)
+    return [bake_clip(rig, clip, fps, tolerance, reach) for clip in clips]
+
+
+def rig_from_character(character):
+    """PoseRig from headless_character arrays (glTF joint matrices back in Blender space)"""
+    return PoseRig(character["parents"], Y_UP_TO_Z_UP @ np.asarray(character["joint_matrices"]),
+                   names=character["names"])
+
+
+def add_animations(builder, animations, joint_nodes):
+    """Write baked animations into a GlbBuilder; joint_nodes maps bone index -> node index"""
+    for animation in animations:
+        channels = [{"node": joint_nodes[channel["bone"]], "path": channel["path"],
+                     "times": channel["times"], "values": channel["values"]}
+                    for channel in animation["channels"]]
+        builder.add_animation(animation["name"], channels, animation["extras"])
+
+
+def parse_args(argv=None):
+    """Command line for the bake report"""
+    parser = argparse.ArgumentParser(description="Bake and keyframe-reduce the player clips")
+    parser.add_argument("--skeleton", default=DEFAULT_SKELETON, help="skeleton spec path (without extension)")
+    parser.add_argument("--fps", type=int, default=FPS, help="sampling rate before reduction")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE * 1000.0,
+                        help="largest movement error per channel, millimeters")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Bake every clip for one skeleton and print the reduction"""
+    args = parse_args(argv)
+    rig = PoseRig.from_spec(SkeletonSpec.load(args.skeleton))
+    animations = bake_clips(rig, fps=args.fps, tolerance=args.tolerance / 1000.0)
+
+    print("=" * 80)
+    print("KHAOS ANIMATION BAKE")
+    print("=" * 80)
+    print(f"  {'clip':<16}{'state':<12}{'frames':>8}{'samples':>10}{'keys':>8}{'kept':>8}{'error mm':>10}")
+    for animation in animations:
+        stats = animation["stats"]
+        print(f"  {animation['name']:<16}{animation['extras']['state']:<12}{stats['frames']:>8}"
+              f"{stats['samples']:>10}{stats['keys']:>8}{stats['keys'] / stats['samples']:>8.1%}"
+              f"{stats['max_error'] * 1000.0:>10.2f}")
+    samples = sum(animation["stats"]["samples"] for animation in animations)
+    keys = sum(animation["stats"]["keys"] for animation in animations)
+    print(f"✓ {len(animations)} clips, {keys} keys from {samples} samples ({keys / samples:.1%})")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
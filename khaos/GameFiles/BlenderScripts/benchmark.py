@@ -0,0 +1,411 @@
+"""
+Character Pipeline Benchmark for Khaos Project
+Times every pipeline stage on synthetic rigs and keeps a history per commit
+
+USAGE:
+    python benchmark.py                                   # bpy-free stages (headless pipeline)
+    python benchmark.py --scenarios humanoid creature --repeat 5
+    blender --background --factory-startup --python benchmark.py -- --scenarios humanoid creature
+    python benchmark.py --threshold 0.15 --no-save        # compare only, keep the history as is
+
+SCENARIOS:
+    humanoid   the 52-bone Khaos humanoid (skeletons/khaos_humanoid)
+    creature   the humanoid plus extra arms around the spine (~500 bones)
+    crowd      ~96 humanoids side by side in one rig (~5000 bones)
+
+HOW IT WORKS:
+1. Every scenario is a SkeletonSpec plus matching segment rules, so the
+   same fitter rules cover the grafted limbs / crowd members
+2. Plain CPython runs the headless stages (segment plan, tessellation,
+   mesh + analytic weights, rest matrices, .glb write); inside Blender the
+   real generators run (SkeletonGenerator, analyze_armature, MeshAutoFitter,
+   and CharacterBuilder for the humanoid), timed by their own stage
+   profilers (stage_profiler.py)
+3. Each scenario runs --repeat times and keeps the fastest time per stage;
+   memory is the tracemalloc peak (CPython) or the peak RSS of the Blender
+   process so far (scene_data.process_peak_memory - run one scenario per
+   Blender invocation for per-scenario peaks)
+4. The run is appended to ~/.cache/khaos_benchmarks/history.json (outside
+   the source tree) with the git commit, and compared with the previous run
+   of the same backend on the same machine: a stage slower by more than
+   --threshold (and --min-ms) is a regression, and the exit code is 1 so CI
+   can fail on it
+
+Not a test - numbers only mean something against the same machine's history.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Sibling modules (skeleton_spec, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+import headless_character
+from fit_kernel import build_segment_plan, humanoid_segment_rules
+from rig_math import Z_UP_TO_Y_UP, bone_rest_matrices
+from skeleton_spec import DEFAULT_SKELETON, SkeletonSpec, categorize_bones
+from stage_profiler import StageProfiler
+from tessellation import DEFAULT_MAX_ERROR, plan_tessellation
+
+HISTORY_FORMAT = "khaos-benchmark"
+HISTORY_VERSION = 1
+# Outside the source tree, next to the build cache (build_cache.DEFAULT_CACHE_DIR)
+DEFAULT_HISTORY = os.path.join(os.path.expanduser("~"), ".cache", "khaos_benchmarks", "history.json")
+
+# A stage is a regression when it is this much slower than the previous run...
+DEFAULT_THRESHOLD = 0.2
+# ...and slower by at least this many milliseconds (timer noise on tiny stages)
+DEFAULT_MIN_MS = 2.0
+
+SCENARIOS = ("humanoid", "creature", "crowd")
+CREATURE_BONES = 500
+CROWD_BONES = 5000
+# Subtree grafted onto the creature's spine
+CREATURE_LIMB = "Shoulder.L"
+CROWD_SPACING = 1.0
+
+
+# ----------------------------------------------------------------------
+# Synthetic rigs
+# ----------------------------------------------------------------------
+
+def subtree(spec, root):
+    """Indices of root and all its descendants (spec sorted, parents first)"""
+    inside = np.zeros(len(spec), dtype=bool)
+    inside[spec.index(root)] = True
+    for i, parent in enumerate(spec.parents):
+        if parent >= 0 and inside[parent]:
+            inside[i] = True
+    return np.flatnonzero(inside)
+
+
+def renamed_rules(rules, names, rename):
+    """Copies of the rules whose bones are all in `names`, with every bone renamed"""
+    copies = []
+    for rule in rules:
+        if rule["bone"] in names and rule["end_bone"] in names:
+            copies.append(dict(rule, name=rename(rule["name"]), bone=rename(rule["bone"]),
+                               end_bone=rename(rule["end_bone"])))
+    return copies
+
+
+def merge_specs(parts):
+    """One spec from (names, parents, heads, tails, rolls) parts; parent indices are global"""
+    names = [name for part in parts for name in part[0]]
+    return SkeletonSpec(
+        names=names,
+        parents=np.concatenate([part[1] for part in parts]).astype(np.int32),
+        heads=np.concatenate([part[2] for part in parts]),
+        tails=np.concatenate([part[3] for part in parts]),
+        rolls=np.concatenate([part[4] for part in parts]),
+        categories=categorize_bones(names),
+    )
+
+
+def creature_rig(base, rules, bones=CREATURE_BONES):
+    """The humanoid with copies of one arm rotated around the spine until ~bones bones"""
+    limb = subtree(base, CREATURE_LIMB)
+    copies = max(0, math.ceil((bones - len(base)) / len(limb)))
+    local = {int(old): new for new, old in enumerate(limb)}
+    limb_names = {base.names[i] for i in limb}
+
+    parts = [(base.names, base.parents, base.heads, base.tails, base.rolls)]
+    all_rules = list(rules)
+    for k in range(1, copies + 1):
+        # Spread the limbs around the body and a little down the torso
+        angle = 2.0 * math.pi * k / (copies + 1)
+        c, s = math.cos(angle), math.sin(angle)
+        rotation = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+        drop = np.array([0.0, 0.0, -0.02 * (k % 8)])
+
+        offset = len(base) + (k - 1) * len(limb)
+        parents = np.array([offset + local[int(base.parents[i])] if int(base.parents[i]) in local
+                            else base.parents[i] for i in limb])
+        suffix = f".{k:03d}"
+        parts.append(([base.names[i] + suffix for i in limb], parents,
+                      base.heads[limb] @ rotation.T + drop, base.tails[limb] @ rotation.T + drop,
+                      base.rolls[limb]))
+        all_rules += renamed_rules(rules, limb_names, lambda name, suffix=suffix: name + suffix)
+    return merge_specs(parts), all_rules
+
+
+def crowd_rig(base, rules, bones=CROWD_BONES):
+    """~bones bones worth of humanoids on a square grid, all in one rig"""
+    members = max(1, round(bones / len(base)))
+    columns = math.ceil(math.sqrt(members))
+    base_names = set(base.names)
+
+    parts, all_rules = [], []
+    for k in range(members):
+        offset = np.array([(k % columns) * CROWD_SPACING, (k // columns) * CROWD_SPACING, 0.0])
+        prefix = f"C{k:03d}_"
+        parents = np.where(base.parents >= 0, base.parents + k * len(base), -1)
+        parts.append(([prefix + name for name in base.names], parents,
+                      base.heads + offset, base.tails + offset, base.rolls))
+        all_rules += renamed_rules(rules, base_names, lambda name, prefix=prefix: prefix + name)
+    return merge_specs(parts), all_rules
+
+
+def scenario_rig(scenario, skeleton=DEFAULT_SKELETON):
+    """(spec, rules) of one scenario"""
+    base = SkeletonSpec.load(skeleton).sorted()
+    rules = humanoid_segment_rules()
+    if scenario == "humanoid":
+        return base, rules
+    if scenario == "creature":
+        return creature_rig(base, rules)
+    if scenario == "crowd":
+        return crowd_rig(base, rules)
+    raise ValueError(f"Unknown scenario '{scenario}' (choose from {', '.join(SCENARIOS)})")
+
+
+# ----------------------------------------------------------------------
+# Runs
+# ----------------------------------------------------------------------
+
+def top_level_stages(profiler, prefix=""):
+    """{stage name: ms} of a profiler's top-level stages"""
+    return {prefix + event["name"]: event["duration"] * 1000.0
+            for event in profiler.events if event["depth"] == 0}
+
+
+def run_headless(spec, rules, folder):
+    """One pass of the bpy-free pipeline; returns (stages, vertices, triangles)"""
+    profiler = StageProfiler("headless")
+    with profiler.capture():
+        profiler.step("spec")
+        spec = spec.sorted()
+        spec.validate()
+        profiler.step("segment plan")
+        plan = build_segment_plan(spec.names, rules)
+        profiler.step("tessellation")
+        tessellated = plan_tessellation(spec.heads, spec.tails, spec.parents, plan, DEFAULT_MAX_ERROR)
+        profiler.step("mesh + weights")
+        character = headless_character.character_mesh(spec, tessellated["plan"], tessellated["templates"], 0.2)
+        profiler.step("rest matrices")
+        joint_matrices = Z_UP_TO_Y_UP @ bone_rest_matrices(spec.heads, spec.tails, spec.rolls)
+        character.update(names=spec.names, parents=spec.parents, joint_matrices=joint_matrices,
+                         inverse_bind_matrices=np.linalg.inv(joint_matrices))
+        profiler.step("write glb")
+        headless_character.write_character_glb(os.path.join(folder, "benchmark.glb"), character)
+    return top_level_stages(profiler), len(character["positions"]), len(character["indices"])
+
+
+def blender_mesh_counts():
+    """Vertices and triangles of every mesh object in the scene"""
+    vertices = triangles = 0
+    for obj in bpy.data.objects:
+        if obj.type == 'MESH':
+            totals = np.empty(len(obj.data.polygons), dtype=np.int32)
+            obj.data.polygons.foreach_get("loop_total", totals)
+            vertices += len(obj.data.vertices)
+            triangles += int(np.sum(totals - 2))
+    return vertices, triangles
+
+
+def run_blender(scenario, spec, rules, folder):
+    """One pass of the Blender generators; returns (stages, vertices, triangles)"""
+    import analyze_skeleton
+    import blender_character_generator
+    import mesh_auto_fit
+    import skeleton_generator_clean
+
+    spec_path = spec.save(os.path.join(folder, scenario))
+    stages = {}
+
+    generator = skeleton_generator_clean.SkeletonGenerator()
+    generator.generate(spec_path=spec_path)
+    stages.update(top_level_stages(generator.profiler, "skeleton/"))
+
+    start = time.perf_counter()
+    analyze_skeleton.analyze_armature(verbose=False)
+    stages["analyze/analyze_armature"] = (time.perf_counter() - start) * 1000.0
+
+    fitter = mesh_auto_fit.MeshAutoFitter(rules=rules)
+    fitter.generate()
+    stages.update(top_level_stages(fitter.profiler, "fit/"))
+    vertices, triangles = blender_mesh_counts()
+
+    if scenario == "humanoid":
+        # CharacterBuilder only knows the humanoid layout
+        builder = blender_character_generator.CharacterBuilder()
+        with builder.profiler.capture():
+            blender_character_generator.run_stages(builder)
+        stages.update(top_level_stages(builder.profiler, "character/"))
+    return stages, vertices, triangles
+
+
+def run_scenario(scenario, repeat=3):
+    """Best-of-repeat stage times, memory and output counts of one scenario"""
+    spec, rules = scenario_rig(scenario)
+    best = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for _ in range(repeat):
+            # The generators print every stage; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                if bpy is None:
+                    stages, vertices, triangles = run_headless(spec, rules, folder)
+                else:
+                    stages, vertices, triangles = run_blender(scenario, spec, rules, folder)
+            for stage, ms in stages.items():
+                best[stage] = min(ms, best.get(stage, math.inf))
+
+        if bpy is None:
+            # Separate pass: tracemalloc slows allocation-heavy stages down
+            tracemalloc.start()
+            run_headless(spec, rules, folder)
+            memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            import scene_data
+            memory = scene_data.process_peak_memory()
+
+    return {
+        "bones": len(spec),
+        "stages": best,
+        "total_ms": sum(best.values()),
+        "memory": memory,
+        "vertices": int(vertices),
+        "triangles": int(triangles),
+    }
+
+
+# ----------------------------------------------------------------------
+# History
+# ----------------------------------------------------------------------
+
+def git_commit():
+    """Short hash of HEAD (None outside a git checkout)"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def load_history(path):
+    """History dict, empty when the file does not exist yet"""
+    if not os.path.exists(path):
+        return {"format": HISTORY_FORMAT, "version": HISTORY_VERSION, "runs": []}
+    with open(path, "r") as f:
+        history = json.load(f)
+    if history.get("format") != HISTORY_FORMAT:
+        raise ValueError(f"{path} is not a benchmark history file")
+    return history
+
+
+def save_history(path, history):
+    """Write the history file"""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+
+def previous_run(history, backend, machine):
+    """Latest run of the same backend on the same machine, or None"""
+    runs = [run for run in history["runs"] if run["backend"] == backend and run.get("machine") == machine]
+    return runs[-1] if runs else None
+
+
+def find_regressions(run, baseline, threshold=DEFAULT_THRESHOLD, min_ms=DEFAULT_MIN_MS):
+    """(scenario, stage, old ms, new ms) of every stage slower than the baseline allows"""
+    regressions = []
+    for scenario, result in run["scenarios"].items():
+        old = baseline["scenarios"].get(scenario)
+        if old is None:
+            continue
+        for stage, ms in list(result["stages"].items()) + [("total", result["total_ms"])]:
+            old_ms = old["total_ms"] if stage == "total" else old["stages"].get(stage)
+            if old_ms is not None and ms > old_ms * (1.0 + threshold) and ms - old_ms >= min_ms:
+                regressions.append((scenario, stage, old_ms, ms))
+    return regressions
+
+
+def parse_args(argv):
+    """Arguments after Blender's '--' separator, or the plain command line"""
+    argv = argv[argv.index("--") + 1:] if "--" in argv else argv[1:]
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="Benchmark the character pipeline")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario (fastest is kept)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=DEFAULT_MIN_MS,
+                        help="ignore slowdowns smaller than this (timer noise)")
+    parser.add_argument("--no-save", action="store_true", help="compare only, do not append to the history")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the scenarios, report, compare with the history and record the run"""
+    args = parse_args(sys.argv if argv is None else argv)
+    backend = f"blender {bpy.app.version_string}" if bpy is not None else f"python {platform.python_version()}"
+
+    print("=" * 80)
+    print(f"KHAOS PIPELINE BENCHMARK - {backend}")
+    print("=" * 80)
+
+    run = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "backend": backend,
+        "machine": platform.node(),
+        "repeat": args.repeat,
+        "scenarios": {},
+    }
+    for scenario in args.scenarios:
+        result = run_scenario(scenario, args.repeat)
+        run["scenarios"][scenario] = result
+        memory = "?" if result["memory"] is None else f"{result['memory'] / 1024 ** 2:.1f} MB"
+        print(f"\n✓ {scenario}: {result['bones']} bones, {result['vertices']} verts, "
+              f"{result['triangles']} tris, {result['total_ms']:.1f} ms, {memory}")
+        for stage, ms in result["stages"].items():
+            print(f"    {stage:<44}{ms:>10.2f} ms")
+
+    history = load_history(args.history)
+    baseline = previous_run(history, backend, run["machine"])
+    regressions = find_regressions(run, baseline, args.threshold, args.min_ms) if baseline else []
+
+    print("\n" + "=" * 80)
+    if baseline is None:
+        print("No previous run of this backend on this machine - nothing to compare")
+    elif regressions:
+        print(f"REGRESSIONS vs {baseline.get('commit') or baseline['timestamp']} (> {args.threshold:.0%}):")
+        for scenario, stage, old_ms, ms in regressions:
+            print(f"  ✗ {scenario} / {stage}: {old_ms:.2f} -> {ms:.2f} ms ({ms / old_ms - 1.0:+.0%})")
+    else:
+        print(f"✓ No regressions vs {baseline.get('commit') or baseline['timestamp']}")
+
+    if not args.no_save:
+        history["runs"].append(run)
+        save_history(args.history, history)
+        print(f"✓ Recorded in {args.history}")
+    print("=" * 80)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    # Also ends Blender with the status, so CI can fail on regressions
+    sys.exit(main())
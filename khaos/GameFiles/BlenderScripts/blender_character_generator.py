@@ -1,7 +1,13 @@
 """
 Blender Character Generator for Godot - Khaos Project
 Creates anatomically correct humanoid armature with 55+ bones
-Includes basic mesh and automatic weight painting
+Includes basic mesh and analytic weights (each part weighted to the bones it
+spans and blended across the joints by skin_weights.py;
+CharacterBuilder(analytic_weights=False) falls back to automatic weights)
+Bone positions follow the proportions in character_layout.py; pass
+CharacterBuilder(proportions={...}) for a variant, or use population.py to
+generate whole batches (the detailed mesh parts are placed on the bones, so
+they follow the variant too)
 
 USAGE:
 1. Open Blender (4.0+ recommended)
@@ -12,6 +18,10 @@ USAGE:
 6. Character will be generated at origin
 7. Export as GLTF: File → Export → glTF 2.0 (.glb)
 
+The scene is built through scene_data.py (bpy.data, one edit-mode session
+for the skeleton, mesh parts written straight into one datablock), so it
+also runs in blender --background.
+
 Export Settings:
 - Format: glTF Binary (.glb)
 - Include: Selected Objects (select armature + mesh)
@@ -19,43 +29,64 @@ Export Settings:
 - Data: Mesh, Materials, Skinning, Shape Keys, Armature
 """
 
-import bpy
-import math
-from mathutils import Vector, Matrix
+import os
+import sys
+
+import numpy as np
+from mathutils import Vector
+
+# Sibling modules (character_layout, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import bone_heat
+import character_layout
+import fit_kernel
+import scene_data
+import skin_weights
+import stage_profiler
 
-# Anatomical proportions (1.8 Godot units = 1.8 Blender units)
-CHARACTER_HEIGHT = 1.8
-HEAD_RADIUS = 0.125  # Sphere radius (0.25 diameter)
-TORSO_HEIGHT = 0.7
-ARM_LENGTH = 0.9
-LEG_LENGTH = 0.9
-HAND_LENGTH = 0.2
+# Anatomical proportions (1.8 Godot units = 1.8 Blender units), see character_layout.py
+from character_layout import CHARACTER_HEIGHT
+
+
+def part_matrix(location, scale):
+    """Translate * Scale placing a unit template (bpy primitive default size)"""
+    matrix = np.diag([*scale, 1.0]).astype(np.float64)
+    matrix[:3, 3] = location
+    return matrix
 
 
 class CharacterBuilder:
     """Builds a complete rigged humanoid character for Godot"""
 
-    def __init__(self):
+    def __init__(self, analytic_weights=True, proportions=None, blend=skin_weights.DEFAULT_BLEND):
         self.armature = None
         self.bones_dict = {}
+        # Bone positions come from the proportions (character_layout.py);
+        # the defaults reproduce the original hand-placed skeleton
+        self.layout = character_layout.reference_layout()
+        self.bone_names, self.parents, heads, tails = character_layout.layout_bones(proportions, self.layout)
+        self.heads, self.tails = heads[0], tails[0]
+        self.part_scale = (proportions or {}).get("height", CHARACTER_HEIGHT) / CHARACTER_HEIGHT
+        # Weight each mesh part to the bone it was built for instead of
+        # running ARMATURE_AUTO's bone-heat solve over the joined mesh
+        self.analytic_weights = analytic_weights
+        # Fraction of a bone's length blended into its parent/child at joints
+        self.blend = blend
+        # Stage timings, bpy.ops and depsgraph counts (see main())
+        self.profiler = stage_profiler.StageProfiler("blender_character_generator")
 
     def clear_scene(self):
         """Clear existing objects"""
-        bpy.ops.object.select_all(action='SELECT')
-        bpy.ops.object.delete()
+        scene_data.ensure_object_mode()
+        scene_data.clear_objects()
 
     def create_armature(self):
-        """Create the main armature object"""
-        bpy.ops.object.armature_add(enter_editmode=False, location=(0, 0, 0))
-        self.armature = bpy.context.active_object
-        self.armature.name = "PlayerArmature"
+        """Create the main armature object (no default bone to remove)"""
+        self.armature = scene_data.new_armature_object("PlayerArmature")
         self.armature.show_in_front = True  # X-ray mode for visibility
-
-        # Remove default bone
-        bpy.ops.object.mode_set(mode='EDIT')
-        edit_bones = self.armature.data.edit_bones
-        edit_bones.remove(edit_bones[0])
-
         return self.armature
 
     def add_bone(self, name, parent_name=None, head_pos=Vector((0, 0, 0)), tail_pos=Vector((0, 0, 0.1)), roll=0):
@@ -75,360 +106,150 @@ class CharacterBuilder:
         self.bones_dict[name] = bone
         return bone
 
+    def build_chain(self, chain):
+        """Add every bone of one layout chain (bones are listed parents first)"""
+        for i, bone in enumerate(self.layout):
+            if bone.chain == chain:
+                self.add_bone(
+                    bone.name,
+                    parent_name=bone.parent,
+                    head_pos=Vector(self.heads[i]),
+                    tail_pos=Vector(self.tails[i])
+                )
+
     def build_spine_chain(self):
         """Build the spine from hips to head"""
-        # Root/Hips at character center
-        root = self.add_bone(
-            "Root",
-            head_pos=Vector((0, 0, 0.9)),
-            tail_pos=Vector((0, 0, 1.05))
-        )
-
-        # Spine segments
-        spine1 = self.add_bone(
-            "Spine_01",
-            parent_name="Root",
-            head_pos=Vector((0, 0, 1.05)),
-            tail_pos=Vector((0, 0, 1.25))
-        )
-
-        spine2 = self.add_bone(
-            "Spine_02",
-            parent_name="Spine_01",
-            head_pos=Vector((0, 0, 1.25)),
-            tail_pos=Vector((0, 0, 1.45))
-        )
-
-        spine3 = self.add_bone(
-            "Spine_03",
-            parent_name="Spine_02",
-            head_pos=Vector((0, 0, 1.45)),
-            tail_pos=Vector((0, 0, 1.65))
-        )
-
-        # Neck (very short - natural proportions)
-        neck = self.add_bone(
-            "Neck",
-            parent_name="Spine_03",
-            head_pos=Vector((0, 0, 1.65)),
-            tail_pos=Vector((0, 0, 1.70))
-        )
-
-        # Head
-        head = self.add_bone(
-            "Head",
-            parent_name="Neck",
-            head_pos=Vector((0, 0, 1.70)),
-            tail_pos=Vector((0, 0, 1.95))
-        )
+        self.build_chain("spine")
 
     def build_arm_chain(self, side="L"):
         """Build complete arm with hand and fingers - T-pose with arms pointing DOWN"""
-        mirror = -1 if side == "L" else 1
-
-        # Shoulder/Clavicle (at shoulder height)
-        shoulder = self.add_bone(
-            f"Shoulder.{side}",
-            parent_name="Spine_03",
-            head_pos=Vector((mirror * 0.1, 0, 1.55)),
-            tail_pos=Vector((mirror * 0.25, 0, 1.55))
-        )
-
-        # Upper Arm (Humerus) - pointing DOWN
-        upper_arm = self.add_bone(
-            f"UpperArm.{side}",
-            parent_name=f"Shoulder.{side}",
-            head_pos=Vector((mirror * 0.25, 0, 1.55)),
-            tail_pos=Vector((mirror * 0.25, 0, 1.25))  # Straight down
-        )
-
-        # Forearm (Radius/Ulna) - continuing down
-        forearm = self.add_bone(
-            f"ForeArm.{side}",
-            parent_name=f"UpperArm.{side}",
-            head_pos=Vector((mirror * 0.25, 0, 1.25)),
-            tail_pos=Vector((mirror * 0.25, 0, 0.95))  # Straight down
-        )
-
-        # Hand - pointing DOWNWARD at character's side (relaxed pose)
-        hand = self.add_bone(
-            f"Hand.{side}",
-            parent_name=f"ForeArm.{side}",
-            head_pos=Vector((mirror * 0.25, 0, 0.95)),
-            tail_pos=Vector((mirror * 0.25, 0, 0.85))  # Pointing down in -Z direction
-        )
-
-        # Fingers (5 fingers, 3 bones each) - pointing downward from hand
-        # Fingers extend downward (-Z direction) with slight spread in X
-        self.build_finger(f"Hand.{side}", "Thumb", side,
-                         start=Vector((mirror * 0.28, 0, 0.87)),
-                         direction=Vector((mirror * 0.02, 0, -0.04)))
-
-        self.build_finger(f"Hand.{side}", "Index", side,
-                         start=Vector((mirror * 0.27, 0, 0.85)),
-                         direction=Vector((0, 0, -0.045)))
-
-        self.build_finger(f"Hand.{side}", "Middle", side,
-                         start=Vector((mirror * 0.25, 0, 0.85)),
-                         direction=Vector((0, 0, -0.05)))
-
-        self.build_finger(f"Hand.{side}", "Ring", side,
-                         start=Vector((mirror * 0.23, 0, 0.85)),
-                         direction=Vector((0, 0, -0.045)))
-
-        self.build_finger(f"Hand.{side}", "Pinky", side,
-                         start=Vector((mirror * 0.21, 0, 0.85)),
-                         direction=Vector((0, 0, -0.04)))
-
-    def build_finger(self, hand_name, finger_name, side, start, direction):
-        """Build a 3-bone finger"""
-        # Proximal phalanx (first segment)
-        bone1 = self.add_bone(
-            f"{finger_name}_01.{side}",
-            parent_name=hand_name,
-            head_pos=start,
-            tail_pos=start + direction
-        )
-
-        # Middle phalanx
-        bone2 = self.add_bone(
-            f"{finger_name}_02.{side}",
-            parent_name=f"{finger_name}_01.{side}",
-            head_pos=start + direction,
-            tail_pos=start + direction * 1.9
-        )
-
-        # Distal phalanx (tip)
-        bone3 = self.add_bone(
-            f"{finger_name}_03.{side}",
-            parent_name=f"{finger_name}_02.{side}",
-            head_pos=start + direction * 1.9,
-            tail_pos=start + direction * 2.7
-        )
+        self.build_chain(f"arm.{side}")
 
     def build_leg_chain(self, side="L"):
         """Build complete leg with foot"""
-        mirror = -1 if side == "L" else 1
-
-        # Upper Leg (Femur)
-        upper_leg = self.add_bone(
-            f"UpperLeg.{side}",
-            parent_name="Root",
-            head_pos=Vector((mirror * 0.15, 0, 0.9)),
-            tail_pos=Vector((mirror * 0.15, 0, 0.45))
-        )
-
-        # Lower Leg (Tibia/Fibula)
-        lower_leg = self.add_bone(
-            f"LowerLeg.{side}",
-            parent_name=f"UpperLeg.{side}",
-            head_pos=Vector((mirror * 0.15, 0, 0.45)),
-            tail_pos=Vector((mirror * 0.15, 0, 0.05))
-        )
-
-        # Foot
-        foot = self.add_bone(
-            f"Foot.{side}",
-            parent_name=f"LowerLeg.{side}",
-            head_pos=Vector((mirror * 0.15, 0, 0.05)),
-            tail_pos=Vector((mirror * 0.15, 0.15, 0.0))
-        )
-
-        # Toes
-        toe = self.add_bone(
-            f"Toe.{side}",
-            parent_name=f"Foot.{side}",
-            head_pos=Vector((mirror * 0.15, 0.15, 0.0)),
-            tail_pos=Vector((mirror * 0.15, 0.25, 0.0))
-        )
+        self.build_chain(f"leg.{side}")
 
     def build_complete_skeleton(self):
-        """Build the entire skeleton"""
-        bpy.ops.object.mode_set(mode='EDIT')
+        """Build the entire skeleton (one edit-mode session for every bone)"""
+        with scene_data.edit_bones(self.armature, clear=True):
+            print("Building spine...")
+            self.build_spine_chain()
 
-        print("Building spine...")
-        self.build_spine_chain()
+            print("Building left arm...")
+            self.build_arm_chain("L")
 
-        print("Building left arm...")
-        self.build_arm_chain("L")
+            print("Building right arm...")
+            self.build_arm_chain("R")
 
-        print("Building right arm...")
-        self.build_arm_chain("R")
+            print("Building left leg...")
+            self.build_leg_chain("L")
 
-        print("Building left leg...")
-        self.build_leg_chain("L")
+            print("Building right leg...")
+            self.build_leg_chain("R")
 
-        print("Building right leg...")
-        self.build_leg_chain("R")
-
-        bpy.ops.object.mode_set(mode='OBJECT')
         print(f"Skeleton complete! Total bones: {len(self.armature.data.bones)}")
 
     def create_simple_mesh(self):
         """Create a simple humanoid mesh for testing"""
-        # Create base mesh from metaball or basic shapes
-        # For now, create a simple subdivided cube shaped like a character
-
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 1.0))
-        mesh_obj = bpy.context.active_object
-        mesh_obj.name = "PlayerMesh"
-
-        # Scale to match character proportions
-        mesh_obj.scale = (0.4, 0.3, 0.9)
-        bpy.ops.object.transform_apply(scale=True)
+        # A subdivided box shaped like a character, scaled to its proportions
+        geometry = fit_kernel.assemble_templates([part_matrix((0, 0, 1.0), (0.4, 0.3, 0.9))], [fit_kernel.unit_box()])
+        mesh_obj = scene_data.new_mesh_object("PlayerMesh", geometry)
 
         # Add subdivision for better deformation
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.subdivide(number_cuts=4)
-        bpy.ops.object.mode_set(mode='OBJECT')
+        scene_data.subdivide(mesh_obj.data, 4)
 
         return mesh_obj
 
+    def detailed_mesh_plan(self):
+        """(segment plan, templates) of the segmented humanoid's parts, for the current bones"""
+        templates = {
+            "sphere": fit_kernel.unit_uv_sphere(32, 16),
+            "box": fit_kernel.unit_box(),
+            # Rings along the spine so every spine bone owns some of the torso
+            "torso_cone": fit_kernel.unit_tube(8, tuple(np.linspace(0.0, 1.0, 7)), 0.2, 0.32),
+            "cylinder": fit_kernel.unit_cone(32),
+        }
+        # Thickness follows the overall height; lengths follow the bones
+        s = self.part_scale
+
+        def part(bone, template, span=None, center=0.5, const=(0.0, 0.0, 0.0), per_length=(0.0, 0.0, 1.0)):
+            # Parts stay axis-aligned (align=False): limbs hang straight down in this layout
+            return fit_kernel.segment_rule(bone, template, span or bone, center=center,
+                                           const=tuple(value * s for value in const),
+                                           per_length=per_length, align=False)
+
+        # Head (sphere, radius half the head bone) centered on the head bone, pelvis (box)
+        # at the root bone's head, torso (cone, wider at the shoulders) along the whole spine
+        rules = [
+            part("Head", "sphere", per_length=(0.5, 0.5, 0.5)),
+            part("Root", "box", center=0.0, const=(0.35, 0.25, 0.15), per_length=(0.0, 0.0, 0.0)),
+            fit_kernel.segment_rule("Torso", "torso_cone", "Spine_01", end_bone="Spine_03",
+                                    const=(s, 0.65 * s, 0.0), per_length=(0.0, 0.0, 1.0), align=False),
+        ]
+
+        # Limb parts are centered on their bone and as long as it
+        for side in ["L", "R"]:
+            rules += [
+                part(f"UpperArm.{side}", "cylinder", const=(0.06, 0.06, 0.0)),
+                part(f"ForeArm.{side}", "cylinder", const=(0.05, 0.05, 0.0)),
+                # Hand box over the hand bone, taller in Z (downward direction)
+                part(f"Hand.{side}", "box", const=(0.06, 0.04, 0.0)),
+                part(f"UpperLeg.{side}", "cylinder", const=(0.08, 0.08, 0.0)),
+                part(f"LowerLeg.{side}", "cylinder", const=(0.06, 0.06, 0.0)),
+                part(f"Foot.{side}", "box", const=(0.08, 0.25, 0.05), per_length=(0.0, 0.0, 0.0)),
+            ]
+
+        return fit_kernel.build_segment_plan(self.bone_names, rules), templates
+
     def create_detailed_mesh(self):
         """Create a more detailed segmented humanoid mesh"""
-        mesh_parts = []
-
-        # Head (sphere) - positioned at new head height
-        bpy.ops.mesh.primitive_uv_sphere_add(radius=HEAD_RADIUS, location=(0, 0, 1.825))
-        head_mesh = bpy.context.active_object
-        head_mesh.name = "Head_Mesh"
-        mesh_parts.append(head_mesh)
-
-        # Pelvis/Hips (cube at root bone position)
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 0.9))
-        pelvis = bpy.context.active_object
-        pelvis.name = "Pelvis_Mesh"
-        pelvis.scale = (0.35, 0.25, 0.15)
-        bpy.ops.object.transform_apply(scale=True)
-        mesh_parts.append(pelvis)
-
-        # Torso (cone for ribcage/heart shape - wider at top, narrower at bottom)
-        bpy.ops.mesh.primitive_cone_add(
-            vertices=8,
-            radius1=0.2,  # Bottom radius (narrow at waist)
-            radius2=0.32,  # Top radius (wide at shoulders)
-            depth=0.6,
-            location=(0, 0, 1.35)  # Raised to connect better to neck
-        )
-        torso = bpy.context.active_object
-        torso.name = "Torso_Mesh"
-        # Slight forward/back depth
-        torso.scale = (1, 0.65, 1)
-        bpy.ops.object.transform_apply(scale=True)
-        mesh_parts.append(torso)
-
-        # Upper arms (cylinders) - VERTICAL now to match bones pointing down
-        for side in ["L", "R"]:
-            mirror = -1 if side == "L" else 1
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=0.06,
-                depth=0.3,
-                location=(mirror * 0.25, 0, 1.4)  # Centered on bone
-            )
-            arm = bpy.context.active_object
-            arm.name = f"UpperArm_{side}_Mesh"
-            # No rotation needed - cylinders are already vertical (Z-up)
-            mesh_parts.append(arm)
-
-        # Forearms - VERTICAL
-        for side in ["L", "R"]:
-            mirror = -1 if side == "L" else 1
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=0.05,
-                depth=0.3,
-                location=(mirror * 0.25, 0, 1.1)  # Centered on forearm bone
-            )
-            forearm = bpy.context.active_object
-            forearm.name = f"ForeArm_{side}_Mesh"
-            # No rotation needed
-            mesh_parts.append(forearm)
-
-        # Hands (boxes) - pointing DOWNWARD at character's sides
-        for side in ["L", "R"]:
-            mirror = -1 if side == "L" else 1
-            bpy.ops.mesh.primitive_cube_add(
-                size=0.1,
-                location=(mirror * 0.25, 0, 0.90)  # At wrist height
-            )
-            hand = bpy.context.active_object
-            hand.name = f"Hand_{side}_Mesh"
-            hand.scale = (0.6, 0.4, 1.0)  # Taller in Z (downward direction)
-            bpy.ops.object.transform_apply(scale=True)
-            mesh_parts.append(hand)
-
-        # Upper legs
-        for side in ["L", "R"]:
-            mirror = -1 if side == "L" else 1
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=0.08,
-                depth=0.45,
-                location=(mirror * 0.15, 0, 0.675)
-            )
-            upper_leg = bpy.context.active_object
-            upper_leg.name = f"UpperLeg_{side}_Mesh"
-            mesh_parts.append(upper_leg)
-
-        # Lower legs
-        for side in ["L", "R"]:
-            mirror = -1 if side == "L" else 1
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=0.06,
-                depth=0.4,
-                location=(mirror * 0.15, 0, 0.25)
-            )
-            lower_leg = bpy.context.active_object
-            lower_leg.name = f"LowerLeg_{side}_Mesh"
-            mesh_parts.append(lower_leg)
-
-        # Feet
-        for side in ["L", "R"]:
-            mirror = -1 if side == "L" else 1
-            bpy.ops.mesh.primitive_cube_add(
-                size=0.1,
-                location=(mirror * 0.15, 0.08, 0.025)
-            )
-            foot = bpy.context.active_object
-            foot.name = f"Foot_{side}_Mesh"
-            foot.scale = (0.8, 2.5, 0.5)
-            bpy.ops.object.transform_apply(scale=True)
-            mesh_parts.append(foot)
-
-        # Join all mesh parts
-        bpy.ops.object.select_all(action='DESELECT')
-        for part in mesh_parts:
-            part.select_set(True)
-        bpy.context.view_layer.objects.active = mesh_parts[0]
-        bpy.ops.object.join()
-
-        unified_mesh = bpy.context.active_object
-        unified_mesh.name = "PlayerMesh"
+        # All parts go straight into one datablock - no primitives, no join
+        plan, templates = self.detailed_mesh_plan()
+        with self.profiler.stage("Place parts", parts=len(plan)):
+            geometry = fit_kernel.place_segments(self.heads, self.tails, plan, templates)
+        with self.profiler.stage("Write mesh"):
+            unified_mesh = scene_data.new_mesh_object("PlayerMesh", geometry)
+            self.profiler.record_mesh(unified_mesh.data)
+
+        with self.profiler.stage("Part weights"):
+            self.assign_part_weights(unified_mesh, geometry, plan)
 
         # Add subdivision for smoother deformation
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.subdivide(number_cuts=2)
-        bpy.ops.object.mode_set(mode='OBJECT')
+        with self.profiler.stage("Subdivide", cuts=2):
+            scene_data.subdivide(unified_mesh.data, 2)
+            self.profiler.record_mesh(unified_mesh.data)
 
         return unified_mesh
 
+    def assign_part_weights(self, mesh_obj, geometry, plan):
+        """Weight every part to the bones it spans, blended at the joints (bulk vertex-group calls)"""
+        if not self.analytic_weights:
+            return
+        # The subdivide afterwards interpolates the weights onto the new vertices
+        joints, weights = skin_weights.segment_weights(
+            geometry["vertices"], geometry["vertex_offsets"], plan,
+            self.parents, self.heads, self.tails, blend=self.blend
+        )
+        calls = bone_heat.write_bone_groups(mesh_obj, self.bone_names, joints, weights)
+        print(f"  ✓ Wrote analytic weights ({len(self.bone_names)} groups, {calls} bulk assignments)")
+
     def parent_mesh_to_armature(self, mesh_obj):
-        """Parent mesh to armature with automatic weights"""
-        # Select mesh and armature
-        bpy.ops.object.select_all(action='DESELECT')
-        mesh_obj.select_set(True)
-        self.armature.select_set(True)
-        bpy.context.view_layer.objects.active = self.armature
+        """Parent mesh to armature (analytic weights already assigned, or automatic weights)"""
+        if self.analytic_weights and mesh_obj.vertex_groups:
+            # Plain parent + Armature modifier - no bone-heat solve
+            scene_data.parent_to_armature(mesh_obj, self.armature)
+            print("Mesh parented to armature with analytic weights!")
+            return
 
         # Parent with automatic weights
-        bpy.ops.object.parent_set(type='ARMATURE_AUTO')
+        with self.profiler.stage("Automatic weights"):
+            scene_data.parent_with_automatic_weights(mesh_obj, self.armature)
 
         print("Mesh parented to armature with automatic weights!")
 
     def setup_materials(self, mesh_obj):
-        """Add basic material to mesh"""
-        mat = bpy.data.materials.new(name="PlayerMaterial")
-        mat.use_nodes = True
+        """Add basic material to mesh (the same PlayerMaterial on every run)"""
+        mat = scene_data.reuse_material("PlayerMaterial")
 
         # Set base color (bluish grey like the original)
         bsdf = mat.node_tree.nodes["Principled BSDF"]
@@ -443,32 +264,55 @@ class CharacterBuilder:
             mesh_obj.data.materials.append(mat)
 
 
-def main():
-    """Main execution function"""
+def main(profile_path=None):
+    """Main execution function (profile_path: also write a Chrome trace there)"""
+    builder = CharacterBuilder()
+    with builder.profiler.capture():
+        run_stages(builder)
+    builder.profiler.report()
+    if profile_path:
+        print(f"✓ Profile written: {builder.profiler.write(profile_path)}")
+
+
+def run_stages(builder):
+    """The numbered generation stages"""
+    profiler = builder.profiler
     print("=" * 50)
     print("KHAOS CHARACTER GENERATOR")
     print("=" * 50)
 
-    builder = CharacterBuilder()
+    before = scene_data.datablock_stats()
 
     print("\n1. Clearing scene...")
+    profiler.step("1. Clear scene")
     builder.clear_scene()
 
     print("\n2. Creating armature...")
+    profiler.step("2. Create armature")
     builder.create_armature()
 
     print("\n3. Building skeleton...")
+    profiler.step("3. Build skeleton")
     builder.build_complete_skeleton()
+    profiler.record(bones=len(builder.armature.data.bones))
 
     print("\n4. Creating mesh...")
+    profiler.step("4. Create mesh")
     mesh = builder.create_detailed_mesh()  # Use create_simple_mesh() for simpler version
 
     print("\n5. Setting up materials...")
+    profiler.step("5. Materials")
     builder.setup_materials(mesh)
 
     print("\n6. Parenting mesh to armature...")
+    profiler.step("6. Parent + weights")
     builder.parent_mesh_to_armature(mesh)
 
+    print("\n7. Purging orphaned datablocks...")
+    profiler.step("7. Purge")
+    scene_data.purge_and_report(before, "Character")
+    profiler.close(0)
+
     print("\n" + "=" * 50)
     print("CHARACTER GENERATION COMPLETE!")
     print("=" * 50)
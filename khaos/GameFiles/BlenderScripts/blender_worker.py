@@ -0,0 +1,202 @@
+"""
+Persistent Blender Worker for Khaos Project
+One long-lived Blender process that runs generation jobs back to back
+
+USAGE:
+    blender --background --factory-startup --python blender_worker.py
+
+Normally started by worker_pool.py, which keeps K of these busy. Blender
+starts once, the generator modules are imported once, and between jobs the
+scene is emptied with bpy.data.batch_remove() instead of restarting.
+
+PROTOCOL (stdin/stdout, one JSON object per line):
+    job      {"id": "v0001", "kind": "fit", "skeleton": "skeletons/khaos_humanoid",
+              "fitter": {"weighting": "ANALYTIC", "blend": 0.2},
+              "export": "out/v0001.glb", "profile": true}
+    result   @@KHAOS@@ {"id": "v0001", "ok": true, "elapsed_ms": 812.4, ...}
+
+profile: true writes a Chrome trace next to the export (out/v0001.trace.json),
+a string writes it there; every result carries the bpy.ops and depsgraph
+update counts of its job.
+
+kind: "fit"       SkeletonGenerator + MeshAutoFitter (default)
+      "skeleton"  SkeletonGenerator only
+      "character" CharacterBuilder (blender_character_generator.py)
+      "ping"      no-op, answers immediately
+      "shutdown"  exit the worker
+
+Scripts and Blender itself print to stdout too, so only lines starting with
+the RESULT_MARKER are protocol; everything printed while a job runs is
+redirected to stderr.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+
+import bpy
+
+# Sibling modules (skeleton_generator_clean, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import blender_character_generator
+import mesh_auto_fit
+import scene_data
+import skeleton_generator_clean
+import stage_profiler
+from skeleton_spec import DEFAULT_SKELETON
+
+RESULT_MARKER = "@@KHAOS@@ "
+
+# Datablock collections emptied between jobs (everything a job can create)
+RESET_COLLECTIONS = ("objects", "meshes", "armatures", "materials", "actions", "images", "textures")
+
+
+def reset_scene():
+    """Remove every object and generated datablock without reloading the file"""
+    scene_data.ensure_object_mode()
+
+    ids = [block for name in RESET_COLLECTIONS for block in getattr(bpy.data, name)]
+    if ids:
+        bpy.data.batch_remove(ids)
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+def export_glb(filepath):
+    """Export the whole scene as a +Y up .glb"""
+    folder = os.path.dirname(filepath)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    # Extras carry custom properties such as the LOD view ranges
+    bpy.ops.export_scene.gltf(filepath=filepath, export_format='GLB', export_yup=True, export_extras=True)
+
+
+def run_fit(job, profiler):
+    """Skeleton from a spec, then the fitted mesh"""
+    skeleton = skeleton_generator_clean.SkeletonGenerator()
+    skeleton.generate(spec_path=job.get("skeleton") or DEFAULT_SKELETON)
+    profiler.adopt(skeleton.profiler)
+    if job.get("kind", "fit") == "fit":
+        fitter = mesh_auto_fit.MeshAutoFitter(**job.get("fitter", {}))
+        fitter.generate()
+        profiler.adopt(fitter.profiler)
+
+
+def run_character(job, profiler):
+    """Procedural character, same steps as blender_character_generator.main()"""
+    builder = blender_character_generator.CharacterBuilder(**job.get("builder", {}))
+    builder.profiler = profiler
+    with profiler.stage("Create armature"):
+        builder.create_armature()
+    with profiler.stage("Build skeleton"):
+        builder.build_complete_skeleton()
+    with profiler.stage("Create mesh"):
+        mesh = builder.create_detailed_mesh()
+    builder.setup_materials(mesh)
+    with profiler.stage("Parent + weights"):
+        builder.parent_mesh_to_armature(mesh)
+
+
+JOB_KINDS = {
+    "fit": run_fit,
+    "skeleton": run_fit,
+    "character": run_character,
+}
+
+
+def scene_stats():
+    """Bone/vertex/datablock counts and process memory of the finished scene, returned with every result"""
+    bones = sum(len(obj.data.bones) for obj in bpy.data.objects if obj.type == 'ARMATURE')
+    vertices = sum(len(obj.data.vertices) for obj in bpy.data.objects if obj.type == 'MESH')
+    return {"bones": bones, "vertices": vertices,
+            "datablocks": scene_data.datablock_counts(), "memory": scene_data.process_memory()}
+
+
+def profile_path(job):
+    """Where a job's Chrome trace goes: next to its export, or the explicit "profile" path"""
+    if isinstance(job.get("profile"), str):
+        return job["profile"]
+    if job.get("profile") and job.get("export"):
+        return os.path.splitext(job["export"])[0] + ".trace.json"
+    return None
+
+
+def run_job(job):
+    """Run one job in a clean scene and return its result dict"""
+    start = time.perf_counter()
+    result = {"id": job.get("id"), "ok": True}
+    profiler = stage_profiler.StageProfiler(f"job {job.get('id')}")
+    try:
+        kind = job.get("kind", "fit")
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind '{kind}'")
+
+        with profiler.capture():
+            profiler.step("Reset scene")
+            reset_scene()
+            profiler.step(f"Run {kind}")
+            JOB_KINDS[kind](job, profiler)
+            result.update(scene_stats())
+
+            if job.get("export"):
+                profiler.step("Export glb")
+                export_glb(job["export"])
+                result["export"] = job["export"]
+    except Exception as error:  # a failed job must not take the worker down
+        result.update(ok=False, error=f"{type(error).__name__}: {error}",
+                      traceback=traceback.format_exc())
+
+    result["bpy_ops"] = profiler.op_calls
+    result["depsgraph_updates"] = profiler.depsgraph_updates
+    if profile_path(job):
+        result["profile"] = profiler.write(profile_path(job))
+
+    result["elapsed_ms"] = (time.perf_counter() - start) * 1000.0
+    return result
+
+
+def send(stream, message):
+    """Write one protocol line"""
+    stream.write(RESULT_MARKER + json.dumps(message) + "\n")
+    stream.flush()
+
+
+def serve(jobs=sys.stdin, out=sys.stdout):
+    """Read jobs line by line until EOF or a shutdown job"""
+    send(out, {"ready": True, "pid": os.getpid(), "blender": bpy.app.version_string})
+
+    for line in jobs:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as error:
+            send(out, {"id": None, "ok": False, "error": f"bad job line: {error}"})
+            continue
+
+        kind = job.get("kind", "fit")
+        if kind == "shutdown":
+            send(out, {"id": job.get("id"), "ok": True, "shutdown": True})
+            break
+        if kind == "ping":
+            send(out, {"id": job.get("id"), "ok": True, "pid": os.getpid()})
+            continue
+
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_job(job)
+        send(out, result)
+
+
+def main():
+    """Serve jobs from stdin"""
+    serve()
+
+
+if __name__ == "__main__":
+    main()
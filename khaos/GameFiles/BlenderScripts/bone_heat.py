@@ -0,0 +1,360 @@
+"""
+Bone Heat Weight Solver for Khaos Project
+Heat-diffusion skin weights for ANY mesh (sculpts, replacement PlayerMesh)
+
+USAGE (inside Blender, mesh + armature in the scene):
+    blender --background scene.blend --python bone_heat.py -- --mesh PlayerMesh --save
+
+USAGE (plain Python, timing a skinned .glb without Blender):
+    python bone_heat.py PlayerCharacter.glb
+
+Same idea as Blender's ARMATURE_AUTO (Baran & Popovic bone heat), but
+solved for all bones at once instead of one solve per bone:
+
+HOW IT WORKS:
+1. Cotangent Laplacian L and lumped vertex areas M are built once with
+   scipy.sparse from the triangle arrays
+2. Heat sources: every vertex's distance to every bone segment, computed
+   in vectorized chunks. A bone counts as visible when the vertex normal
+   faces away from it (cheap inside/outside test instead of ray casts);
+   the nearest visible bone heats the vertex with H = 1 / d^2
+3. The system (L + M H) w = M H p is factorized ONCE and solved for every
+   bone as one multi-column right-hand side
+4. The 4 strongest influences per vertex are kept, normalized, and written
+   through quantized bulk VertexGroup.add() calls (skin_weights.py)
+
+Requires NumPy + SciPy. Inside Blender, install SciPy into Blender's Python
+if it is missing (python -m pip install scipy with Blender's interpreter).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Sibling modules (skin_weights, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+from skin_weights import MAX_INFLUENCES, quantized_groups, sort_influences
+
+try:
+    import scipy.sparse
+    import scipy.sparse.linalg
+except ImportError:
+    scipy = None
+
+# Pinocchio's heat constant: H = HEAT_CONSTANT / d^2 for the nearest visible bone
+HEAT_CONSTANT = 1.0
+# Bones within this factor of the nearest distance share the heat (ties)
+TIE_TOLERANCE = 1.0001
+# Weights below this are dropped before normalizing, like Blender's auto weights
+WEIGHT_THRESHOLD = 0.01
+# Vertices per chunk for the (V, B) distance pass
+DISTANCE_CHUNK = 16384
+
+
+def require_scipy():
+    """Raise a clear error when SciPy is not installed"""
+    if scipy is None:
+        raise ImportError("bone_heat.py needs SciPy (pip install scipy, using Blender's Python inside Blender)")
+
+
+def vertex_normals(vertices, triangles):
+    """(V, 3) area-weighted vertex normals, accumulated with bincount"""
+    a, b, c = (vertices[triangles[:, i]] for i in range(3))
+    face_normals = np.cross(b - a, c - a)
+
+    count = len(vertices)
+    corners = triangles.ravel()
+    normals = np.empty((count, 3))
+    for axis in range(3):
+        normals[:, axis] = np.bincount(corners, np.repeat(face_normals[:, axis], 3), minlength=count)
+    return normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+
+def cotangent_laplacian(vertices, triangles):
+    """
+    Cotangent stiffness matrix and lumped vertex areas.
+
+    Returns (L, areas): L is the symmetric positive semi-definite (V, V)
+    CSC matrix sum_edges 0.5 (cot a + cot b) (w_i - w_j)^2, areas holds one
+    third of the area of every triangle touching each vertex.
+    """
+    require_scipy()
+    count = len(vertices)
+    corners = [vertices[triangles[:, i]] for i in range(3)]
+
+    double_area = np.linalg.norm(np.cross(corners[1] - corners[0], corners[2] - corners[0]), axis=1)
+    safe_area = np.maximum(double_area, 1e-12)
+
+    rows, cols, values = [], [], []
+    for i in range(3):
+        j, k = (i + 1) % 3, (i + 2) % 3
+        # Cotangent of the angle at corner i weights the opposite edge (j, k)
+        cot = np.einsum("ij,ij->i", corners[j] - corners[i], corners[k] - corners[i]) / safe_area
+        rows += [triangles[:, j], triangles[:, k]]
+        cols += [triangles[:, k], triangles[:, j]]
+        values += [-0.5 * cot, -0.5 * cot]
+
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    values = np.concatenate(values)
+
+    off_diagonal = scipy.sparse.coo_matrix((values, (rows, cols)), shape=(count, count)).tocsc()
+    diagonal = -np.asarray(off_diagonal.sum(axis=1)).ravel()
+    laplacian = (off_diagonal + scipy.sparse.diags(diagonal)).tocsc()
+
+    areas = np.bincount(triangles.ravel(), np.repeat(double_area / 6.0, 3), minlength=count)
+    return laplacian, areas
+
+
+def heat_sources(vertices, normals, heads, tails, chunk=DISTANCE_CHUNK):
+    """
+    Heat per vertex and the bone(s) each vertex is attached to.
+
+    Returns (heat, sources): heat is the (V,) diagonal of H, sources the
+    (V, B) attachment p (1 for the nearest visible bone, split on ties).
+    Vertices that see no bone fall back to the nearest bone overall, so
+    every connected piece of the mesh is anchored.
+    """
+    count, bones = len(vertices), len(heads)
+    heat = np.zeros(count)
+    sources = np.zeros((count, bones))
+    axis = tails - heads
+    length_sq = np.maximum(np.einsum("ij,ij->i", axis, axis), 1e-12)
+
+    for start in range(0, count, chunk):
+        points = vertices[start:start + chunk]
+        point_normals = normals[start:start + chunk]
+        n = len(points)
+
+        # (n, B) closest points on every bone segment, one broadcast per chunk
+        to_head = points[:, None, :] - heads[None]
+        t = np.clip(np.einsum("nbk,bk->nb", to_head, axis) / length_sq, 0.0, 1.0)
+        offset = to_head - axis[None] * t[..., None]
+        distance = np.maximum(np.linalg.norm(offset, axis=2), 1e-6)
+
+        # Visible: the bone lies behind the surface at this vertex
+        facing = np.einsum("nbk,nk->nb", offset, point_normals) / distance
+        visible_distance = np.where(facing > -0.1, distance, np.inf)
+        nearest = visible_distance.min(axis=1)
+        hidden = ~np.isfinite(nearest)
+        visible_distance[hidden] = distance[hidden]
+        nearest[hidden] = distance[hidden].min(axis=1)
+
+        attached = visible_distance <= nearest[:, None] * TIE_TOLERANCE
+        sources[start:start + n] = attached / attached.sum(axis=1, keepdims=True)
+        heat[start:start + n] = HEAT_CONSTANT / (nearest * nearest)
+
+    return heat, sources
+
+
+def solve_bone_heat(vertices, triangles, heads, tails, normals=None,
+                    max_influences=MAX_INFLUENCES, threshold=WEIGHT_THRESHOLD):
+    """
+    Bone heat weights for a triangle mesh.
+
+    vertices (V, 3), triangles (T, 3) and the bone heads/tails (B, 3) must be
+    in the same space. Returns a dict with joints (V, 4) uint16, weights
+    (V, 4) float32 (largest first, summing to 1) and per-stage timings in ms.
+    """
+    require_scipy()
+    timings = {}
+    clock = time.perf_counter()
+
+    def lap(stage):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[stage] = (now - clock) * 1000.0
+        clock = now
+
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    heads = np.asarray(heads, dtype=np.float64)
+    tails = np.asarray(tails, dtype=np.float64)
+    if normals is None:
+        normals = vertex_normals(vertices, triangles)
+    normals = np.asarray(normals, dtype=np.float64)
+
+    laplacian, areas = cotangent_laplacian(vertices, triangles)
+    lap("laplacian")
+
+    heat, sources = heat_sources(vertices, normals, heads, tails)
+    lap("heat_sources")
+
+    # (L + M H) w = M H p - symmetric positive definite, factorized once
+    # Vertices used by no triangle get a unit area so they keep their attachment
+    mass_heat = np.where(areas > 0, areas, 1.0) * heat
+    system = (laplacian + scipy.sparse.diags(mass_heat)).tocsc()
+    solver = scipy.sparse.linalg.splu(system, permc_spec="MMD_AT_PLUS_A")
+    lap("factorize")
+
+    # Every bone is one column of the right-hand side: one solve call for all
+    solution = solver.solve(sources * mass_heat[:, None])
+    lap("solve")
+
+    solution = np.clip(solution, 0.0, 1.0)
+    solution[solution < threshold] = 0.0
+    keep = min(max_influences, solution.shape[1])
+    top = np.argpartition(-solution, keep - 1, axis=1)[:, :keep]
+    weights = np.take_along_axis(solution, top, axis=1)
+
+    # Vertices whose heat all fell under the threshold keep their source bone
+    empty = weights.sum(axis=1) <= 0.0
+    if empty.any():
+        top[empty, 0] = np.argmax(sources[empty], axis=1)
+        weights[empty, 0] = 1.0
+
+    joints, weights = sort_influences(top, weights)
+    lap("normalize")
+
+    timings["total"] = sum(timings.values())
+    return {"joints": joints, "weights": weights, "timings": timings}
+
+
+def format_timings(timings, vertex_count, bone_count):
+    """One-line timing summary"""
+    stages = ", ".join(f"{stage} {ms:.1f}" for stage, ms in timings.items() if stage != "total")
+    return (f"bone heat: {vertex_count} verts x {bone_count} bones in {timings['total']:.1f} ms "
+            f"({stages} ms)")
+
+
+# ----------------------------------------------------------------------
+# Blender side
+# ----------------------------------------------------------------------
+
+def read_bone_arrays(armature):
+    """World-space bone names, heads and tails of an armature object, read with foreach_get"""
+    bones = armature.data.bones
+    heads = np.empty(len(bones) * 3, dtype=np.float32)
+    tails = np.empty(len(bones) * 3, dtype=np.float32)
+    bones.foreach_get("head_local", heads)
+    bones.foreach_get("tail_local", tails)
+
+    world = np.array(armature.matrix_world, dtype=np.float64)
+    heads = heads.reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+    tails = tails.reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+    return [bone.name for bone in bones], heads, tails
+
+
+def read_mesh_arrays(mesh_obj):
+    """World-space vertices and loop triangles of a mesh object, read with foreach_get"""
+    mesh = mesh_obj.data
+    mesh.calc_loop_triangles()
+
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.vertices.foreach_get("co", vertices)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+
+    world = np.array(mesh_obj.matrix_world, dtype=np.float64)
+    vertices = vertices.reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+    return vertices, triangles.reshape(-1, 3)
+
+
+def write_bone_groups(mesh_obj, bone_names, joints, weights):
+    """Replace the mesh's bone vertex groups with bulk add() calls; returns the call count"""
+    for name in bone_names:
+        group = mesh_obj.vertex_groups.get(name)
+        if group is not None:
+            mesh_obj.vertex_groups.remove(group)
+    groups = [mesh_obj.vertex_groups.new(name=name) for name in bone_names]
+
+    calls = 0
+    for bone, weight, vertices in quantized_groups(joints, weights):
+        groups[bone].add(vertices.tolist(), weight, 'REPLACE')
+        calls += 1
+    return calls
+
+
+def apply_bone_heat(mesh_obj, armature):
+    """Solve bone heat for a mesh object, write its vertex groups and bind it to the armature"""
+    bone_names, heads, tails = read_bone_arrays(armature)
+    vertices, triangles = read_mesh_arrays(mesh_obj)
+
+    result = solve_bone_heat(vertices, triangles, heads, tails)
+    calls = write_bone_groups(mesh_obj, bone_names, result["joints"], result["weights"])
+
+    if mesh_obj.parent != armature:
+        world = mesh_obj.matrix_world.copy()
+        mesh_obj.parent = armature
+        mesh_obj.matrix_world = world
+    if not any(m.type == 'ARMATURE' and m.object == armature for m in mesh_obj.modifiers):
+        modifier = mesh_obj.modifiers.new(name="Armature", type='ARMATURE')
+        modifier.object = armature
+
+    print(f"  ✓ {format_timings(result['timings'], len(vertices), len(bone_names))}")
+    print(f"  ✓ Wrote {len(bone_names)} vertex groups ({calls} bulk assignments)")
+    return result
+
+
+def run_in_blender(argv):
+    """Weight one mesh object of the open .blend against its armature"""
+    import bpy
+
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="bone_heat.py")
+    parser.add_argument("--mesh", default="PlayerMesh", help="mesh object to weight")
+    parser.add_argument("--armature", default=None, help="armature object (default: first armature)")
+    parser.add_argument("--save", action="store_true", help="save the .blend afterwards")
+    args = parser.parse_args(argv)
+
+    mesh_obj = bpy.data.objects.get(args.mesh)
+    if args.armature:
+        armature = bpy.data.objects.get(args.armature)
+    else:
+        armature = next((obj for obj in bpy.data.objects if obj.type == 'ARMATURE'), None)
+    if mesh_obj is None or mesh_obj.type != 'MESH' or armature is None:
+        print(f"ERROR: need a mesh object '{args.mesh}' and an armature in the scene")
+        return 1
+
+    print("\n" + "=" * 80)
+    print(f"KHAOS BONE HEAT - {mesh_obj.name} -> {armature.name}")
+    print("=" * 80)
+    apply_bone_heat(mesh_obj, armature)
+    if args.save:
+        bpy.ops.wm.save_mainfile()
+    return 0
+
+
+def run_on_glb(argv=None):
+    """Time the solver on the first skinned mesh of .glb files (no Blender)"""
+    from glb_reader import GlbFile, read_skeleton
+    from rig_math import Y_UP_TO_Z_UP, transform_points
+
+    parser = argparse.ArgumentParser(description="Solve bone heat weights for skinned .glb meshes")
+    parser.add_argument("files", nargs="+", help=".glb files with a skinned mesh")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        glb = GlbFile.read(path)
+        spec = read_skeleton(glb)
+        world = glb.node_world_matrices()
+        node = next(i for i, n in enumerate(glb.gltf["nodes"]) if "mesh" in n and "skin" in n)
+        primitive = glb.gltf["meshes"][glb.gltf["nodes"][node]["mesh"]]["primitives"][0]
+
+        # Mesh into the same Blender-space world frame as the skeleton
+        positions = glb.accessor(primitive["attributes"]["POSITION"])
+        vertices = transform_points(Y_UP_TO_Z_UP @ world[node], positions)
+        triangles = glb.accessor(primitive["indices"]).reshape(-1, 3)
+
+        result = solve_bone_heat(vertices, triangles, spec.heads, spec.tails)
+        print(f"✓ {path}: {format_timings(result['timings'], len(vertices), len(spec))}")
+    return 0
+
+
+def main():
+    """Blender mode when bpy is importable, .glb timing mode otherwise"""
+    try:
+        import bpy  # noqa: F401
+    except ImportError:
+        return run_on_glb()
+    return run_in_blender(sys.argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Content-Addressed Build Cache for Khaos Project
+Skips pipeline stages whose inputs have not changed since the last build
+
+USAGE:
+    cache = BuildCache("~/.cache/khaos", max_bytes=2 * 1024 ** 3)
+    key = cache.key("character", params={"blend": 0.2, "rules": rules},
+                    arrays={"heads": spec.heads}, sources=["fit_kernel.py"])
+    entry = cache.lookup(key)             # entry folder, or None
+    entry = cache.store(key, write_files) # write_files(folder) fills a new entry
+
+Used by headless_character.py (--cache), population.py and worker_pool.py.
+
+HOW IT WORKS:
+1. A key is the SHA-256 of everything a stage reads: canonical JSON of its
+   parameters (fitter radii and ratios, subdivision cuts, material values,
+   ...), the raw bytes + dtype + shape of its arrays (bone data), and the
+   source text of the scripts that implement it (script version)
+2. Each entry is a folder <root>/<key[:2]>/<key>/ holding the stage outputs.
+   Entries are written to a temporary folder and renamed into place, so
+   parallel builders never see half-written entries
+3. Every hit touches the entry; when the cache grows past max_bytes the
+   least recently used entries are evicted first (down to EVICT_TO of
+   max_bytes, leaving room for the next stores). Each BuildCache keeps a
+   running size total (one full scan on its first store, then the size of
+   every entry it stores), and only rescans the folder when that estimate
+   passes max_bytes. Parallel builders each count their own stores, so the
+   cache can briefly exceed max_bytes by what the others stored since their
+   last scan
+
+Pure Python + NumPy - no bpy import.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "khaos_builds")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Bumped when the key layout itself changes
+CACHE_VERSION = 1
+# Eviction frees down to this fraction of max_bytes, so a full cache is not rescanned on every store
+EVICT_TO = 0.9
+
+_source_digests = {}
+
+
+def source_digest(filename):
+    """SHA-256 of a script next to this one (cached per process)"""
+    path = filename if os.path.isabs(filename) else os.path.join(SCRIPT_DIR, filename)
+    if path not in _source_digests:
+        with open(path, "rb") as f:
+            _source_digests[path] = hashlib.sha256(f.read()).hexdigest()
+    return _source_digests[path]
+
+
+def file_digest(path, chunk=1 << 20):
+    """SHA-256 of any input file (skeleton specs, source meshes)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def canonical(value):
+    """JSON-safe, order-stable form of parameters (tuples, NumPy scalars and arrays included)"""
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return canonical(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float):
+        return repr(value)  # exact round-trip, no JSON float formatting drift
+    return value
+
+
+def directory_size(path):
+    """Total bytes of the files in a folder"""
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                pass
+    return total
+
+
+class BuildCache:
+    """Folder-per-entry cache keyed on stage input hashes, LRU-bounded by size"""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Bytes in the cache as of the last scan plus our stores since (None = not scanned yet)
+        self.estimated_bytes = None
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, stage, params=None, arrays=None, sources=(), files=()):
+        """Hash of everything a stage depends on"""
+        digest = hashlib.sha256()
+        header = {
+            "cache": CACHE_VERSION,
+            "stage": stage,
+            "params": canonical(params or {}),
+            "sources": {name: source_digest(name) for name in sorted(sources)},
+            "files": [file_digest(path) for path in files],
+        }
+        digest.update(json.dumps(header, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+        for name in sorted(arrays or {}):
+            array = np.ascontiguousarray(arrays[name])
+            digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode("utf-8"))
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        """Folder of one entry (may not exist)"""
+        return os.path.join(self.root, key[:2], key)
+
+    def lookup(self, key):
+        """Entry folder on a hit (and mark it recently used), None on a miss"""
+        path = self.entry_path(key)
+        if os.path.isdir(path):
+            now = time.time()
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def store(self, key, write_files):
+        """Create an entry: write_files(folder) fills a temporary folder that is then renamed into place"""
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key[:8]}-{uuid.uuid4().hex[:6]}-", dir=self.root)
+        try:
+            write_files(staging)
+            os.rename(staging, path)
+        except OSError:
+            # Another builder stored the same key first - theirs is identical
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if self.max_bytes:
+            if self.estimated_bytes is None:
+                self.evict()  # first store: one full scan sets the running total
+            else:
+                self.estimated_bytes += directory_size(path)
+                if self.estimated_bytes > self.max_bytes:
+                    self.evict()
+        return path
+
+    def entries(self):
+        """(last_used, bytes, path) for every entry"""
+        result = []
+        for prefix in os.listdir(self.root):
+            prefix_path = os.path.join(self.root, prefix)
+            if prefix.startswith(".") or not os.path.isdir(prefix_path):
+                continue
+            for key in os.listdir(prefix_path):
+                path = os.path.join(prefix_path, key)
+                try:
+                    result.append((os.stat(path).st_mtime, directory_size(path), path))
+                except OSError:
+                    pass  # evicted by another process meanwhile
+        return result
+
+    def evict(self):
+        """Drop least recently used entries once the cache passes max_bytes; returns bytes freed"""
+        if not self.max_bytes:
+            return 0
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            self.estimated_bytes = total
+            return 0
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= self.max_bytes * EVICT_TO:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            freed += size
+        self.estimated_bytes = total - freed
+        return freed
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        entries = self.entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+
+def copy_from_entry(entry, name, destination):
+    """Copy one cached output file to its destination path"""
+    folder = os.path.dirname(destination)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    shutil.copyfile(os.path.join(entry, name), destination)
+    return destination
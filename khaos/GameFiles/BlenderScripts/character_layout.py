@@ -0,0 +1,204 @@
+"""
+Proportional Bone Layout for Khaos Project
+Turns body proportions into bone heads/tails - for one character or thousands
+
+The reference layout is CharacterBuilder's hand-placed skeleton at the
+default proportions below (1.8 m tall). Every bone end belongs to a body
+region; a region is scaled about its attachment point, and regions are
+re-attached to each other so the skeleton stays connected:
+
+    leg    scaled by LEG_LENGTH        about the ground (x kept)
+    torso  scaled by TORSO_HEIGHT      about the hips, vertically
+    head   scaled by HEAD_RADIUS       about the neck base
+    arm    scaled by ARM_LENGTH        about the shoulder
+    hand   scaled by HAND_LENGTH       about the wrist (fingers included)
+
+CHARACTER_HEIGHT then scales the whole rig uniformly against the 1.8 m
+reference. layout_bones() evaluates all of this for N variants at once and
+returns (N, bones, 3) arrays.
+
+Pure NumPy - no bpy import.
+"""
+
+import numpy as np
+
+# Anatomical proportions (1.8 Godot units = 1.8 Blender units)
+CHARACTER_HEIGHT = 1.8
+HEAD_RADIUS = 0.125  # Sphere radius (0.25 diameter)
+TORSO_HEIGHT = 0.7
+ARM_LENGTH = 0.9
+LEG_LENGTH = 0.9
+HAND_LENGTH = 0.2
+
+DEFAULT_PROPORTIONS = {
+    "height": CHARACTER_HEIGHT,
+    "head": HEAD_RADIUS,
+    "torso": TORSO_HEIGHT,
+    "arm": ARM_LENGTH,
+    "leg": LEG_LENGTH,
+    "hand": HAND_LENGTH,
+}
+
+# Reference landmarks (default proportions)
+HIP_HEIGHT = 0.9
+NECK_HEIGHT = 1.65
+SHOULDER = (0.25, 0.0, 1.55)
+WRIST = (0.25, 0.0, 0.95)
+
+# Finger start offset (x, z) and per-segment direction (x, z), mirrored per side
+FINGERS = {
+    "Thumb": ((0.28, 0.87), (0.02, -0.04)),
+    "Index": ((0.27, 0.85), (0.0, -0.045)),
+    "Middle": ((0.25, 0.85), (0.0, -0.05)),
+    "Ring": ((0.23, 0.85), (0.0, -0.045)),
+    "Pinky": ((0.21, 0.85), (0.0, -0.04)),
+}
+# Finger joint positions along the direction (proximal, middle, distal, tip)
+FINGER_JOINTS = (0.0, 1.0, 1.9, 2.7)
+
+
+class LayoutBone:
+    """One bone of the reference layout"""
+
+    def __init__(self, name, parent, chain, head, tail, head_region, tail_region, side=None):
+        self.name = name
+        self.parent = parent
+        self.chain = chain
+        self.head = head
+        self.tail = tail
+        self.head_region = head_region
+        self.tail_region = tail_region
+        self.side = side
+
+
+def reference_layout():
+    """CharacterBuilder's skeleton at the default proportions, in build order"""
+    bones = [
+        LayoutBone("Root", None, "spine", (0, 0, 0.9), (0, 0, 1.05), "torso", "torso"),
+        LayoutBone("Spine_01", "Root", "spine", (0, 0, 1.05), (0, 0, 1.25), "torso", "torso"),
+        LayoutBone("Spine_02", "Spine_01", "spine", (0, 0, 1.25), (0, 0, 1.45), "torso", "torso"),
+        LayoutBone("Spine_03", "Spine_02", "spine", (0, 0, 1.45), (0, 0, 1.65), "torso", "torso"),
+        # Neck (very short - natural proportions)
+        LayoutBone("Neck", "Spine_03", "spine", (0, 0, 1.65), (0, 0, 1.70), "head", "head"),
+        LayoutBone("Head", "Neck", "spine", (0, 0, 1.70), (0, 0, 1.95), "head", "head"),
+    ]
+
+    for side in ("L", "R"):
+        mirror = -1 if side == "L" else 1
+        sx, wx = mirror * SHOULDER[0], mirror * WRIST[0]
+        arm = f"arm.{side}"
+        bones += [
+            LayoutBone(f"Shoulder.{side}", "Spine_03", arm, (mirror * 0.1, 0, 1.55), (sx, 0, 1.55),
+                       "torso", "torso", side),
+            # T-pose with arms pointing DOWN
+            LayoutBone(f"UpperArm.{side}", f"Shoulder.{side}", arm, (sx, 0, 1.55), (sx, 0, 1.25),
+                       "arm", "arm", side),
+            LayoutBone(f"ForeArm.{side}", f"UpperArm.{side}", arm, (sx, 0, 1.25), (wx, 0, 0.95),
+                       "arm", "arm", side),
+            LayoutBone(f"Hand.{side}", f"ForeArm.{side}", arm, (wx, 0, 0.95), (wx, 0, 0.85),
+                       "hand", "hand", side),
+        ]
+        for finger, ((x, z), (dx, dz)) in FINGERS.items():
+            joints = [(mirror * (x + dx * k), 0, z + dz * k) for k in FINGER_JOINTS]
+            parent = f"Hand.{side}"
+            for segment in range(3):
+                name = f"{finger}_0{segment + 1}.{side}"
+                bones.append(LayoutBone(name, parent, arm, joints[segment], joints[segment + 1],
+                                        "hand", "hand", side))
+                parent = name
+
+    for side in ("L", "R"):
+        mirror = -1 if side == "L" else 1
+        x = mirror * 0.15
+        leg = f"leg.{side}"
+        bones += [
+            LayoutBone(f"UpperLeg.{side}", "Root", leg, (x, 0, 0.9), (x, 0, 0.45), "leg", "leg", side),
+            LayoutBone(f"LowerLeg.{side}", f"UpperLeg.{side}", leg, (x, 0, 0.45), (x, 0, 0.05), "leg", "leg", side),
+            LayoutBone(f"Foot.{side}", f"LowerLeg.{side}", leg, (x, 0, 0.05), (x, 0.15, 0.0), "leg", "leg", side),
+            LayoutBone(f"Toe.{side}", f"Foot.{side}", leg, (x, 0.15, 0.0), (x, 0.25, 0.0), "leg", "leg", side),
+        ]
+    return bones
+
+
+def proportion_arrays(proportions=None):
+    """Proportions as a dict of (N,) float arrays; missing keys use the defaults"""
+    proportions = dict(proportions or {})
+    values = {key: np.atleast_1d(np.asarray(proportions.get(key, default), dtype=np.float64))
+              for key, default in DEFAULT_PROPORTIONS.items()}
+    count = max(len(v) for v in values.values())
+    return {key: np.broadcast_to(v, (count,)) for key, v in values.items()}
+
+
+def region_frames(p, sides):
+    """
+    Per-variant attachment point and scale of every (region, side) pair.
+
+    Returns (anchors, references, scales) keyed by region name; anchors and
+    scales are (N, 3), references (3,) or (N, 3) for per-side regions.
+    """
+    leg = p["leg"] / LEG_LENGTH
+    torso = p["torso"] / TORSO_HEIGHT
+    head = p["head"] / HEAD_RADIUS
+    arm = p["arm"] / ARM_LENGTH
+    hand = p["hand"] / HAND_LENGTH
+    ones = np.ones_like(leg)
+    zeros = np.zeros_like(leg)
+
+    hip_z = HIP_HEIGHT * leg
+    neck_z = hip_z + (NECK_HEIGHT - HIP_HEIGHT) * torso
+    shoulder_z = hip_z + (SHOULDER[2] - HIP_HEIGHT) * torso
+    wrist_z = shoulder_z + (WRIST[2] - SHOULDER[2]) * arm
+
+    frames = {
+        "leg": (np.zeros(3), np.stack([zeros, zeros, zeros], axis=1), np.stack([ones, leg, leg], axis=1)),
+        "torso": (np.array([0.0, 0.0, HIP_HEIGHT]), np.stack([zeros, zeros, hip_z], axis=1),
+                  np.stack([ones, ones, torso], axis=1)),
+        "head": (np.array([0.0, 0.0, NECK_HEIGHT]), np.stack([zeros, zeros, neck_z], axis=1),
+                 np.stack([head, head, head], axis=1)),
+    }
+    for side in sides:
+        mirror = -1 if side == "L" else 1
+        shoulder_x = np.full_like(leg, mirror * SHOULDER[0])
+        wrist_x = np.full_like(leg, mirror * WRIST[0])
+        frames[("arm", side)] = (np.array([mirror * SHOULDER[0], 0.0, SHOULDER[2]]),
+                                 np.stack([shoulder_x, zeros, shoulder_z], axis=1),
+                                 np.stack([arm, arm, arm], axis=1))
+        frames[("hand", side)] = (np.array([mirror * WRIST[0], 0.0, WRIST[2]]),
+                                  np.stack([wrist_x, zeros, wrist_z], axis=1),
+                                  np.stack([hand, hand, hand], axis=1))
+    return frames
+
+
+def layout_bones(proportions=None, layout=None):
+    """
+    Bone heads and tails for one or many proportion sets.
+
+    proportions maps height/head/torso/arm/leg/hand to scalars or (N,)
+    arrays. Returns (names, parents, heads, tails) with heads/tails shaped
+    (N, bones, 3); at the default proportions the result is exactly the
+    reference layout.
+    """
+    layout = layout or reference_layout()
+    p = proportion_arrays(proportions)
+    frames = region_frames(p, sides=("L", "R"))
+
+    names = [bone.name for bone in layout]
+    index = {name: i for i, name in enumerate(names)}
+    parents = np.array([index[bone.parent] if bone.parent else -1 for bone in layout], dtype=np.int64)
+
+    # Every bone end is (point, region key); group ends by region and transform each group at once
+    points = np.array([end for bone in layout for end in (bone.head, bone.tail)], dtype=np.float64)
+    keys = []
+    for bone in layout:
+        for region in (bone.head_region, bone.tail_region):
+            keys.append((region, bone.side) if region in ("arm", "hand") else region)
+
+    result = np.empty((len(p["height"]), len(points), 3))
+    for key in set(keys):
+        selected = np.array([i for i, k in enumerate(keys) if k == key])
+        reference, anchor, scale = frames[key]
+        offset = points[selected] - reference
+        result[:, selected] = anchor[:, None, :] + scale[:, None, :] * offset[None]
+
+    result *= (p["height"] / CHARACTER_HEIGHT)[:, None, None]
+    return names, parents, result[:, 0::2], result[:, 1::2]
@@ -0,0 +1,451 @@
+"""
+Collision Shape Generator for Khaos Project
+Per-bone capsules/boxes for hurtboxes and ragdolls - no trimesh colliders
+
+USAGE:
+    python collision_shapes.py --skeleton skeletons/khaos_humanoid --output ../SRC/Player/Scenes
+    blender --background scene.blend --python collision_shapes.py -- --output ../SRC/Player/Scenes
+
+Writes two Godot scenes next to each other:
+- PlayerHurtboxes.tscn : one BoneAttachment3D + Area3D + CollisionShape3D per
+  bone (group "hurtbox", metadata bone/region/damage_multiplier). Instance it
+  as a sibling of the imported character's Skeleton3D
+- PlayerRagdoll.tscn   : PhysicalBoneSimulator3D with one PhysicalBone3D per
+  bone, cone/hinge joint limits included. Instance it as a child of the
+  Skeleton3D
+
+HOW IT WORKS:
+1. The same segment plan MeshAutoFitter places (fit_kernel.py) gives every
+   segment's frame and size; limbs become capsules, flat cross-sections
+   (torso, pelvis) and palms/feet become boxes, the round head a sphere
+2. Segments spanning several bones (the torso) are split per bone
+3. Tiny bones (the mitten_hands policy of skeleton_reduction.py: fingers)
+   are merged into their nearest kept ancestor's shape - one hand box
+4. Bones no segment covers but the ragdoll chain needs (neck, collarbones,
+   BRIDGE_RADII) get a capsule along the bone, so the head is not jointed
+   straight to the chest. Other uncovered bones get no shape; their
+   children's PhysicalBone3D joints attach to the nearest shaped ancestor
+5. Masses use the volume of the mesh each shape stands for (the elliptical
+   frustum of a tube piece, the ellipsoid of a flattened sphere, summed
+   over merged bones), not the shape's bounding volume
+6. Shapes are expressed in bone space (Blender and glTF bone frames agree),
+   so they follow the animated skeleton without any per-frame work
+
+Pure NumPy - no bpy import (inside Blender the armature is read with
+analyze_skeleton.extract_skeleton_spec).
+"""
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+# Sibling modules (fit_kernel, ...) live next to this script - also when run by Blender
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+from fit_kernel import TEMPLATES, align_z_matrices, build_segment_plan, segment_transforms
+from godot_scene import NodePath, TscnBuilder
+from rig_math import Z_UP_TO_Y_UP, bone_rest_matrices
+from skeleton_reduction import reduce_for_policy
+from skeleton_spec import DEFAULT_SKELETON, SkeletonSpec
+from skin_weights import span_chain
+from tessellation import TUBE_RADII
+
+# Cross-sections rounder than this become capsules/spheres, flatter ones boxes
+ROUND_RATIO = 0.75
+# kg per cubic meter, for ragdoll body masses
+BODY_DENSITY = 1000.0
+# Tiny bones folded into their ancestor's shape
+MERGE_POLICY = "mitten_hands"
+# (keywords, capsule radius in meters) of bones without a segment that still get a shape
+BRIDGE_RADII = (
+    (("Neck",), 0.05),
+    (("Shoulder",), 0.06),
+)
+
+# Collision layer of the Boss hitbox (enemies); hurtboxes are only detected
+HURTBOX_LAYER = 4
+
+# (region, keywords) - first match wins; drives locational damage
+REGIONS = (
+    ("head", ("Head", "Neck")),
+    ("hand", ("Hand", "Thumb", "Index", "Middle", "Ring", "Pinky")),
+    ("foot", ("Foot", "Toe")),
+    ("arm", ("Shoulder", "Arm")),
+    ("leg", ("Leg",)),
+    ("torso", ("Root", "Spine")),
+)
+DAMAGE_MULTIPLIERS = {"head": 2.0, "torso": 1.0, "arm": 0.75, "leg": 0.75, "hand": 0.5, "foot": 0.5}
+
+# (keywords, joint type, limits in degrees) - first match wins
+# cone: (swing span, twist span); hinge: (lower, upper)
+RAGDOLL_LIMITS = (
+    (("ForeArm",), "hinge", (0.0, 145.0)),
+    (("LowerLeg",), "hinge", (-145.0, 0.0)),
+    (("UpperArm",), "cone", (80.0, 45.0)),
+    (("UpperLeg",), "cone", (60.0, 30.0)),
+    (("Hand",), "cone", (40.0, 20.0)),
+    (("Foot", "Toe"), "cone", (30.0, 10.0)),
+    (("Head", "Neck"), "cone", (35.0, 45.0)),
+    (("Shoulder",), "cone", (20.0, 10.0)),
+    (("Spine", "Root"), "cone", (20.0, 15.0)),
+)
+DEFAULT_LIMIT = ("cone", (30.0, 20.0))
+JOINT_TYPES = {"cone": 2, "hinge": 3}
+
+# Joint frames in bone space: the cone twist axis (X) and the hinge axis (Z)
+# are turned onto the bone's Y and X axes respectively
+CONE_FRAME = np.array([[0.0, -1.0, 0.0, 0.0], [1.0, 0.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
+HINGE_FRAME = np.array([[0.0, 0.0, 1.0, 0.0], [0.0, 1.0, 0.0, 0.0], [-1.0, 0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
+
+
+def bone_region(name):
+    """Body region of a bone name (locational damage)"""
+    for region, keywords in REGIONS:
+        if any(keyword in name for keyword in keywords):
+            return region
+    return "torso"
+
+
+def ragdoll_limit(name):
+    """(joint type, limits) for a bone name"""
+    for keywords, joint_type, limits in RAGDOLL_LIMITS:
+        if any(keyword in name for keyword in keywords):
+            return joint_type, limits
+    return DEFAULT_LIMIT
+
+
+def bridge_radius(name):
+    """Capsule radius for a bone without a segment (None = no shape)"""
+    for keywords, radius in BRIDGE_RADII:
+        if any(keyword in name for keyword in keywords):
+            return radius
+    return None
+
+
+def frame_matrix(rotation, origin):
+    """4x4 rigid transform"""
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation
+    matrix[:3, 3] = origin
+    return matrix
+
+
+def shape_volume(kind, radius, height, size):
+    """Volume of a capsule, sphere or box"""
+    if kind == "capsule":
+        return math.pi * radius ** 2 * (height - 2.0 * radius) + 4.0 / 3.0 * math.pi * radius ** 3
+    if kind == "sphere":
+        return 4.0 / 3.0 * math.pi * radius ** 3
+    return float(np.prod(size))
+
+
+def make_shape(bone, rotation, center, half, axis_kind, volume=None):
+    """
+    Shape dict from an oriented box (rotation columns, center, half extents).
+
+    axis_kind is "tube" (capsule along local Z when round), "round"
+    (sphere when round) or "box". volume is the mesh volume the shape
+    stands for (default: the shape's own volume).
+    """
+    half = np.asarray(half, dtype=np.float64)
+    kind, radius, height, size = "box", 0.0, 0.0, 2.0 * half
+    rotation = np.asarray(rotation, dtype=np.float64)
+
+    if axis_kind == "tube" and min(half[0], half[1]) >= ROUND_RATIO * max(half[0], half[1]):
+        kind = "capsule"
+        radius = float(max(half[0], half[1]))
+        height = float(max(2.0 * half[2], 2.0 * radius))
+        # Godot capsules run along local Y: turn the template's Z onto Y
+        rotation = np.stack([rotation[:, 0], rotation[:, 2], -rotation[:, 1]], axis=1)
+    elif axis_kind == "round" and half.min() >= ROUND_RATIO * half.max():
+        kind, radius = "sphere", float(half.max())
+
+    return {
+        "bone": int(bone),
+        "kind": kind,
+        "radius": radius,
+        "height": height,
+        "size": size,
+        "frame": frame_matrix(rotation, center),
+        "volume": shape_volume(kind, radius, height, size) if volume is None else volume,
+    }
+
+
+def segment_boxes(spec, plan):
+    """
+    Oriented boxes of every fitted segment, split per bone along multi-bone spans.
+
+    Returns (segment index, bone, rotation, center, half extents, axis kind, volume) tuples.
+    """
+    matrices = segment_transforms(spec.heads, spec.tails, plan)
+    heads = spec.heads.astype(np.float64)
+    tails = spec.tails.astype(np.float64)
+
+    boxes = []
+    for s, name in enumerate(plan.templates):
+        scaled = matrices[s, :3, :3]
+        scale = np.linalg.norm(scaled, axis=0)
+        rotation = scaled / np.maximum(scale, 1e-12)
+        vertices = TEMPLATES[name]().vertices
+        low, high = vertices.min(axis=0), vertices.max(axis=0)
+
+        if name not in TUBE_RADII:
+            center = matrices[s] @ np.append((low + high) * 0.5, 1.0)
+            half = (high - low) * 0.5 * scale
+            # Spheres are ellipsoids once scaled: pi/6 of their box
+            volume = float(np.prod(2.0 * half)) * (math.pi / 6.0 if name == "sphere" else 1.0)
+            boxes.append((s, plan.bones[s], rotation, center[:3], half,
+                          "round" if name == "sphere" else "box", volume))
+            continue
+
+        # Tubes: one piece per bone of the span, sized by the radius over that piece
+        bone, end_bone = plan.bones[s], plan.end_bones[s]
+        chain = span_chain(spec.parents, bone, end_bone) if bone != end_bone else [bone]
+        start, span = heads[bone], tails[end_bone] - heads[bone]
+        span_squared = max(float(np.dot(span, span)), 1e-12)
+        radius_bottom, radius_top = TUBE_RADII[name]
+
+        for piece in chain:
+            t0 = float(np.clip(np.dot(heads[piece] - start, span) / span_squared, 0.0, 1.0))
+            t1 = float(np.clip(np.dot(tails[piece] - start, span) / span_squared, 0.0, 1.0))
+            if piece == end_bone:
+                t1 = 1.0
+            if t1 <= t0:
+                continue
+            r0, r1 = (radius_bottom + (radius_top - radius_bottom) * t for t in (t0, t1))
+            center = matrices[s] @ np.array([0.0, 0.0, (t0 + t1) * 0.5 - 0.5, 1.0])
+            half = np.array([max(r0, r1) * scale[0], max(r0, r1) * scale[1], (t1 - t0) * 0.5 * scale[2]])
+            # Elliptical frustum of this piece of the tube
+            volume = math.pi * scale[0] * scale[1] * (r0 * r0 + r0 * r1 + r1 * r1) / 3.0 * 2.0 * half[2]
+            boxes.append((s, piece, rotation, center[:3], half, "tube", volume))
+    return boxes
+
+
+def merge_into(shape, rotation, center, half, volume):
+    """Grow a shape's box (in its own frame) to also cover another oriented box (of mesh volume `volume`)"""
+    corners = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64)
+    frame = shape["frame"]
+    own = corners * (shape["size"] * 0.5 if shape["kind"] == "box" else shape["radius"])
+    other = center + (corners * half) @ np.asarray(rotation).T
+    local = (other - frame[:3, 3]) @ frame[:3, :3]
+
+    points = np.concatenate([own, local])
+    low, high = points.min(axis=0), points.max(axis=0)
+    shape.update(kind="box", radius=0.0, height=0.0, size=high - low)
+    shape["frame"] = frame_matrix(frame[:3, :3], frame[:3, :3] @ ((low + high) * 0.5) + frame[:3, 3])
+    shape["volume"] += volume
+
+
+def build_collision_shapes(spec, rules=None, merge_policy=MERGE_POLICY):
+    """
+    Collision shapes for a skeleton spec, at most one per bone.
+
+    Returns (sorted spec, shapes); each shape is a dict with bone, kind
+    (capsule/box/sphere), radius, height, size, frame (Blender world),
+    local (bone space), volume, region and damage_multiplier.
+    """
+    spec = spec.sorted()
+    plan = build_segment_plan(spec.names, rules)
+    _, remap = reduce_for_policy(spec, merge_policy)
+
+    # Reduced index -> original index of the kept bone (parents come first)
+    kept = {}
+    for i in range(len(spec)):
+        kept.setdefault(int(remap[i]), i)
+
+    shapes, merged = {}, []
+    for _, bone, rotation, center, half, axis_kind, volume in segment_boxes(spec, plan):
+        target = kept[int(remap[bone])]
+        if target != bone:
+            merged.append((target, rotation, center, half, volume))
+        elif bone in shapes:
+            merge_into(shapes[bone], rotation, center, half, volume)
+        else:
+            shapes[bone] = make_shape(bone, rotation, center, half, axis_kind, volume)
+
+    for target, rotation, center, half, volume in merged:
+        if target in shapes:
+            merge_into(shapes[target], rotation, center, half, volume)
+        else:
+            shapes[target] = make_shape(target, rotation, center, half, "box", volume)
+
+    # Neck and collarbones carry no segment but link the head and arms to the chest
+    for bone, name in enumerate(spec.names):
+        radius = bridge_radius(name)
+        if radius is None or bone in shapes or kept[int(remap[bone])] != bone:
+            continue
+        axis = spec.tails[bone] - spec.heads[bone]
+        length = float(np.linalg.norm(axis))
+        rotation = align_z_matrices((axis / max(length, 1e-12))[None])[0]
+        center = (spec.heads[bone] + spec.tails[bone]) * 0.5
+        shapes[bone] = make_shape(bone, rotation, center, (radius, radius, length * 0.5), "tube")
+
+    rest = bone_rest_matrices(spec.heads, spec.tails, spec.rolls)
+    result = []
+    for bone in sorted(shapes):
+        shape = shapes[bone]
+        name = spec.names[bone]
+        shape["name"] = name
+        shape["local"] = np.linalg.inv(rest[bone]) @ shape["frame"]
+        shape["region"] = bone_region(name)
+        shape["damage_multiplier"] = DAMAGE_MULTIPLIERS[shape["region"]]
+        result.append(shape)
+    return spec, result
+
+
+def shape_resource(builder, shape):
+    """Godot shape sub-resource for one shape dict"""
+    if shape["kind"] == "capsule":
+        return builder.add_sub_resource("CapsuleShape3D", {"radius": shape["radius"], "height": shape["height"]})
+    if shape["kind"] == "sphere":
+        return builder.add_sub_resource("SphereShape3D", {"radius": shape["radius"]})
+    return builder.add_sub_resource("BoxShape3D", {"size": shape["size"]})
+
+
+def write_hurtbox_scene(path, spec, shapes, skeleton_path="../../Skeleton3D", layer=HURTBOX_LAYER):
+    """
+    Hurtbox scene: BoneAttachment3D > Area3D > CollisionShape3D per shape.
+
+    skeleton_path is the Skeleton3D as seen from each BoneAttachment3D (the
+    default fits the scene instanced as a sibling of the Skeleton3D).
+    """
+    builder = TscnBuilder()
+    resources = [shape_resource(builder, shape) for shape in shapes]
+
+    root = builder.add_node("Hurtboxes", "Node3D")
+    for shape, resource in zip(shapes, resources):
+        attachment = builder.add_node(shape["name"], "BoneAttachment3D", root, {
+            "bone_name": shape["name"],
+            "use_external_skeleton": True,
+            "external_skeleton": NodePath(skeleton_path),
+        })
+        area = builder.add_node("Hurtbox", "Area3D", attachment, {
+            "collision_layer": layer,
+            "collision_mask": 0,
+            "monitoring": False,
+            "metadata/bone": shape["name"],
+            "metadata/region": shape["region"],
+            "metadata/damage_multiplier": shape["damage_multiplier"],
+        }, groups=["hurtbox"])
+        builder.add_node("CollisionShape3D", "CollisionShape3D", area, {
+            "transform": shape["local"],
+            "shape": resource,
+        })
+    return builder.write(path)
+
+
+def write_ragdoll_scene(path, spec, shapes):
+    """
+    Ragdoll scene: PhysicalBoneSimulator3D > PhysicalBone3D > CollisionShape3D.
+
+    The body frame of every physical bone is its shape's frame, the joint
+    sits at the bone head (Godot clamps it there anyway) and is turned so the
+    cone twist axis follows the bone and the hinge axis is the bone's X.
+    """
+    rest = Z_UP_TO_Y_UP @ bone_rest_matrices(spec.heads, spec.tails, spec.rolls)
+    builder = TscnBuilder()
+    resources = [shape_resource(builder, shape) for shape in shapes]
+
+    root = builder.add_node("PhysicalBoneSimulator3D", "PhysicalBoneSimulator3D")
+    for shape, resource in zip(shapes, resources):
+        joint_type, limits = ragdoll_limit(shape["name"])
+        body_offset = shape["local"]
+        joint_frame = HINGE_FRAME if joint_type == "hinge" else CONE_FRAME
+
+        properties = {
+            "transform": rest[shape["bone"]] @ body_offset,
+            "joint_type": JOINT_TYPES[joint_type],
+            "joint_offset": np.linalg.inv(body_offset) @ joint_frame,
+            "body_offset": body_offset,
+            "mass": max(shape["volume"] * BODY_DENSITY, 0.05),
+            "bone_name": shape["name"],
+        }
+        if joint_type == "hinge":
+            properties.update({
+                "joint_constraints/angular_limit_enabled": True,
+                "joint_constraints/angular_limit_lower": limits[0],
+                "joint_constraints/angular_limit_upper": limits[1],
+            })
+        else:
+            properties.update({
+                "joint_constraints/swing_span": limits[0],
+                "joint_constraints/twist_span": limits[1],
+            })
+
+        body = builder.add_node(f"Physical Bone {shape['name']}", "PhysicalBone3D", root, properties)
+        builder.add_node("CollisionShape3D", "CollisionShape3D", body, {"shape": resource})
+    return builder.write(path)
+
+
+def export_collision_scenes(spec, folder, rules=None, prefix="Player", skeleton_path="../../Skeleton3D",
+                            layer=HURTBOX_LAYER):
+    """Build the shapes and write <prefix>Hurtboxes.tscn + <prefix>Ragdoll.tscn; returns (shapes, paths)"""
+    spec, shapes = build_collision_shapes(spec, rules)
+    os.makedirs(folder, exist_ok=True)
+    hurtboxes = os.path.join(folder, f"{prefix}Hurtboxes.tscn")
+    ragdoll = os.path.join(folder, f"{prefix}Ragdoll.tscn")
+    write_hurtbox_scene(hurtboxes, spec, shapes, skeleton_path, layer)
+    write_ragdoll_scene(ragdoll, spec, shapes)
+    return shapes, (hurtboxes, ragdoll)
+
+
+def load_spec(path):
+    """Skeleton spec from a file, or from the armature when running inside Blender"""
+    try:
+        import bpy  # noqa: F401
+    except ImportError:
+        return SkeletonSpec.load(path or DEFAULT_SKELETON)
+    if path:
+        return SkeletonSpec.load(path)
+
+    from analyze_skeleton import extract_skeleton_spec, find_armature
+    armature = find_armature()
+    if armature is None:
+        raise ValueError("No armature in the scene - pass --skeleton or run skeleton_generator_clean.py first")
+    return extract_skeleton_spec(armature)
+
+
+def parse_args(argv=None):
+    """Command line for collision exports (Blender passes its own args before '--')"""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Export per-bone hurtboxes and a ragdoll as Godot scenes")
+    parser.add_argument("--skeleton", default=None, help="skeleton spec (default: the scene armature in Blender, "
+                                                         "else the default spec)")
+    parser.add_argument("--output", default=".", help="folder for the .tscn files")
+    parser.add_argument("--prefix", default="Player", help="scene name prefix")
+    parser.add_argument("--skeleton-path", default="../../Skeleton3D",
+                        help="Skeleton3D path as seen from each BoneAttachment3D")
+    parser.add_argument("--layer", type=int, default=HURTBOX_LAYER, help="hurtbox collision layer bits")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Export the collision scenes for one skeleton"""
+    args = parse_args(argv)
+    spec = load_spec(args.skeleton)
+    shapes, paths = export_collision_scenes(spec, args.output, prefix=args.prefix,
+                                            skeleton_path=args.skeleton_path, layer=args.layer)
+
+    counts = {}
+    for shape in shapes:
+        counts[shape["kind"]] = counts.get(shape["kind"], 0) + 1
+    print("=" * 80)
+    print("KHAOS COLLISION SHAPES")
+    print("=" * 80)
+    print(f"✓ {len(spec)} bones -> {len(shapes)} shapes "
+          f"({', '.join(f'{count} {kind}' for kind, count in sorted(counts.items()))})")
+    print(f"✓ Ragdoll mass {sum(max(s['volume'] * BODY_DENSITY, 0.05) for s in shapes):.1f} kg")
+    for path in paths:
+        print(f"✓ Wrote {path}")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
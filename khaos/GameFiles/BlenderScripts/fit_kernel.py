@@ -0,0 +1,489 @@
+"""
+Vectorized Mesh Fitting Kernel for Khaos Project
+Places every body segment of the fitted mesh with one batched NumPy multiply
+
+Pure NumPy - no bpy import, so it runs inside Blender (mesh_auto_fit.py)
+and in plain CPython workers alike.
+
+HOW IT WORKS:
+1. Segment rules describe which primitive goes on which bone and how it is
+   sized (radius, palm/foot ratios, twist, ...)
+2. build_segment_plan() resolves the rules against a bone name table
+3. place_segments() reads ALL bone heads/tails at once, builds an (N, 4, 4)
+   Translate * Rotate * Scale stack and transforms the precomputed unit
+   templates (cylinder / cone / box / sphere) in one einsum
+4. The result is flat vertex/loop/polygon arrays plus per-segment vertex
+   offsets, ready for foreach_set or a glTF writer
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from rig_math import axis_angle_to_mat3
+
+Z_AXIS = np.array([0.0, 0.0, 1.0])
+# Faces meeting at a sharper angle than this get split normals (box edges, tube caps);
+# the 6-sided tubes of coarse tessellations (60 degrees) stay smooth
+CREASE_ANGLE = math.radians(75.0)
+
+
+class MeshTemplate:
+    """Unit primitive stored as flat polygon arrays"""
+
+    def __init__(self, vertices, loops, loop_totals):
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.loops = np.asarray(loops, dtype=np.int32)
+        self.loop_totals = np.asarray(loop_totals, dtype=np.int32)
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    @property
+    def loop_count(self):
+        return len(self.loops)
+
+    @property
+    def polygon_count(self):
+        return len(self.loop_totals)
+
+
+# ----------------------------------------------------------------------
+# Unit templates (match the bpy.ops primitive defaults)
+# ----------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def unit_tube(segments=32, rings=(0.0, 1.0), radius_bottom=1.0, radius_top=1.0):
+    """
+    Capped tube along Z, depth 1, centered on the origin.
+
+    rings are the heights (0 = bottom, 1 = top) of every vertex ring; the
+    radius is interpolated between radius_bottom and radius_top.
+    """
+    rings = np.asarray(rings, dtype=np.float64)
+    angles = np.arange(segments) * (2.0 * math.pi / segments)
+    circle = np.stack([np.cos(angles), np.sin(angles), np.zeros(segments)], axis=1)
+
+    radii = radius_bottom + (radius_top - radius_bottom) * rings
+    vertices = (circle[None] * np.stack([radii, radii, np.ones_like(radii)], axis=1)[:, None, :]
+                + np.stack([np.zeros_like(rings), np.zeros_like(rings), rings - 0.5], axis=1)[:, None, :])
+    vertices = vertices.reshape(-1, 3)
+
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    r = np.arange(len(rings) - 1)[:, None] * segments
+    sides = np.stack([r + i, r + j, r + j + segments, r + i + segments], axis=2).ravel()
+    bottom_cap = i[::-1]
+    top_cap = i + (len(rings) - 1) * segments
+
+    loops = np.concatenate([sides, bottom_cap, top_cap])
+    loop_totals = [4] * (segments * (len(rings) - 1)) + [segments, segments]
+    return MeshTemplate(vertices, loops, loop_totals)
+
+
+@lru_cache(maxsize=None)
+def unit_cone(segments=32, radius_bottom=1.0, radius_top=1.0):
+    """Capped cone/cylinder along Z, depth 1, centered on the origin"""
+    return unit_tube(segments, (0.0, 1.0), radius_bottom, radius_top)
+
+
+@lru_cache(maxsize=None)
+def unit_box():
+    """Cube of size 1 centered on the origin"""
+    vertices = [
+        (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5),
+        (-0.5, -0.5, 0.5), (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5),
+    ]
+    loops = [
+        0, 3, 2, 1,  # bottom
+        4, 5, 6, 7,  # top
+        0, 1, 5, 4,  # front
+        1, 2, 6, 5,  # right
+        2, 3, 7, 6,  # back
+        3, 0, 4, 7,  # left
+    ]
+    return MeshTemplate(vertices, loops, [4] * 6)
+
+
+@lru_cache(maxsize=None)
+def unit_uv_sphere(segments=32, rings=16):
+    """UV sphere of radius 1 with triangle fans at the poles, faces wound outward"""
+    theta = np.arange(1, rings) * (math.pi / rings)           # ring latitudes
+    phi = np.arange(segments) * (2.0 * math.pi / segments)     # longitudes
+    sin_t, cos_t = np.sin(theta)[:, None], np.cos(theta)[:, None]
+    body = np.stack([
+        sin_t * np.cos(phi),
+        sin_t * np.sin(phi),
+        np.broadcast_to(cos_t, (rings - 1, segments)),
+    ], axis=2).reshape(-1, 3)
+    vertices = np.concatenate([[(0.0, 0.0, 1.0)], body, [(0.0, 0.0, -1.0)]])
+
+    top, bottom = 0, len(vertices) - 1
+    i = np.arange(segments)
+    j = (i + 1) % segments
+
+    top_fan = np.stack([np.full(segments, top), 1 + i, 1 + j], axis=1).ravel()
+    r = np.arange(rings - 2)[:, None]
+    a = 1 + r * segments + i
+    b = 1 + r * segments + j
+    quads = np.stack([a, a + segments, b + segments, b], axis=2).reshape(-1)
+    last = 1 + (rings - 2) * segments
+    bottom_fan = np.stack([last + j, last + i, np.full(segments, bottom)], axis=1).ravel()
+
+    loops = np.concatenate([top_fan, quads, bottom_fan])
+    loop_totals = [3] * segments + [4] * (segments * (rings - 2)) + [3] * segments
+    return MeshTemplate(vertices, loops, loop_totals)
+
+
+TEMPLATES = {
+    "cylinder": lambda: unit_cone(32),
+    "torso_cone": lambda: unit_cone(8, 0.15, 0.25),
+    "box": unit_box,
+    "sphere": lambda: unit_uv_sphere(32, 16),
+}
+
+
+# ----------------------------------------------------------------------
+# Segment rules
+# ----------------------------------------------------------------------
+
+def segment_rule(name, template, bone, end_bone=None, center=0.5,
+                 const=(0.0, 0.0, 0.0), per_length=(0.0, 0.0, 0.0),
+                 align=True, twist=0.0):
+    """
+    Describe one fitted segment.
+
+    The segment spans head(bone) -> tail(end_bone or bone). Its local scale
+    is const + per_length * span_length, its center sits `center` of the way
+    along the span, and when `align` is set the template's Z axis is rotated
+    onto the span direction and then twisted by `twist` radians around it.
+    """
+    return {
+        "name": name,
+        "template": template,
+        "bone": bone,
+        "end_bone": end_bone or bone,
+        "center": center,
+        "const": const,
+        "per_length": per_length,
+        "align": align,
+        "twist": twist,
+    }
+
+
+def cylinder_rule(bone_name, radius):
+    """Bone-aligned cylinder spanning the whole bone"""
+    return segment_rule(f"{bone_name}_Mesh", "cylinder", bone_name,
+                        const=(radius, radius, 0.0), per_length=(0.0, 0.0, 1.0))
+
+
+def humanoid_segment_rules():
+    """The MeshAutoFitter layout for the Khaos humanoid skeleton"""
+    rules = [
+        # Head is special - radius is half the head bone length
+        segment_rule("Head_Mesh", "sphere", "Head",
+                     per_length=(0.5, 0.5, 0.5), align=False),
+        # Cone torso from Spine_01 head to Spine_03 tail, compressed front-to-back
+        segment_rule("Torso_Mesh", "torso_cone", "Spine_01", end_bone="Spine_03",
+                     const=(1.0, 0.65, 0.0), per_length=(0.0, 0.0, 1.0), align=False),
+        # Flattened sphere pelvis: radius 0.15 scaled (1.3, 0.5, 0.55)
+        segment_rule("Pelvis_Mesh", "sphere", "Root",
+                     const=(0.15 * 1.3, 0.15 * 0.5, 0.15 * 0.55), align=False),
+    ]
+
+    for side in [".L", ".R"]:
+        rules.append(cylinder_rule(f"UpperArm{side}", 0.06))
+        rules.append(cylinder_rule(f"ForeArm{side}", 0.05))
+        # Palm 70% down the hand bone, 0.7 x 0.4 x 1.0 of its length, twisted 75 degrees
+        rules.append(segment_rule(f"Hand{side}_Mesh", "box", f"Hand{side}", center=0.7,
+                                  per_length=(0.7, 0.4, 1.0), twist=math.radians(75)))
+
+    for side in [".L", ".R"]:
+        for finger in ["Thumb", "Index", "Middle", "Ring", "Pinky"]:
+            for joint in ["01", "02", "03"]:
+                rules.append(cylinder_rule(f"{finger}_{joint}{side}", 0.01))
+
+    for side in [".L", ".R"]:
+        rules.append(cylinder_rule(f"UpperLeg{side}", 0.08))
+        rules.append(cylinder_rule(f"LowerLeg{side}", 0.06))
+        # Foot 60% along the foot bone, 0.55 x 0.28 x 0.9 of its length
+        rules.append(segment_rule(f"Foot{side}_Mesh", "box", f"Foot{side}", center=0.6,
+                                  per_length=(0.55, 0.28, 0.9)))
+        rules.append(cylinder_rule(f"Toe{side}", 0.04))
+
+    return rules
+
+
+class SegmentPlan:
+    """Segment rules resolved against a bone name table, stored as arrays"""
+
+    def __init__(self, names, templates, bones, end_bones, centers,
+                 const, per_length, align, twist):
+        self.names = list(names)
+        self.templates = list(templates)
+        self.bones = np.asarray(bones, dtype=np.int32)
+        self.end_bones = np.asarray(end_bones, dtype=np.int32)
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.const = np.asarray(const, dtype=np.float64).reshape(-1, 3)
+        self.per_length = np.asarray(per_length, dtype=np.float64).reshape(-1, 3)
+        self.align = np.asarray(align, dtype=bool)
+        self.twist = np.asarray(twist, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def subset(self, segments):
+        """Plan with only the given segment indices, in that order"""
+        segments = np.asarray(segments, dtype=np.int64)
+        return SegmentPlan(
+            names=[self.names[i] for i in segments],
+            templates=[self.templates[i] for i in segments],
+            bones=self.bones[segments],
+            end_bones=self.end_bones[segments],
+            centers=self.centers[segments],
+            const=self.const[segments],
+            per_length=self.per_length[segments],
+            align=self.align[segments],
+            twist=self.twist[segments],
+        )
+
+
+def build_segment_plan(bone_names, rules=None):
+    """Resolve segment rules to bone indices, skipping rules whose bones are missing"""
+    if rules is None:
+        rules = humanoid_segment_rules()
+
+    index = {name: i for i, name in enumerate(bone_names)}
+    kept = [r for r in rules if r["bone"] in index and r["end_bone"] in index]
+
+    return SegmentPlan(
+        names=[r["name"] for r in kept],
+        templates=[r["template"] for r in kept],
+        bones=[index[r["bone"]] for r in kept],
+        end_bones=[index[r["end_bone"]] for r in kept],
+        centers=[r["center"] for r in kept],
+        const=[r["const"] for r in kept],
+        per_length=[r["per_length"] for r in kept],
+        align=[r["align"] for r in kept],
+        twist=[r["twist"] for r in kept],
+    )
+
+
+# ----------------------------------------------------------------------
+# Batched transforms
+# ----------------------------------------------------------------------
+
+def align_z_matrices(directions):
+    """(N, 3, 3) shortest-arc rotations taking +Z onto each unit direction"""
+    directions = np.asarray(directions, dtype=np.float64)
+    axes = np.cross(Z_AXIS, directions)
+    sin = np.linalg.norm(axes, axis=1)
+    cos = np.clip(directions[:, 2], -1.0, 1.0)
+    angles = np.arctan2(sin, cos)
+
+    # Parallel: any axis works (angle is 0). Anti-parallel: same fallback
+    # axis mathutils uses for rotation_difference of +Z
+    degenerate = sin < 1e-8
+    axes[degenerate] = (math.sqrt(0.5), math.sqrt(0.5), 0.0)
+    axes[~degenerate] /= sin[~degenerate, None]
+    return axis_angle_to_mat3(axes, angles)
+
+
+def segment_transforms(heads, tails, plan):
+    """
+    Build the (N, 4, 4) Translate * Rotate * Scale stack for every segment.
+
+    heads/tails are (B, 3) world-space bone arrays.
+    """
+    heads = np.asarray(heads, dtype=np.float64)
+    tails = np.asarray(tails, dtype=np.float64)
+
+    start = heads[plan.bones]
+    end = tails[plan.end_bones]
+    span = end - start
+    length = np.linalg.norm(span, axis=1)
+    direction = span / np.maximum(length, 1e-12)[:, None]
+
+    rotation = np.broadcast_to(np.eye(3), (len(plan), 3, 3)).copy()
+    aligned = plan.align
+    if aligned.any():
+        rotation[aligned] = align_z_matrices(direction[aligned])
+        twisted = aligned & (plan.twist != 0.0)
+        if twisted.any():
+            twist = axis_angle_to_mat3(direction[twisted], plan.twist[twisted])
+            rotation[twisted] = twist @ rotation[twisted]
+
+    scale = plan.const + plan.per_length * length[:, None]
+    center = start + direction * (length * plan.centers)[:, None]
+
+    matrices = np.zeros((len(plan), 4, 4))
+    matrices[:, :3, :3] = rotation * scale[:, None, :]  # R @ diag(S)
+    matrices[:, :3, 3] = center
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def transform_templates(matrices, seg_templates):
+    """(V, 3) vertices of every segment's template through its matrix, in segment order"""
+    if not seg_templates:
+        return np.zeros((0, 3))
+
+    # Gather all template vertices in segment order, tagged with their segment
+    local = np.concatenate([t.vertices for t in seg_templates])
+    owner = np.repeat(np.arange(len(seg_templates)), [t.vertex_count for t in seg_templates])
+
+    # One batched multiply: every vertex through its segment's matrix
+    m = matrices[owner]
+    return np.einsum("vij,vj->vi", m[:, :3, :3], local) + m[:, :3, 3]
+
+
+def place_segment_vertices(heads, tails, plan, segments, templates=None):
+    """
+    Vertices of only the given segments, concatenated in the order given.
+
+    Topology does not depend on the bones, so refitting a segment only
+    rewrites its vertex range [vertex_offsets[i], vertex_offsets[i + 1]).
+    """
+    if templates is None:
+        templates = {key: factory() for key, factory in TEMPLATES.items()}
+
+    subset = plan.subset(segments)
+    matrices = segment_transforms(heads, tails, subset)
+    return transform_templates(matrices, [templates[key] for key in subset.templates]).astype(np.float32)
+
+
+def place_segments(heads, tails, plan, templates=None):
+    """
+    Transform every segment's unit template into world space in one pass.
+
+    Returns a dict with:
+      vertices        (V, 3) float32
+      loops           (L,) int32 vertex index per face corner
+      loop_starts     (P,) int32
+      loop_totals     (P,) int32
+      vertex_offsets  (N + 1,) int32 - segment i owns vertices [off[i], off[i+1])
+      matrices        (N, 4, 4) segment transforms
+    """
+    if templates is None:
+        templates = {key: factory() for key, factory in TEMPLATES.items()}
+
+    matrices = segment_transforms(heads, tails, plan)
+    return assemble_templates(matrices, [templates[key] for key in plan.templates])
+
+
+def assemble_templates(matrices, seg_templates):
+    """
+    Flat mesh arrays of templates placed by (N, 4, 4) matrices.
+
+    Same dict as place_segments(); also used for hand-placed parts
+    (blender_character_generator.py) that do not come from a segment plan.
+    """
+    matrices = np.asarray(matrices, dtype=np.float64)
+    geometry = template_topology(seg_templates)
+    geometry["vertices"] = transform_templates(matrices, seg_templates).astype(np.float32)
+    geometry["matrices"] = matrices
+    return geometry
+
+
+def template_topology(seg_templates):
+    """loops / loop_starts / loop_totals / vertex_offsets of templates laid out back to back"""
+    vertex_counts = np.array([t.vertex_count for t in seg_templates], dtype=np.int32)
+    vertex_offsets = np.zeros(len(seg_templates) + 1, dtype=np.int32)
+    np.cumsum(vertex_counts, out=vertex_offsets[1:])
+
+    loop_counts = np.array([t.loop_count for t in seg_templates], dtype=np.int32)
+    loops = np.concatenate([t.loops for t in seg_templates]) if seg_templates else np.zeros(0, np.int32)
+    loops = loops + np.repeat(vertex_offsets[:-1], loop_counts)
+
+    loop_totals = (np.concatenate([t.loop_totals for t in seg_templates])
+                   if seg_templates else np.zeros(0, np.int32))
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+    np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+
+    return {
+        "loops": loops.astype(np.int32),
+        "loop_starts": loop_starts,
+        "loop_totals": loop_totals.astype(np.int32),
+        "vertex_offsets": vertex_offsets,
+    }
+
+
+# ----------------------------------------------------------------------
+# Mesh array utilities
+# ----------------------------------------------------------------------
+
+def triangulate(loops, loop_starts, loop_totals):
+    """(T, 3) triangle fan indices for flat polygon arrays"""
+    loops = np.asarray(loops)
+    loop_starts = np.asarray(loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+
+    fans = np.maximum(loop_totals - 2, 0)
+    first = np.repeat(loop_starts, fans)
+    # k = 1 .. n-2 inside each polygon
+    group_start = np.repeat(np.cumsum(fans) - fans, fans)
+    k = np.arange(fans.sum()) - group_start + 1
+
+    return np.stack([loops[first], loops[first + k], loops[first + k + 1]], axis=1).astype(np.uint32)
+
+
+def vertex_normals(vertices, triangles):
+    """(V, 3) area-weighted smooth vertex normals"""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int64)
+
+    a, b, c = (vertices[triangles[:, i]] for i in range(3))
+    face_normals = np.cross(b - a, c - a)  # length = 2 * area
+
+    normals = np.zeros_like(vertices)
+    for i in range(3):
+        np.add.at(normals, triangles[:, i], face_normals)
+
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return (normals / np.maximum(length, 1e-12)).astype(np.float32)
+
+
+def split_normals(vertices, triangles, crease_angle=CREASE_ANGLE):
+    """
+    Area-weighted vertex normals with hard edges where faces meet above crease_angle.
+
+    Every triangle corner averages the faces at its vertex that are within
+    crease_angle of its own face; a vertex whose corners end up with
+    different normals (box corners, cap rims) is split into one copy per
+    normal. Returns (source, triangles, normals): source (V',) is the
+    original vertex of every output vertex, ascending, so per-vertex arrays
+    are remapped with array[source] and contiguous vertex ranges stay
+    contiguous (np.searchsorted(source, offsets)).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int64)
+
+    a, b, c = (vertices[triangles[:, i]] for i in range(3))
+    face_normals = np.cross(b - a, c - a)  # length = 2 * area
+    unit = face_normals / np.maximum(np.linalg.norm(face_normals, axis=1, keepdims=True), 1e-12)
+
+    # Corners sorted by vertex, then every (corner, corner) pair sharing a vertex
+    order = np.argsort(triangles.ravel(), kind="stable")
+    corner_vertex = triangles.ravel()[order]
+    corner_face = order // 3
+    per_vertex = np.bincount(corner_vertex, minlength=len(vertices))
+    counts = per_vertex[corner_vertex]
+    group_start = (np.cumsum(per_vertex) - per_vertex)[corner_vertex]
+    first = np.repeat(np.arange(len(order)), counts)
+    second = np.repeat(group_start, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    smooth = np.einsum("ij,ij->i", unit[corner_face[first]], unit[corner_face[second]]) >= math.cos(crease_angle)
+    smooth |= first == second
+    corner_normals = np.zeros((len(order), 3))
+    np.add.at(corner_normals, first[smooth], face_normals[corner_face[second[smooth]]])
+    corner_normals /= np.maximum(np.linalg.norm(corner_normals, axis=1, keepdims=True), 1e-12)
+
+    # One output vertex per (vertex, normal); unique rows sort by vertex first
+    keys = np.column_stack([corner_vertex, np.rint(corner_normals * 1e4).astype(np.int64)])
+    _, first_corner, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    split = np.empty(len(order), dtype=np.int64)
+    split[order] = inverse.ravel()
+    return (corner_vertex[first_corner], split.reshape(-1, 3).astype(np.uint32),
+            corner_normals[first_corner].astype(np.float32))
@@ -0,0 +1,333 @@
+"""
+Standalone GLB Skeleton Reader for Khaos Project
+Extracts skeletons from .glb files WITHOUT launching Blender
+
+USAGE:
+    python glb_reader.py Untitled.glb
+    python glb_reader.py exports/*.glb --export skeletons/ --quiet
+
+Prints the same grouped bone report analyze_skeleton.py prints inside
+Blender (world space, Blender +Z up), and with --export writes one
+skeleton spec (<name>.json + <name>.npz) per file.
+
+HOW IT WORKS:
+1. The GLB container is split into its JSON and BIN chunks
+2. Accessors are read as numpy.frombuffer views over a memoryview of the
+   BIN chunk - no copies of the binary data
+3. The bind-pose joint frames are the inverses of the skin's inverse bind
+   matrices, so the file may be saved in any pose. Only a skin without
+   inverseBindMatrices falls back to the node TRS transforms, turned into
+   matrices at once and accumulated to world space one hierarchy level per
+   batched matmul (exact only when the file was saved in rest pose)
+4. Joint frames give the heads (translation) and bone directions
+   (local +Y, Blender's bone axis); rolls come from the joint frames
+
+NOTE: glTF does not store bone lengths. A bone's tail is placed at its
+most aligned child's head; a leaf bone reaches as far along its axis as
+the skinned vertices it dominates (Head, Toe, fingertips), and only a leaf
+without skin reuses its parent's length. Heads, directions and rolls are
+exact, leaf tails are an estimate.
+
+Requires only NumPy.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from rig_math import (Y_UP_TO_Z_UP, accumulate_world_matrices, hierarchy_levels,
+                      mat3_to_rolls, trs_matrices)
+from skeleton_spec import SkeletonSpec, categorize_bones, format_report
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+COMPONENT_DTYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+
+TYPE_SIZES = {
+    "SCALAR": 1,
+    "VEC2": 2,
+    "VEC3": 3,
+    "VEC4": 4,
+    "MAT2": 4,
+    "MAT3": 9,
+    "MAT4": 16,
+}
+
+
+class GlbFile:
+    """Parsed GLB container: the glTF JSON document plus a view of the BIN chunk"""
+
+    def __init__(self, gltf, binary, path=None):
+        self.gltf = gltf
+        self.binary = binary
+        self.path = path
+
+    @classmethod
+    def read(cls, path):
+        """Read a .glb file from disk"""
+        with open(path, "rb") as f:
+            data = f.read()
+        return cls.parse(data, path)
+
+    @classmethod
+    def parse(cls, data, path=None):
+        """Parse GLB bytes; the BIN chunk is kept as a zero-copy memoryview"""
+        view = memoryview(data)
+        if len(view) < 12:
+            raise ValueError(f"{path or 'data'}: too short to be a GLB file")
+
+        magic, version, length = struct.unpack_from("<4sII", view, 0)
+        if magic != GLB_MAGIC:
+            raise ValueError(f"{path or 'data'}: not a GLB file")
+        if version != 2:
+            raise ValueError(f"{path or 'data'}: unsupported GLB version {version}")
+
+        gltf = None
+        binary = None
+        offset = 12
+        end = min(length, len(view))
+        while offset + 8 <= end:
+            chunk_length, chunk_type = struct.unpack_from("<II", view, offset)
+            chunk = view[offset + 8:offset + 8 + chunk_length]
+            if chunk_type == CHUNK_JSON:
+                gltf = json.loads(bytes(chunk).decode("utf-8"))
+            elif chunk_type == CHUNK_BIN and binary is None:
+                binary = chunk
+            offset += 8 + chunk_length
+
+        if gltf is None:
+            raise ValueError(f"{path or 'data'}: GLB has no JSON chunk")
+        return cls(gltf, binary, path)
+
+    def accessor(self, index):
+        """Accessor data as a NumPy view over the BIN chunk, shaped (count, components)"""
+        accessor = self.gltf["accessors"][index]
+        if "sparse" in accessor:
+            raise ValueError(f"Accessor {index}: sparse accessors are not supported")
+
+        dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]]).newbyteorder("<")
+        components = TYPE_SIZES[accessor["type"]]
+        count = accessor["count"]
+
+        if "bufferView" not in accessor:
+            return np.zeros((count, components), dtype=dtype)
+
+        view = self.gltf["bufferViews"][accessor["bufferView"]]
+        if view.get("buffer", 0) != 0 or self.binary is None:
+            raise ValueError(f"Accessor {index}: only the embedded GLB buffer is supported")
+
+        offset = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+        element_size = dtype.itemsize * components
+        stride = view.get("byteStride", element_size)
+
+        if stride == element_size:
+            array = np.frombuffer(self.binary, dtype=dtype, count=count * components, offset=offset)
+            return array.reshape(count, components)
+
+        # Interleaved buffer view: strided view, still no copy
+        return np.ndarray(
+            shape=(count, components),
+            dtype=dtype,
+            buffer=self.binary,
+            offset=offset,
+            strides=(stride, dtype.itemsize),
+        )
+
+    def node_parents(self):
+        """Parent index per node (-1 for roots)"""
+        nodes = self.gltf.get("nodes", [])
+        parents = np.full(len(nodes), -1, dtype=np.int64)
+        for i, node in enumerate(nodes):
+            for child in node.get("children", []):
+                parents[child] = i
+        return parents
+
+    def node_local_matrices(self):
+        """(N, 4, 4) local matrices for every node, built in one vectorized pass"""
+        nodes = self.gltf.get("nodes", [])
+        translations = np.array([n.get("translation", (0.0, 0.0, 0.0)) for n in nodes], dtype=np.float64)
+        rotations = np.array([n.get("rotation", (0.0, 0.0, 0.0, 1.0)) for n in nodes], dtype=np.float64)
+        scales = np.array([n.get("scale", (1.0, 1.0, 1.0)) for n in nodes], dtype=np.float64)
+        matrices = trs_matrices(translations.reshape(-1, 3), rotations.reshape(-1, 4), scales.reshape(-1, 3))
+
+        # Nodes may carry an explicit column-major matrix instead of TRS
+        for i, node in enumerate(nodes):
+            if "matrix" in node:
+                matrices[i] = np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+        return matrices
+
+    def node_world_matrices(self):
+        """(N, 4, 4) world matrices for every node"""
+        parents = self.node_parents()
+        return accumulate_world_matrices(parents, self.node_local_matrices(), hierarchy_levels(parents))
+
+
+def bone_lengths(heads, directions, parents):
+    """
+    Bone lengths from joint heads alone.
+
+    Each bone reaches the projection of its most aligned child's head onto
+    its direction; bones without an aligned child reuse their parent's length.
+    """
+    lengths = np.zeros(len(heads))
+
+    children = np.flatnonzero(parents >= 0)
+    if len(children):
+        owner = parents[children]
+        offsets = heads[children] - heads[owner]
+        projection = np.einsum("ij,ij->i", offsets, directions[owner])
+        cos = projection / np.maximum(np.linalg.norm(offsets, axis=1), 1e-12)
+
+        # Children more than 60 degrees off-axis don't define the length
+        valid = (cos > 0.5) & (projection > 1e-6)
+        owner, cos, projection = owner[valid], cos[valid], projection[valid]
+
+        # Sort by (parent, alignment) and keep the best aligned child per parent
+        order = np.lexsort((cos, owner))
+        owner, projection = owner[order], projection[order]
+        best = np.append(owner[1:] != owner[:-1], True)
+        lengths[owner[best]] = projection[best]
+
+    for level in hierarchy_levels(parents):
+        missing = level[lengths[level] <= 0.0]
+        has_parent = missing[parents[missing] >= 0]
+        lengths[has_parent] = lengths[parents[has_parent]]
+
+    # Roots without any aligned child: fall back to a small visible bone
+    lengths[lengths <= 0.0] = 0.1
+    return lengths
+
+
+def skin_joint_parents(glb, joints):
+    """Parent joint index per skin joint: its nearest ancestor node that is also a joint (-1 for roots)"""
+    node_parents = glb.node_parents()
+    joint_of_node = np.full(len(node_parents), -1, dtype=np.int64)
+    joint_of_node[joints] = np.arange(len(joints))
+    parents = np.full(len(joints), -1, dtype=np.int64)
+    for j, node in enumerate(joints):
+        ancestor = node_parents[node]
+        while ancestor >= 0 and joint_of_node[ancestor] < 0:
+            ancestor = node_parents[ancestor]
+        if ancestor >= 0:
+            parents[j] = joint_of_node[ancestor]
+    return parents
+
+
+def bind_matrices(glb, skin):
+    """(J, 4, 4) bind-pose joint matrices in glTF space: inverted IBMs, or node world matrices without them"""
+    joints = np.asarray(skin["joints"], dtype=np.int64)
+    if "inverseBindMatrices" not in skin:
+        return glb.node_world_matrices()[joints]
+    inverse_bind = glb.accessor(skin["inverseBindMatrices"]).astype(np.float64).reshape(-1, 4, 4)
+    return np.linalg.inv(inverse_bind.transpose(0, 2, 1))  # column-major
+
+
+def skin_reach(glb, skin_index, heads, directions):
+    """Per joint, the farthest projection on its axis of the vertices it dominates (0 = no vertices)"""
+    reach = np.zeros(len(heads))
+    for node in glb.gltf.get("nodes", []):
+        if node.get("skin") != skin_index or "mesh" not in node:
+            continue
+        for primitive in glb.gltf["meshes"][node["mesh"]]["primitives"]:
+            attributes = primitive["attributes"]
+            if "JOINTS_0" not in attributes or "WEIGHTS_0" not in attributes:
+                continue
+            points = Y_UP_TO_Z_UP[:3, :3] @ glb.accessor(attributes["POSITION"]).astype(np.float64).T
+            weights = glb.accessor(attributes["WEIGHTS_0"])
+            slots = np.argmax(weights, axis=1)
+            owners = glb.accessor(attributes["JOINTS_0"])[np.arange(len(slots)), slots].astype(np.int64)
+            projection = np.einsum("ij,ij->i", points.T - heads[owners], directions[owners])
+            np.maximum.at(reach, owners, projection)
+    return reach
+
+
+def read_skeleton(glb, skin_index=0):
+    """Extract a world-space (Blender +Z up) SkeletonSpec from one skin of a GLB"""
+    skins = glb.gltf.get("skins", [])
+    if not skins:
+        raise ValueError(f"{glb.path or 'GLB'}: no skins (no armature) in file")
+    skin = skins[skin_index]
+    joints = np.asarray(skin["joints"], dtype=np.int64)
+
+    nodes = glb.gltf["nodes"]
+    parents = skin_joint_parents(glb, joints)
+
+    # To Blender space; joint local +Y is the bone axis
+    joint_world = Y_UP_TO_Z_UP @ bind_matrices(glb, skin)
+    heads = joint_world[:, :3, 3]
+    axes = joint_world[:, :3, :3]
+    axes = axes / np.maximum(np.linalg.norm(axes, axis=1, keepdims=True), 1e-12)
+    directions = axes[:, :, 1]
+
+    lengths = bone_lengths(heads, directions, parents)
+    # Leaf bones (no child defines their length) reach as far as their skin
+    leaves = np.setdiff1d(np.arange(len(joints)), parents)
+    reach = skin_reach(glb, skin_index, heads, directions)[leaves]
+    lengths[leaves] = np.where(reach > 1e-6, reach, lengths[leaves])
+    tails = heads + directions * lengths[:, None]
+    rolls = mat3_to_rolls(axes)
+
+    names = [nodes[node].get("name", f"joint_{j}") for j, node in enumerate(joints)]
+    spec = SkeletonSpec(names, parents, heads, tails, rolls, categories=categorize_bones(names))
+    return spec.sorted()
+
+
+def read_glb_skeleton(path, skin_index=0):
+    """Read a .glb file and return its SkeletonSpec"""
+    return read_skeleton(GlbFile.read(path), skin_index)
+
+
+def parse_args(argv=None):
+    """Command line for batch audits"""
+    parser = argparse.ArgumentParser(description="Extract skeletons from .glb files without Blender")
+    parser.add_argument("files", nargs="+", help=".glb files to read")
+    parser.add_argument("--skin", type=int, default=0, help="skin index to read (default 0)")
+    parser.add_argument("--export", default=None, help="folder to write <name>.json + <name>.npz specs into")
+    parser.add_argument("--quiet", action="store_true", help="skip the bone report")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Read every file, print reports and optionally export specs; returns a process exit code"""
+    args = parse_args(argv)
+    failures = 0
+
+    for path in args.files:
+        start = time.perf_counter()
+        try:
+            spec = read_glb_skeleton(path, args.skin)
+        except (OSError, ValueError, KeyError, IndexError) as error:
+            print(f"ERROR: {path}: {error}", file=sys.stderr)
+            failures += 1
+            continue
+        elapsed = (time.perf_counter() - start) * 1000.0
+
+        if not args.quiet:
+            print("\n".join(format_report(spec, title=f"KHAOS SKELETON ANALYSIS - {os.path.basename(path)}")))
+
+        if args.export:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            base = spec.save(os.path.join(args.export, stem))
+            print(f"✓ {path}: {len(spec)} bones in {elapsed:.1f} ms -> {base}.json + .npz")
+        else:
+            print(f"✓ {path}: {len(spec)} bones in {elapsed:.1f} ms")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
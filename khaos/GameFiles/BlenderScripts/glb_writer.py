@@ -0,0 +1,249 @@
+"""
+Minimal GLB Writer for Khaos Project
+Builds a glTF 2.0 binary (.glb) from NumPy arrays - no Blender required
+
+GlbBuilder collects nodes, meshes, skins and materials, packs every array
+into one 4-byte aligned BIN chunk and writes the container in one go.
+It only knows glTF; what goes into the file (characters, LODs, animations)
+is decided by the pipeline stages that use it (see headless_character.py).
+
+Requires only NumPy.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+TARGET_ARRAY_BUFFER = 34962
+TARGET_ELEMENT_ARRAY_BUFFER = 34963
+
+# (dtype kind, itemsize) -> glTF componentType
+COMPONENT_TYPES = {
+    ("i", 1): 5120,
+    ("u", 1): 5121,
+    ("i", 2): 5122,
+    ("u", 2): 5123,
+    ("u", 4): 5125,
+    ("f", 4): 5126,
+}
+
+ACCESSOR_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4", 16: "MAT4"}
+
+
+class GlbBuilder:
+    """Accumulates a glTF document and its binary payload"""
+
+    def __init__(self, generator="Khaos headless pipeline"):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": generator},
+            "scene": 0,
+            "scenes": [{"name": "Scene", "nodes": []}],
+            "nodes": [],
+            "meshes": [],
+            "materials": [],
+            "skins": [],
+            "animations": [],
+            "accessors": [],
+            "bufferViews": [],
+            "buffers": [],
+        }
+        self.chunks = []
+        self.byte_length = 0
+        # Keyframe time arrays shared between animation samplers (bytes -> accessor)
+        self.time_accessors = {}
+
+    # ------------------------------------------------------------------
+    # Binary data
+    # ------------------------------------------------------------------
+
+    def add_buffer_view(self, data, target=None):
+        """Append raw bytes (4-byte aligned) and return the bufferView index"""
+        data = bytes(data)
+        padding = (-self.byte_length) % 4
+        if padding:
+            self.chunks.append(b"\x00" * padding)
+            self.byte_length += padding
+
+        view = {"buffer": 0, "byteOffset": self.byte_length, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.gltf["bufferViews"].append(view)
+
+        self.chunks.append(data)
+        self.byte_length += len(data)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def add_accessor(self, array, target=None, with_bounds=False, normalized=False):
+        """
+        Append an array as an accessor and return its index.
+
+        (count,) arrays become SCALAR, (count, k) arrays VECk, (count, 4, 4)
+        arrays MAT4 (stored column-major as glTF requires).
+        """
+        array = np.asarray(array)
+        if array.ndim == 3:
+            # glTF matrices are column-major
+            array = np.ascontiguousarray(array.transpose(0, 2, 1)).reshape(len(array), 16)
+        elif array.ndim == 1:
+            array = array.reshape(-1, 1)
+
+        array = np.ascontiguousarray(array.astype(array.dtype.newbyteorder("<"), copy=False))
+        components = array.shape[1]
+        accessor = {
+            "bufferView": self.add_buffer_view(array.tobytes(), target),
+            "componentType": COMPONENT_TYPES[(array.dtype.kind, array.dtype.itemsize)],
+            "count": len(array),
+            "type": ACCESSOR_TYPES[components],
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if with_bounds and len(array):
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    # ------------------------------------------------------------------
+    # Document objects
+    # ------------------------------------------------------------------
+
+    def add_node(self, name, translation=None, rotation=None, scale=None, children=None,
+                 mesh=None, skin=None, extras=None, root=False):
+        """Append a node and return its index; root nodes are added to the scene"""
+        node = {"name": name}
+        if translation is not None:
+            node["translation"] = [float(v) for v in translation]
+        if rotation is not None:
+            node["rotation"] = [float(v) for v in rotation]
+        if scale is not None:
+            node["scale"] = [float(v) for v in scale]
+        if children:
+            node["children"] = [int(c) for c in children]
+        if mesh is not None:
+            node["mesh"] = mesh
+        if skin is not None:
+            node["skin"] = skin
+        if extras:
+            node["extras"] = extras
+
+        self.gltf["nodes"].append(node)
+        index = len(self.gltf["nodes"]) - 1
+        if root:
+            self.gltf["scenes"][0]["nodes"].append(index)
+        return index
+
+    def add_children(self, parent, children):
+        """Attach nodes to an existing node"""
+        node = self.gltf["nodes"][parent]
+        node.setdefault("children", []).extend(int(c) for c in children)
+
+    def add_material(self, name, base_color=(0.8, 0.8, 0.8, 1.0), metallic=0.0, roughness=0.5):
+        """Append a metallic-roughness material and return its index"""
+        self.gltf["materials"].append({
+            "name": name,
+            "pbrMetallicRoughness": {
+                "baseColorFactor": [float(v) for v in base_color],
+                "metallicFactor": float(metallic),
+                "roughnessFactor": float(roughness),
+            },
+        })
+        return len(self.gltf["materials"]) - 1
+
+    def add_mesh(self, name, positions, normals, indices, joints=None, weights=None, material=None):
+        """Append a single-primitive triangle mesh and return its index"""
+        attributes = {
+            "POSITION": self.add_accessor(np.asarray(positions, dtype=np.float32),
+                                          TARGET_ARRAY_BUFFER, with_bounds=True),
+            "NORMAL": self.add_accessor(np.asarray(normals, dtype=np.float32), TARGET_ARRAY_BUFFER),
+        }
+        if joints is not None:
+            joint_dtype = np.uint8 if np.max(joints, initial=0) < 256 else np.uint16
+            attributes["JOINTS_0"] = self.add_accessor(np.asarray(joints, dtype=joint_dtype), TARGET_ARRAY_BUFFER)
+            attributes["WEIGHTS_0"] = self.add_accessor(np.asarray(weights, dtype=np.float32), TARGET_ARRAY_BUFFER)
+
+        indices = np.asarray(indices).reshape(-1)
+        index_dtype = np.uint16 if len(positions) < 65536 else np.uint32
+        primitive = {
+            "attributes": attributes,
+            "indices": self.add_accessor(indices.astype(index_dtype), TARGET_ELEMENT_ARRAY_BUFFER),
+            "mode": 4,  # TRIANGLES
+        }
+        if material is not None:
+            primitive["material"] = material
+
+        self.gltf["meshes"].append({"name": name, "primitives": [primitive]})
+        return len(self.gltf["meshes"]) - 1
+
+    def add_skin(self, name, joints, inverse_bind_matrices, skeleton=None):
+        """Append a skin (joint node indices + (J, 4, 4) inverse bind matrices)"""
+        skin = {
+            "name": name,
+            "joints": [int(j) for j in joints],
+            "inverseBindMatrices": self.add_accessor(np.asarray(inverse_bind_matrices, dtype=np.float32)),
+        }
+        if skeleton is not None:
+            skin["skeleton"] = int(skeleton)
+        self.gltf["skins"].append(skin)
+        return len(self.gltf["skins"]) - 1
+
+    def add_animation(self, name, channels, extras=None):
+        """
+        Append an animation and return its index.
+
+        channels is a list of {"node", "path", "times", "values"} with path
+        "translation", "rotation" (xyzw) or "scale"; every channel gets a
+        LINEAR sampler, and identical time arrays share one accessor.
+        """
+        samplers, targets = [], []
+        for channel in channels:
+            times = np.asarray(channel["times"], dtype=np.float32).reshape(-1)
+            key = times.tobytes()
+            if key not in self.time_accessors:
+                self.time_accessors[key] = self.add_accessor(times, with_bounds=True)
+            samplers.append({
+                "input": self.time_accessors[key],
+                "output": self.add_accessor(np.asarray(channel["values"], dtype=np.float32)),
+                "interpolation": "LINEAR",
+            })
+            targets.append({"sampler": len(samplers) - 1,
+                            "target": {"node": int(channel["node"]), "path": channel["path"]}})
+
+        animation = {"name": name, "channels": targets, "samplers": samplers}
+        if extras:
+            animation["extras"] = extras
+        self.gltf["animations"].append(animation)
+        return len(self.gltf["animations"]) - 1
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def to_bytes(self):
+        """Serialize the document as GLB bytes"""
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        binary = b"".join(self.chunks)
+        binary += b"\x00" * ((-len(binary)) % 4)
+        if binary:
+            gltf["buffers"] = [{"byteLength": len(binary)}]
+
+        json_bytes = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        json_bytes += b" " * ((-len(json_bytes)) % 4)
+
+        parts = [struct.pack("<II", len(json_bytes), CHUNK_JSON), json_bytes]
+        if binary:
+            parts += [struct.pack("<II", len(binary), CHUNK_BIN), binary]
+        body = b"".join(parts)
+        return struct.pack("<4sII", GLB_MAGIC, 2, 12 + len(body)) + body
+
+    def write(self, path):
+        """Write the .glb file and return its size in bytes"""
+        data = self.to_bytes()
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
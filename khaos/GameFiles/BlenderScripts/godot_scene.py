@@ -0,0 +1,146 @@
+"""
+Minimal Godot Scene Writer for Khaos Project
+Builds text scenes (.tscn, format 3) from plain Python/NumPy values
+
+TscnBuilder collects sub-resources and nodes and writes the scene in one
+go, like GlbBuilder does for .glb files. It only knows the file format;
+what goes into the scene (hurtboxes, ragdolls, skeletons) is decided by the
+pipeline stages that use it.
+
+Value conversion:
+    bool / int / float / str     true, 12, 0.25, "text"
+    (3,) sequence or array       Vector3(x, y, z)
+    (4, 4) array                 Transform3D (basis columns, then origin)
+    Quaternion((x, y, z, w))     Quaternion(x, y, z, w) (glTF component order)
+    NodePath("..")               NodePath("..")
+    builder.add_sub_resource()   SubResource("...") via the returned ref
+
+Requires only NumPy.
+"""
+
+import json
+import re
+
+import numpy as np
+
+TSCN_FORMAT = 3
+
+# Characters Godot does not allow in node names
+INVALID_NODE_CHARS = re.compile(r'[.:@/"%]')
+
+
+class NodePath:
+    """A NodePath property value"""
+
+    def __init__(self, path):
+        self.path = path
+
+
+class Quaternion:
+    """A Quaternion property value from (x, y, z, w) components"""
+
+    def __init__(self, components):
+        self.components = np.asarray(components, dtype=np.float64).reshape(4)
+
+
+class ResourceRef:
+    """Reference to a sub-resource of the scene being built"""
+
+    def __init__(self, resource_id):
+        self.resource_id = resource_id
+
+
+def node_name(name):
+    """Godot-safe node name (bone names like 'Hand.L' become 'Hand_L')"""
+    return INVALID_NODE_CHARS.sub("_", name)
+
+
+def format_float(value):
+    """Shortest stable float text, always with a decimal point"""
+    value = round(float(value), 6)
+    if value == 0.0:
+        value = 0.0  # no "-0.0"
+    return repr(value)
+
+
+def format_value(value):
+    """tscn text of one property value"""
+    if isinstance(value, ResourceRef):
+        return f'SubResource("{value.resource_id}")'
+    if isinstance(value, NodePath):
+        return f'NodePath({json.dumps(value.path)})'
+    if isinstance(value, Quaternion):
+        return "Quaternion({})".format(", ".join(format_float(v) for v in value.components))
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        return format_float(value)
+    if isinstance(value, str):
+        return json.dumps(value)
+
+    array = np.asarray(value, dtype=np.float64)
+    if array.shape == (3,):
+        return "Vector3({})".format(", ".join(format_float(v) for v in array))
+    if array.shape == (4, 4):
+        basis = array[:3, :3].T.ravel()  # column by column: x axis, y axis, z axis
+        return "Transform3D({})".format(", ".join(format_float(v) for v in np.concatenate([basis, array[:3, 3]])))
+    raise TypeError(f"Cannot write {type(value).__name__} {array.shape} to a .tscn")
+
+
+class TscnBuilder:
+    """Accumulates sub-resources and nodes of one Godot scene"""
+
+    def __init__(self):
+        self.sub_resources = []
+        self.nodes = []
+        self.counters = {}
+
+    def add_sub_resource(self, resource_type, properties=None):
+        """Append a sub-resource and return a reference to use as a property value"""
+        self.counters[resource_type] = self.counters.get(resource_type, 0) + 1
+        resource_id = f"{resource_type}_{self.counters[resource_type]}"
+        self.sub_resources.append((resource_type, resource_id, properties or {}))
+        return ResourceRef(resource_id)
+
+    def add_node(self, name, node_type, parent=None, properties=None, groups=None):
+        """
+        Append a node and return its path for children.
+
+        parent is None for the scene root, "." for children of the root,
+        otherwise the path returned for the parent node.
+        """
+        name = node_name(name)
+        self.nodes.append((name, node_type, parent, properties or {}, groups))
+        if parent is None:
+            return "."
+        return name if parent == "." else f"{parent}/{name}"
+
+    def to_text(self):
+        """Serialize the scene"""
+        lines = [f"[gd_scene load_steps={len(self.sub_resources) + 1} format={TSCN_FORMAT}]", ""]
+
+        for resource_type, resource_id, properties in self.sub_resources:
+            lines.append(f'[sub_resource type="{resource_type}" id="{resource_id}"]')
+            lines.extend(f"{key} = {format_value(value)}" for key, value in properties.items())
+            lines.append("")
+
+        for name, node_type, parent, properties, groups in self.nodes:
+            header = f'[node name="{name}" type="{node_type}"'
+            if parent is not None:
+                header += f' parent="{parent}"'
+            if groups:
+                header += " groups=[{}]".format(", ".join(json.dumps(group) for group in groups))
+            lines.append(header + "]")
+            lines.extend(f"{key} = {format_value(value)}" for key, value in properties.items())
+            lines.append("")
+
+        return "\n".join(lines)
+
+    def write(self, path):
+        """Write the .tscn file and return its size in bytes"""
+        text = self.to_text()
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+        return len(text.encode("utf-8"))
@@ -0,0 +1,119 @@
+"""
+Godot Skeleton Exporter for Khaos Project
+Precomputed Skeleton3D scene from the skeleton spec - no per-bone GDScript at spawn
+
+USAGE:
+    python godot_skeleton.py --skeleton skeletons/khaos_humanoid --output ../SRC/Player/Scenes
+    blender --background scene.blend --python godot_skeleton.py -- --output ../SRC/Player/Scenes
+
+Writes PlayerSkeleton.tscn: a scene whose root is a Skeleton3D carrying every
+bone's name, parent index and rest transform. SkeletonBuilder.gd loads it
+once and instantiates it per character instead of calling add_bone /
+set_bone_parent / set_bone_rest for each bone.
+
+HOW IT WORKS:
+1. The bone data is the spec skeleton_generator_clean.py builds the Blender
+   armature from (skeletons/khaos_humanoid.json + .npz), sorted parents-first
+   so every parent index is smaller than its children's
+2. Rest frames are the Blender bone frames (rig_math.bone_rest_matrices)
+   converted to glTF/Godot Y-up and made parent-relative - the same joint
+   transforms headless_character.py writes into the .glb
+3. Bone names are kept as in the spec ("Hand.L"), so the skeleton, the
+   imported character and the collision scenes all address the same bones
+4. Skeleton3D is a node, not a Resource, so the file is a PackedScene
+   (.tscn) rather than a .tres; Godot caches it after the first load()
+
+Pure NumPy - no bpy import (inside Blender the armature is read with
+analyze_skeleton.extract_skeleton_spec).
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Sibling modules (rig_math, ...) live next to this script - also when run by Blender
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+from collision_shapes import load_spec
+from godot_scene import Quaternion, TscnBuilder
+from rig_math import Z_UP_TO_Y_UP, bone_rest_matrices, local_rest_matrices, mat3_to_quaternions
+
+# Name of the root node; hurtbox scenes reach it as "../../Skeleton3D"
+SKELETON_NODE = "Skeleton3D"
+
+
+def skeleton_rest_pose(spec):
+    """Parent-relative Y-up rest matrices plus their (translation, rotation) split"""
+    world = Z_UP_TO_Y_UP @ bone_rest_matrices(spec.heads, spec.tails, spec.rolls)
+    local = local_rest_matrices(spec.parents, world)
+    return {
+        "rest": local,
+        "translations": local[:, :3, 3],
+        "rotations": mat3_to_quaternions(local[:, :3, :3]),
+    }
+
+
+def skeleton_properties(spec):
+    """Skeleton3D bones/<i>/... properties as Godot saves them"""
+    pose = skeleton_rest_pose(spec)
+    properties = {}
+    for i, name in enumerate(spec.names):
+        prefix = f"bones/{i}"
+        properties.update({
+            f"{prefix}/name": name,
+            f"{prefix}/parent": int(spec.parents[i]),
+            f"{prefix}/rest": pose["rest"][i],
+            f"{prefix}/enabled": True,
+            # Pose starts at rest, like reset_bone_poses() after building
+            f"{prefix}/position": pose["translations"][i],
+            f"{prefix}/rotation": Quaternion(pose["rotations"][i]),
+            f"{prefix}/scale": np.ones(3),
+        })
+    return properties
+
+
+def write_skeleton_scene(path, spec, name=SKELETON_NODE):
+    """Write the Skeleton3D scene for a spec; returns the sorted spec and the file size"""
+    spec = spec.sorted()
+    builder = TscnBuilder()
+    builder.add_node(name, "Skeleton3D", properties=skeleton_properties(spec))
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return spec, builder.write(path)
+
+
+def parse_args(argv=None):
+    """Command line for skeleton exports (Blender passes its own args before '--')"""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Write the precomputed Godot Skeleton3D scene")
+    parser.add_argument("--skeleton", default=None, help="skeleton spec (default: the scene armature in Blender, "
+                                                         "else the default spec)")
+    parser.add_argument("--output", default=".", help="folder for the .tscn file")
+    parser.add_argument("--prefix", default="Player", help="scene name prefix")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Export the Skeleton3D scene for one skeleton"""
+    args = parse_args(argv)
+    path = os.path.join(args.output, f"{args.prefix}Skeleton.tscn")
+    spec, size = write_skeleton_scene(path, load_spec(args.skeleton))
+
+    roots = [spec.names[i] for i in np.flatnonzero(spec.parents < 0)]
+    print("=" * 80)
+    print("KHAOS GODOT SKELETON")
+    print("=" * 80)
+    print(f"✓ {len(spec)} bones, root {', '.join(roots)}")
+    print(f"✓ Wrote {path} ({size / 1024:.1f} KB)")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""
+Headless Character Builder for Khaos Project
+Generates the rigged, skinned character straight to .glb - NO Blender needed
+
+USAGE:
+    python headless_character.py
+    python headless_character.py --skeleton skeletons/khaos_humanoid --output PlayerCharacter.glb
+
+Takes the same inputs the Blender scripts use:
+- bone data: skeleton spec loaded by SkeletonGenerator (skeleton_spec.py)
+- segment rules: the MeshAutoFitter layout (fit_kernel.py)
+
+and produces positions, normals, indices, JOINTS_0/WEIGHTS_0 and inverse
+bind matrices as NumPy arrays, then writes a valid .glb (glb_writer.py).
+Output is +Y up, like Blender's glTF export, so it imports into Godot as-is.
+
+Weights are analytic (skin_weights.py): every vertex is skinned to the bone
+that produced it, blended into the parent/child bone near joints, so the
+Blender-only subdivide + bone-heat pass is not needed. Segments are
+tessellated adaptively (tessellation.py): radial resolution from
+--max-error, extra edge loops only around joints, and --budget caps the
+total triangle count. --lods 1 0.5 0.2 0.05 adds coarser levels planned from
+the same segments (not decimated): each is a skinned mesh node named
+PlayerMesh_LOD<n> on the same skin, with its view distance range in the
+node extras for CharacterLods.gd. --reduce crowd (skeleton_reduction.py)
+exports a reduced rig: finger/toe chains are dropped and their weights
+moved onto the nearest kept ancestor. --animations bakes the player state
+clips (animation_bake.py) into the file as keyframe-reduced glTF animations.
+--symmetric rebuilds the right side of the skeleton from the left one and
+fits / weights only the center and left segments, mirroring the rest
+(mesh_mirror.py).
+
+With --cache DIR both stages (character arrays, final .glb) are stored in a
+content-addressed build cache (build_cache.py) keyed on the bone data,
+segment rules, blend, tessellation settings, material values and the source of every script
+involved - rebuilding an unchanged character is a file copy.
+
+Requires only NumPy - runs in any plain Python worker.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from animation_bake import DEFAULT_TOLERANCE, add_animations, bake_clips, rig_from_character
+from build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache, copy_from_entry
+from fit_kernel import (build_segment_plan, humanoid_segment_rules, place_segments,
+                        split_normals, triangulate)
+from glb_writer import GlbBuilder
+from mesh_mirror import place_symmetric
+from rig_math import (Z_UP_TO_Y_UP, bone_rest_matrices, local_rest_matrices,
+                      mat3_to_quaternions, transform_points)
+from skeleton_spec import DEFAULT_SKELETON, SkeletonSpec
+from skeleton_reduction import POLICIES, reduce_for_policy, remap_weights
+from skin_weights import DEFAULT_BLEND, segment_weights
+from tessellation import DEFAULT_MAX_ERROR, lod_ranges, plan_lods, plan_tessellation
+
+# PlayerMaterial, same values as setup_material() in mesh_auto_fit.py
+MATERIAL_COLOR = (0.3, 0.4, 0.5, 1.0)
+MATERIAL_METALLIC = 0.1
+MATERIAL_ROUGHNESS = 0.8
+
+# Per-LOD mesh arrays (LOD0 lives in the top-level character arrays)
+LOD_ARRAYS = ("positions", "normals", "indices", "joints", "weights")
+
+# Scripts whose code decides each stage's output (part of the cache key)
+CHARACTER_SOURCES = ("fit_kernel.py", "tessellation.py", "skin_weights.py", "skeleton_reduction.py", "rig_math.py",
+                     "skeleton_spec.py", "mesh_mirror.py", "headless_character.py")
+GLB_SOURCES = CHARACTER_SOURCES + ("glb_writer.py", "animation_bake.py", "pose_kernel.py")
+
+
+def character_mesh(spec, plan, templates, blend, symmetric=False):
+    """Positions, normals, indices and analytic weights of one tessellated segment plan"""
+    if symmetric:
+        # Right-side segments are mirrored copies of the left ones, weights included
+        geometry = place_symmetric(spec.heads, spec.tails, spec.parents, spec.names, plan, templates, blend)
+    else:
+        geometry = place_segments(spec.heads, spec.tails, plan, templates)
+
+    triangles = triangulate(geometry["loops"], geometry["loop_starts"], geometry["loop_totals"])
+    positions = transform_points(Z_UP_TO_Y_UP, geometry["vertices"]).astype(np.float32)
+    # Hard edges (box corners, tube caps) get one vertex per side, smooth surfaces share theirs
+    source, triangles, normals = split_normals(positions, triangles)
+
+    # Every vertex belongs to the bone that produced its segment, blended at joints
+    if symmetric:
+        joints, weights = geometry["joints"], geometry["weights"]
+    else:
+        joints, weights = segment_weights(geometry["vertices"], geometry["vertex_offsets"], plan,
+                                          spec.parents, spec.heads, spec.tails, blend=blend)
+    return {
+        "positions": positions[source],
+        "normals": normals,
+        "indices": triangles,
+        "joints": joints[source],
+        "weights": weights[source],
+        "vertex_offsets": np.searchsorted(source, geometry["vertex_offsets"]).astype(np.int32),
+    }
+
+
+def build_character(spec, rules=None, blend=DEFAULT_BLEND, max_error=DEFAULT_MAX_ERROR, budget=None, lod_ratios=None,
+                    reduction=None, symmetric=False):
+    """
+    Build every array of the skinned character from a skeleton spec.
+
+    max_error (meters) and budget (triangles) drive the adaptive
+    tessellation; max_error=None uses the fixed primitives instead.
+    lod_ratios (e.g. (1.0, 0.5, 0.2, 0.05)) adds a LOD chain. reduction
+    (a skeleton_reduction.POLICIES name) skins the same mesh to a reduced rig.
+    symmetric rebuilds the ".R" bones from the ".L" ones and mirrors the
+    left half of the mesh and its weights onto the right.
+
+    Returns a dict of NumPy arrays (glTF space, +Y up):
+      names, parents          joint table (parents before children)
+      joint_matrices          (J, 4, 4) joint rest matrices in model space
+      inverse_bind_matrices   (J, 4, 4)
+      positions, normals      (V, 3) float32
+      indices                 (T, 3) uint32
+      joints, weights         (V, 4) skinning influences
+      vertex_offsets          (S + 1,) vertex range per fitted segment
+      segment_bones           (S,) joint index that owns each segment
+      lods, lod_ranges        LOD1.. meshes (LOD_ARRAYS each) and (L, 2) view distance
+                              range of every level incl. LOD0 - only with lod_ratios
+    """
+    spec = (spec.symmetrized() if symmetric else spec).sorted()
+    plan = build_segment_plan(spec.names, rules)
+    templates, lods = None, []
+    if lod_ratios and len(lod_ratios) > 1:
+        lods = plan_lods(spec.heads, spec.tails, spec.parents, plan, lod_ratios, max_error or DEFAULT_MAX_ERROR, budget)
+        plan, templates = lods[0]["plan"], lods[0]["templates"]
+    elif max_error is not None:
+        tessellated = plan_tessellation(spec.heads, spec.tails, spec.parents, plan, max_error, budget)
+        plan, templates = tessellated["plan"], tessellated["templates"]
+    character = character_mesh(spec, plan, templates, blend, symmetric)
+
+    # Blender bone frames (local +Y along the bone), expressed in glTF space
+    rest = bone_rest_matrices(spec.heads, spec.tails, spec.rolls)
+    joint_matrices = Z_UP_TO_Y_UP @ rest
+
+    character.update({
+        "names": spec.names,
+        "parents": spec.parents,
+        "joint_matrices": joint_matrices,
+        "inverse_bind_matrices": np.linalg.inv(joint_matrices),
+        "segment_bones": plan.bones,
+    })
+
+    if lods:
+        ranges = lod_ranges(lods)
+        character["lod_ranges"] = np.array(ranges)
+        character["lods"] = []
+        for lod in lods[1:]:
+            mesh = character_mesh(spec, lod["plan"], lod["templates"], blend, symmetric)
+            character["lods"].append({key: mesh[key] for key in LOD_ARRAYS})
+
+    if reduction:
+        reduced, remap = reduce_for_policy(spec, reduction)
+        kept = [spec.names.index(name) for name in reduced.names]
+        for mesh in [character] + character.get("lods", []):
+            mesh["joints"], mesh["weights"] = remap_weights(mesh["joints"], mesh["weights"], remap)
+        character.update({
+            "names": reduced.names,
+            "parents": reduced.parents,
+            "joint_matrices": joint_matrices[kept],
+            "inverse_bind_matrices": character["inverse_bind_matrices"][kept],
+            "segment_bones": remap[plan.bones],
+        })
+    return character
+
+
+def add_skeleton_nodes(builder, character):
+    """Add one node per joint (parent-relative TRS) and return their node indices"""
+    parents = np.asarray(character["parents"])
+    local = local_rest_matrices(parents, character["joint_matrices"])
+    rotations = mat3_to_quaternions(local[:, :3, :3])
+    translations = local[:, :3, 3]
+
+    nodes = [builder.add_node(name, translation=translations[i], rotation=rotations[i])
+             for i, name in enumerate(character["names"])]
+    for i, parent in enumerate(parents):
+        if parent >= 0:
+            builder.add_children(nodes[parent], [nodes[i]])
+    return nodes
+
+
+def write_character_glb(path, character, armature_name="PlayerArmature", mesh_name="PlayerMesh", animations=None):
+    """Write the character arrays (and baked animations) as a skinned .glb; returns the file size in bytes"""
+    builder = GlbBuilder()
+    material = builder.add_material("PlayerMaterial", MATERIAL_COLOR, MATERIAL_METALLIC, MATERIAL_ROUGHNESS)
+
+    joint_nodes = add_skeleton_nodes(builder, character)
+    armature = builder.add_node(armature_name, root=True)
+    roots = [joint_nodes[i] for i, parent in enumerate(character["parents"]) if parent < 0]
+    builder.add_children(armature, roots)
+
+    skin = builder.add_skin(armature_name, joint_nodes, character["inverse_bind_matrices"], skeleton=armature)
+    mesh = builder.add_mesh(
+        mesh_name,
+        character["positions"],
+        character["normals"],
+        character["indices"],
+        joints=character["joints"],
+        weights=character["weights"],
+        material=material,
+    )
+    lod_ranges = character.get("lod_ranges")
+    extras = {"lod": 0, "lod_range": [float(v) for v in lod_ranges[0]]} if lod_ranges is not None else None
+    mesh_nodes = [builder.add_node(mesh_name, mesh=mesh, skin=skin, extras=extras)]
+
+    # Coarser levels share the skin; Godot switches them by view distance (CharacterLods.gd)
+    for level, lod in enumerate(character.get("lods", ()), start=1):
+        lod_name = f"{mesh_name}_LOD{level}"
+        lod_mesh = builder.add_mesh(lod_name, lod["positions"], lod["normals"], lod["indices"],
+                                    joints=lod["joints"], weights=lod["weights"], material=material)
+        extras = {"lod": level, "lod_range": [float(v) for v in lod_ranges[level]]}
+        mesh_nodes.append(builder.add_node(lod_name, mesh=lod_mesh, skin=skin, extras=extras))
+    builder.add_children(armature, mesh_nodes)
+
+    if animations:
+        add_animations(builder, animations, joint_nodes)
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return builder.write(path)
+
+
+def character_key(cache, spec, rules=None, blend=DEFAULT_BLEND, max_error=DEFAULT_MAX_ERROR, budget=None,
+                  lod_ratios=None, reduction=None, symmetric=False):
+    """Cache key of build_character(): bone data, segment rules, blend, tessellation and script versions"""
+    spec = spec.sorted()
+    return cache.key(
+        "character",
+        params={"names": spec.names, "rules": rules or humanoid_segment_rules(), "blend": blend,
+                "max_error": max_error, "budget": budget, "lods": lod_ratios, "reduction": reduction,
+                "symmetric": symmetric},
+        arrays={"parents": spec.parents, "heads": spec.heads, "tails": spec.tails, "rolls": spec.rolls},
+        sources=CHARACTER_SOURCES,
+    )
+
+
+def save_character(folder, character):
+    """Write character arrays as character.npz (LOD meshes as lod<n>_<array>)"""
+    arrays = {key: np.asarray(value) for key, value in character.items() if key != "lods"}
+    for level, lod in enumerate(character.get("lods", ()), start=1):
+        arrays.update({f"lod{level}_{key}": np.asarray(value) for key, value in lod.items()})
+    np.savez(os.path.join(folder, "character.npz"), **arrays)
+
+
+def load_character(folder):
+    """Read arrays written by save_character()"""
+    with np.load(os.path.join(folder, "character.npz")) as data:
+        character = {key: data[key] for key in data.files}
+    character["names"] = [str(name) for name in character["names"]]
+
+    levels = sorted({int(key[3:key.index("_")]) for key in character if key.startswith("lod") and key[3].isdigit()})
+    if levels:
+        character["lods"] = [{key: character.pop(f"lod{level}_{key}") for key in LOD_ARRAYS} for level in levels]
+    return character
+
+
+def character_animations(character, animation_tolerance):
+    """Player clips baked for the character's rig (None when animations are off)"""
+    if animation_tolerance is None:
+        return None
+    return bake_clips(rig_from_character(character), tolerance=animation_tolerance)
+
+
+def build_character_glb(spec, path, rules=None, blend=DEFAULT_BLEND, cache=None, max_error=DEFAULT_MAX_ERROR,
+                        budget=None, lod_ratios=None, reduction=None, animation_tolerance=None, symmetric=False):
+    """
+    Build one character .glb, reusing cached stages when a cache is given.
+
+    animation_tolerance (meters) bakes the player clips (animation_bake.py)
+    into the file; None leaves them out.
+
+    Returns {"bytes", "vertices", "joints", "cached"} where cached is "glb",
+    "character" or None (built from scratch).
+    """
+    if cache is None:
+        character = build_character(spec, rules, blend, max_error, budget, lod_ratios, reduction, symmetric)
+        animations = character_animations(character, animation_tolerance)
+        return {"bytes": write_character_glb(path, character, animations=animations),
+                "vertices": int(len(character["positions"])), "joints": len(character["names"]), "cached": None}
+
+    stage_key = character_key(cache, spec, rules, blend, max_error, budget, lod_ratios, reduction, symmetric)
+    glb_key = cache.key(
+        "glb",
+        params={"character": stage_key, "material": [MATERIAL_COLOR, MATERIAL_METALLIC, MATERIAL_ROUGHNESS],
+                "animations": animation_tolerance},
+        sources=GLB_SOURCES,
+    )
+
+    entry = cache.lookup(glb_key)
+    if entry:
+        copy_from_entry(entry, "character.glb", path)
+        with open(os.path.join(entry, "meta.json"), "r") as f:
+            meta = json.load(f)
+        return {"bytes": os.path.getsize(path), "vertices": meta["vertices"], "joints": meta["joints"], "cached": "glb"}
+
+    entry = cache.lookup(stage_key)
+    if entry:
+        character, cached = load_character(entry), "character"
+    else:
+        character = build_character(spec, rules, blend, max_error, budget, lod_ratios, reduction, symmetric)
+        cached = None
+        cache.store(stage_key, lambda folder: save_character(folder, character))
+
+    size = write_character_glb(path, character, animations=character_animations(character, animation_tolerance))
+    meta = {"vertices": int(len(character["positions"])), "joints": len(character["names"])}
+
+    def write_glb_entry(folder):
+        copy_from_entry(os.path.dirname(os.path.abspath(path)), os.path.basename(path),
+                        os.path.join(folder, "character.glb"))
+        with open(os.path.join(folder, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    cache.store(glb_key, write_glb_entry)
+    return {"bytes": size, "vertices": meta["vertices"], "joints": meta["joints"], "cached": cached}
+
+
+def parse_args(argv=None):
+    """Command line for headless builds"""
+    parser = argparse.ArgumentParser(description="Build the rigged Khaos character as .glb without Blender")
+    parser.add_argument("--skeleton", default=DEFAULT_SKELETON, help="skeleton spec path (without extension)")
+    parser.add_argument("--output", "-o", default="PlayerCharacter.glb", help="output .glb path")
+    parser.add_argument("--max-error", type=float, default=DEFAULT_MAX_ERROR * 1000.0,
+                        help="largest surface deviation in millimeters (0 = fixed 32-sided primitives)")
+    parser.add_argument("--budget", type=int, default=None, help="triangle budget for the whole character")
+    parser.add_argument("--lods", type=float, nargs="+", default=None, metavar="RATIO",
+                        help="LOD chain triangle targets relative to LOD0, e.g. 1 0.5 0.2 0.05")
+    parser.add_argument("--reduce", choices=sorted(POLICIES), default=None,
+                        help="export a reduced rig (collapse finger/toe chains, weights remapped)")
+    parser.add_argument("--animations", nargs="?", type=float, const=DEFAULT_TOLERANCE * 1000.0, default=None,
+                        metavar="MM", help="bake the player clips into the .glb (keyframe tolerance in millimeters, "
+                                           f"default {DEFAULT_TOLERANCE * 1000.0:g})")
+    parser.add_argument("--symmetric", action="store_true",
+                        help="mirror the left side of the skeleton and mesh onto the right")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                        help=f"reuse unchanged builds from a build cache (default folder {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help="cache size limit in MiB (least recently used entries are evicted)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Build and write one character"""
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    spec = SkeletonSpec.load(args.skeleton)
+    cache = BuildCache(args.cache, args.cache_size * 1024 ** 2) if args.cache else None
+    max_error = args.max_error / 1000.0 if args.max_error > 0 else None
+    animation_tolerance = args.animations / 1000.0 if args.animations is not None else None
+    result = build_character_glb(spec, args.output, cache=cache, max_error=max_error, budget=args.budget,
+                                 lod_ratios=args.lods, reduction=args.reduce, animation_tolerance=animation_tolerance,
+                                 symmetric=args.symmetric)
+    elapsed = (time.perf_counter() - start) * 1000.0
+
+    source = f" (cached {result['cached']})" if result["cached"] else ""
+    print(f"✓ {args.output}: {result['joints']} joints, {result['vertices']} verts, "
+          f"{result['bytes'] / 1024:.1f} KiB in {elapsed:.1f} ms{source}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
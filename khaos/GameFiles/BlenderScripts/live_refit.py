@@ -0,0 +1,309 @@
+"""
+Live Mesh Refit for Khaos Project
+Keeps the fitted mesh on the bones while you edit the armature - no rebuilds
+
+USAGE:
+1. Make sure your skeleton is in the scene (run skeleton_generator_clean.py first)
+2. Run this script (Alt+P) - the mesh is built once and live mode starts
+3. Edit bones in Edit Mode - the mesh follows in real time
+4. Run this script again to stop live mode and build the final mesh
+
+HOW IT WORKS:
+1. The live mesh is built without the subdivide pass, so segment i owns
+   the vertex range vertex_offsets[i]..vertex_offsets[i + 1]
+2. A depsgraph_update_post handler only notes that the armature changed
+   and arms a debounced bpy.app.timers callback
+3. On the timer tick every bone's head/tail/radius is read with foreach_get
+   and compared against the last known state; only the segments whose
+   start or end bone changed are re-placed (fit_kernel.place_segment_vertices)
+   and written back into their vertex ranges with one foreach_set
+4. Adding, removing or renaming bones changes the topology, which triggers
+   one rebuild of the mesh datablock (other meshes in the scene are left alone)
+5. Tessellation is planned when the mesh is built and kept while bones move;
+   rebuilds and the final mesh re-plan it for the new bone sizes
+"""
+
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+
+# Sibling modules (fit_kernel, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import bone_heat
+import fit_kernel
+import scene_data
+import skin_weights
+import tessellation
+from mesh_auto_fit import MeshAutoFitter
+
+# Seconds without armature changes before the refit runs
+DEBOUNCE_SECONDS = 0.05
+
+# Running the script again (Alt+P) re-executes this module in a fresh
+# namespace, so the session lives in Blender's driver namespace instead
+SESSION_KEY = "khaos_live_refit"
+
+
+class LiveRefitSession:
+    """Dirty-segment refit of one fitted mesh against one armature"""
+
+    def __init__(self, fitter):
+        self.fitter = fitter
+        self.armature = fitter.armature
+        self.mesh_obj = fitter.mesh_obj
+        self.plan = fitter.segment_plan
+        self.vertex_offsets = np.asarray(fitter.vertex_offsets)
+        self.templates = fitter.segment_templates or {key: factory() for key, factory in fit_kernel.TEMPLATES.items()}
+
+        self.names, self.state = self.read_bone_state()
+        self.coords = self.read_coords()
+        self.last_change = 0.0
+        self.timer_armed = False
+        # Blender finds timers by function object: register, query and unregister this one bound method
+        self.tick_callback = self.tick
+        self.refits = 0
+        self.segments_refit = 0
+
+    # ------------------------------------------------------------------
+    # Bone / mesh state
+    # ------------------------------------------------------------------
+
+    def read_bone_state(self):
+        """
+        Bone names and an (B, 8) state array: head, tail (armature space),
+        head_radius, tail_radius. Edit bones are read while in Edit Mode,
+        since armature.data.bones only syncs when Edit Mode is left.
+        """
+        data = self.armature.data
+        editing = self.armature.mode == 'EDIT'
+        bones = data.edit_bones if editing else data.bones
+        count = len(bones)
+
+        state = np.empty((count, 8), dtype=np.float32)
+        buffer = np.empty(count * 3, dtype=np.float32)
+        bones.foreach_get("head" if editing else "head_local", buffer)
+        state[:, 0:3] = buffer.reshape(-1, 3)
+        bones.foreach_get("tail" if editing else "tail_local", buffer)
+        state[:, 3:6] = buffer.reshape(-1, 3)
+
+        radius = np.empty(count, dtype=np.float32)
+        bones.foreach_get("head_radius", radius)
+        state[:, 6] = radius
+        bones.foreach_get("tail_radius", radius)
+        state[:, 7] = radius
+
+        return [bone.name for bone in bones], state
+
+    def world_heads_tails(self, state):
+        """Heads and tails in world space"""
+        world = np.array(self.armature.matrix_world, dtype=np.float64)
+        heads = state[:, 0:3] @ world[:3, :3].T + world[:3, 3]
+        tails = state[:, 3:6] @ world[:3, :3].T + world[:3, 3]
+        return heads, tails
+
+    def read_coords(self):
+        """Current vertex coordinates of the live mesh, (V, 3)"""
+        mesh = self.mesh_obj.data
+        coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", coords)
+        return coords.reshape(-1, 3)
+
+    def to_mesh_space(self, vertices):
+        """World-space vertices into the mesh object's local space"""
+        inverse = np.linalg.inv(np.array(self.mesh_obj.matrix_world, dtype=np.float64))
+        return vertices @ inverse[:3, :3].T + inverse[:3, 3]
+
+    # ------------------------------------------------------------------
+    # Handler + debounced timer
+    # ------------------------------------------------------------------
+
+    def notice(self, depsgraph):
+        """depsgraph_update_post: arm the timer when the armature changed"""
+        watched = (self.armature, self.armature.data)
+        if not any(update.id.original in watched for update in depsgraph.updates):
+            return
+
+        self.last_change = time.monotonic()
+        if not self.timer_armed:
+            self.timer_armed = True
+            bpy.app.timers.register(self.tick_callback, first_interval=DEBOUNCE_SECONDS)
+
+    def tick(self):
+        """Timer callback: wait until edits settle, then refit once"""
+        if bpy.app.driver_namespace.get(SESSION_KEY) is not self:
+            return None  # live mode was stopped - never write into a rebuilt mesh
+        wait = self.last_change + DEBOUNCE_SECONDS - time.monotonic()
+        if wait > 0.0:
+            return wait
+
+        self.timer_armed = False
+        try:
+            self.refit()
+        except ReferenceError:
+            # Armature or mesh was deleted while live mode was on
+            stop_live_refit(finalize=False)
+        return None
+
+    # ------------------------------------------------------------------
+    # Refit
+    # ------------------------------------------------------------------
+
+    def refit(self):
+        """Rewrite the vertex ranges of every segment touching a changed bone"""
+        start = time.perf_counter()
+        names, state = self.read_bone_state()
+
+        if names != self.names:
+            self.rebuild(names, state)
+            return
+
+        changed = np.any(state != self.state, axis=1)
+        if not changed.any():
+            return
+
+        dirty = np.flatnonzero(changed[self.plan.bones] | changed[self.plan.end_bones])
+        self.state = state
+        if not len(dirty):
+            return
+
+        heads, tails = self.world_heads_tails(state)
+        vertices = fit_kernel.place_segment_vertices(heads, tails, self.plan, dirty, self.templates)
+
+        # Vertex indices of the dirty ranges, in the same order as `vertices`
+        starts = self.vertex_offsets[dirty]
+        counts = self.vertex_offsets[dirty + 1] - starts
+        ranges = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+        self.coords[ranges] = self.to_mesh_space(vertices)
+        mesh = self.mesh_obj.data
+        mesh.vertices.foreach_set("co", self.coords.ravel())
+        mesh.update()
+
+        self.refits += 1
+        self.segments_refit += len(dirty)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        print(f"  ↻ Refit {len(dirty)}/{len(self.plan)} segments ({counts.sum()} verts) in {elapsed:.2f} ms")
+
+    def rebuild(self, names, state):
+        """Bones were added/removed/renamed: new topology in the same mesh object"""
+        heads, tails = self.world_heads_tails(state)
+        parents = self.read_parents(names)
+
+        plan = fit_kernel.build_segment_plan(names, self.fitter.rules)
+        if self.fitter.tessellation == 'ADAPTIVE':
+            tessellated = tessellation.plan_tessellation(heads, tails, parents, plan,
+                                                         self.fitter.max_error, self.fitter.triangle_budget)
+            plan, self.templates = tessellated["plan"], tessellated["templates"]
+        geometry = fit_kernel.place_segments(heads, tails, plan, self.templates)
+        world_vertices = geometry["vertices"]
+        geometry["vertices"] = self.to_mesh_space(world_vertices).astype(np.float32)
+
+        old_mesh = self.mesh_obj.data
+        mesh = bpy.data.meshes.new(old_mesh.name)
+        scene_data.write_mesh_arrays(mesh, geometry)
+        for material in old_mesh.materials:
+            mesh.materials.append(material)
+        self.mesh_obj.data = mesh
+        bpy.data.meshes.remove(old_mesh)
+
+        if self.fitter.weighting == 'ANALYTIC':
+            joints, weights = skin_weights.segment_weights(
+                world_vertices, geometry["vertex_offsets"], plan,
+                parents, heads, tails, blend=self.fitter.blend
+            )
+            bone_heat.write_bone_groups(self.mesh_obj, names, joints, weights)
+
+        self.names, self.state = names, state
+        self.plan = plan
+        self.vertex_offsets = np.asarray(geometry["vertex_offsets"])
+        self.coords = self.read_coords()
+        print(f"  ✓ Bones changed - rebuilt {len(plan)} segments ({len(self.coords)} verts)")
+
+    def read_parents(self, names):
+        """Parent index per bone, from edit bones in Edit Mode"""
+        data = self.armature.data
+        bones = data.edit_bones if self.armature.mode == 'EDIT' else data.bones
+        index = {name: i for i, name in enumerate(names)}
+        return np.array([index[bone.parent.name] if bone.parent else -1 for bone in bones], dtype=np.int64)
+
+
+def current_session():
+    """The running LiveRefitSession, or None"""
+    return bpy.app.driver_namespace.get(SESSION_KEY)
+
+
+def on_depsgraph_update(scene, depsgraph):
+    """depsgraph_update_post handler, forwards to the running session"""
+    session = current_session()
+    if session is not None:
+        try:
+            session.notice(depsgraph)
+        except ReferenceError:
+            stop_live_refit(finalize=False)
+
+
+def remove_handlers():
+    """Remove our handler, including copies registered by earlier runs of this script"""
+    handlers = bpy.app.handlers.depsgraph_update_post
+    for handler in [h for h in handlers if getattr(h, "__name__", "") == on_depsgraph_update.__name__]:
+        handlers.remove(handler)
+
+
+def is_live():
+    """True while live refit is running"""
+    return current_session() is not None
+
+
+def start_live_refit():
+    """Build the live (unsubdivided) mesh and start watching the armature"""
+    if is_live():
+        return current_session()
+
+    scene_data.ensure_object_mode()
+
+    fitter = MeshAutoFitter(subdivide_cuts=0)
+    fitter.generate()
+    if fitter.mesh_obj is None:
+        return None
+
+    session = LiveRefitSession(fitter)
+    bpy.app.driver_namespace[SESSION_KEY] = session
+    remove_handlers()
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    print("  ✓ Live refit ON - edit bones, the mesh follows. Run live_refit.py again to finish.")
+    return session
+
+
+def stop_live_refit(finalize=True):
+    """Stop watching; with finalize, rebuild the final mesh"""
+    session = bpy.app.driver_namespace.pop(SESSION_KEY, None)
+
+    remove_handlers()
+    if session is not None and bpy.app.timers.is_registered(session.tick_callback):
+        bpy.app.timers.unregister(session.tick_callback)
+
+    if session is not None:
+        print(f"  ✓ Live refit OFF ({session.refits} refits, {session.segments_refit} segments rewritten)")
+
+    if finalize:
+        scene_data.ensure_object_mode()
+        MeshAutoFitter().generate()
+
+
+def main():
+    """Toggle live mode"""
+    if is_live():
+        stop_live_refit(finalize=True)
+    else:
+        start_live_refit()
+
+
+# Run the script
+if __name__ == "__main__":
+    main()
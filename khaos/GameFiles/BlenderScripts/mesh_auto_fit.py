@@ -7,22 +7,95 @@ USAGE:
 2. Adjust bones if needed
 3. Run this script (Alt+P)
 4. Meshes will be automatically generated and fitted to ALL bones
-5. Can re-run anytime to regenerate meshes
+5. Can re-run anytime to regenerate meshes, or run live_refit.py to keep
+   the mesh fitted while you edit bones
+
+By default every segment is placed by the vectorized fit_kernel.py and
+written straight into one mesh datablock (no per-bone objects, no join). Use MeshAutoFitter(direct_geometry=False)
+for the original one-primitive-per-bone operator path (its join, scale
+apply and subdivide go through scene_data.py too, so both paths run in
+blender --background).
+
+Direct mode also weights the mesh analytically: every segment's vertices go
+to the bone that produced them, blended into the parent/child bone near
+joints (skin_weights.py). Use weighting='HEAT' for our own one-factorization
+bone-heat solve (bone_heat.py, needs SciPy) or 'AUTO' for Blender's.
+
+Direct mode tessellates adaptively (tessellation.py): each segment gets the
+radial resolution its radius needs for max_error, plus edge loops only
+around the joints it bends at, instead of 32-sided primitives and a global
+subdivide. Use tessellation='UNIFORM' for the old primitives + subdivide.
+lod_ratios=(1.0, 0.5, 0.2, 0.05) adds PlayerMesh_LOD1.. objects planned
+from the same segments at lower triangle targets, weighted the same way.
+symmetric=True fits and weights only the center and left segments and
+mirrors them onto the right side (mesh_mirror.py) - for armatures built
+with SkeletonGenerator().generate(symmetric=True).
 
 This script is SMART - it calculates mesh positions/sizes from actual bone data!
 """
 
+import os
+import sys
+
 import bpy
-import bmesh
 import math
+import numpy as np
 from mathutils import Vector, Matrix, Quaternion
 
+# Sibling modules (fit_kernel, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import bone_heat
+import fit_kernel
+import mesh_mirror
+import scene_data
+import skin_weights
+import stage_profiler
+import tessellation as tess
+
 class MeshAutoFitter:
     """Automatically generates and fits meshes to skeleton bones"""
 
-    def __init__(self):
+    def __init__(self, direct_geometry=True, weighting='ANALYTIC', blend=skin_weights.DEFAULT_BLEND, subdivide_cuts=2,
+                 tessellation='ADAPTIVE', max_error=tess.DEFAULT_MAX_ERROR, triangle_budget=None, lod_ratios=None,
+                 rules=None, symmetric=False):
         self.armature = None
+        self.mesh_obj = None
         self.mesh_parts = []
+        self.segment_names = []
+        self.segment_plan = None
+        self.segment_templates = None
+        self.vertex_offsets = None
+        self.lod_objects = []
+        # Stage timings, bpy.ops and depsgraph counts of the last generate()
+        self.profiler = stage_profiler.StageProfiler("mesh_auto_fit")
+        # Direct mode builds one mesh datablock from fit_kernel arrays
+        # instead of one bpy.ops primitive per bone followed by a join
+        self.direct_geometry = direct_geometry
+        # 'ANALYTIC': weight each segment to its source bone during generation
+        # (direct mode only), 'HEAT': bone_heat.py solve on the final mesh,
+        # 'AUTO': Blender's ARMATURE_AUTO bone-heat solve
+        self.weighting = weighting if direct_geometry or weighting == 'HEAT' else 'AUTO'
+        # Fraction of a bone's length blended into its parent/child at joints
+        self.blend = blend
+        # Direct mode smoothing cuts; 0 keeps one vertex range per segment
+        # (required by live_refit.py, which rewrites those ranges in place)
+        self.subdivide_cuts = subdivide_cuts
+        # Direct mode: 'ADAPTIVE' sizes every segment for max_error (meters,
+        # see tessellation.screen_space_error) and never subdivides,
+        # 'UNIFORM' uses the fixed primitives + subdivide_cuts
+        self.tessellation = tessellation
+        self.max_error = max_error
+        self.triangle_budget = triangle_budget
+        # Adaptive mode only: LOD chain triangle targets relative to LOD0,
+        # e.g. (1.0, 0.5, 0.2, 0.05) adds PlayerMesh_LOD1..3
+        self.lod_ratios = lod_ratios
+        # Segment rules for non-humanoid rigs (default: fit_kernel.humanoid_segment_rules())
+        self.rules = rules
+        # Direct mode: fit the left half and mirror it (needs a symmetric armature)
+        self.symmetric = symmetric
 
     def find_armature(self):
         """Find the armature in the scene"""
@@ -34,13 +107,8 @@ class MeshAutoFitter:
 
     def delete_existing_meshes(self):
         """Delete existing mesh objects (keeps armature)"""
-        bpy.ops.object.select_all(action='DESELECT')
-
-        for obj in bpy.data.objects:
-            if obj.type == 'MESH':
-                obj.select_set(True)
-
-        bpy.ops.object.delete()
+        scene_data.ensure_object_mode()
+        scene_data.clear_objects(types={'MESH'})
         print("  Cleared existing meshes")
 
     def get_bone_midpoint_and_length(self, bone):
@@ -99,8 +167,8 @@ class MeshAutoFitter:
         self.mesh_parts.append(mesh_obj)
         return mesh_obj
 
-    def create_hand_box(self, bone_name):
-        """Create box mesh for hand (palm) - positioned at wrist, extending along bone"""
+    def hand_box_matrix(self, bone_name):
+        """Build the world transform that maps a unit cube onto the palm of a hand bone"""
         bone = self.armature.data.bones[bone_name]
         midpoint, length, direction, head, tail = self.get_bone_midpoint_and_length(bone)
 
@@ -115,11 +183,6 @@ class MeshAutoFitter:
         palm_depth = length * 0.4   # Front-to-back thickness (local Y) - thinnest
         palm_length = length * 1.0  # Wrist to fingers (local Z) - longest (reduced from 1.1)
 
-        # Create unit cube at origin
-        bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0), size=1.0)
-        mesh_obj = bpy.context.active_object
-        mesh_obj.name = f"{bone_name}_Mesh"
-
         # Build transformation matrix: Translate * Rotate * Scale
         # 1. Scale matrix (in local space)
         scale_matrix = Matrix.Diagonal((palm_width, palm_depth, palm_length, 1.0))
@@ -141,22 +204,26 @@ class MeshAutoFitter:
         translation_matrix = Matrix.Translation(palm_center)
 
         # Combine transformations (apply right-to-left: scale, then rotate, then translate)
-        transform_matrix = translation_matrix @ rotation_matrix @ scale_matrix
+        return translation_matrix @ rotation_matrix @ scale_matrix
+
+    def create_hand_box(self, bone_name):
+        """Create box mesh for hand (palm) - positioned at wrist, extending along bone"""
+        transform_matrix = self.hand_box_matrix(bone_name)
+
+        # Create unit cube at origin
+        bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0), size=1.0)
+        mesh_obj = bpy.context.active_object
+        mesh_obj.name = f"{bone_name}_Mesh"
 
         # Apply transformation to mesh vertices directly
-        mesh = mesh_obj.data
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
-        bm.transform(transform_matrix)
-        bm.to_mesh(mesh)
-        bm.free()
-        mesh.update()
+        mesh_obj.data.transform(transform_matrix)
+        mesh_obj.data.update()
 
         self.mesh_parts.append(mesh_obj)
         return mesh_obj
 
-    def create_foot_box(self, bone_name):
-        """Create box mesh for foot - positioned at ankle, extending along bone"""
+    def foot_box_matrix(self, bone_name):
+        """Build the world transform that maps a unit cube onto a foot bone"""
         bone = self.armature.data.bones[bone_name]
         midpoint, length, direction, head, tail = self.get_bone_midpoint_and_length(bone)
 
@@ -170,11 +237,6 @@ class MeshAutoFitter:
         foot_height = length * 0.28 # Top-to-bottom thickness (local Y) - thinnest
         foot_length = length * 0.9  # Heel to toe (local Z) - longest
 
-        # Create unit cube at origin
-        bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0), size=1.0)
-        mesh_obj = bpy.context.active_object
-        mesh_obj.name = f"{bone_name}_Mesh"
-
         # Build transformation matrix: Translate * Rotate * Scale
         # 1. Scale matrix (in local space)
         scale_matrix = Matrix.Diagonal((foot_width, foot_height, foot_length, 1.0))
@@ -188,16 +250,20 @@ class MeshAutoFitter:
         translation_matrix = Matrix.Translation(foot_center)
 
         # Combine transformations (apply right-to-left: scale, then rotate, then translate)
-        transform_matrix = translation_matrix @ rotation_matrix @ scale_matrix
+        return translation_matrix @ rotation_matrix @ scale_matrix
+
+    def create_foot_box(self, bone_name):
+        """Create box mesh for foot - positioned at ankle, extending along bone"""
+        transform_matrix = self.foot_box_matrix(bone_name)
+
+        # Create unit cube at origin
+        bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0), size=1.0)
+        mesh_obj = bpy.context.active_object
+        mesh_obj.name = f"{bone_name}_Mesh"
 
         # Apply transformation to mesh vertices directly
-        mesh = mesh_obj.data
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
-        bm.transform(transform_matrix)
-        bm.to_mesh(mesh)
-        bm.free()
-        mesh.update()
+        mesh_obj.data.transform(transform_matrix)
+        mesh_obj.data.update()
 
         self.mesh_parts.append(mesh_obj)
         return mesh_obj
@@ -228,7 +294,7 @@ class MeshAutoFitter:
 
         # Compress front-to-back
         mesh_obj.scale = (1, 0.65, 1)
-        bpy.ops.object.transform_apply(scale=True)
+        scene_data.apply_scale(mesh_obj)
 
         self.mesh_parts.append(mesh_obj)
         return mesh_obj
@@ -248,7 +314,7 @@ class MeshAutoFitter:
         mesh_obj.name = "Pelvis_Mesh"
         # Scale: wider (X), very flat front/back (Y), shorter height (Z)
         mesh_obj.scale = (1.3, 0.5, 0.55)  # Flatter Y for flat front/back
-        bpy.ops.object.transform_apply(scale=True)
+        scene_data.apply_scale(mesh_obj)
 
         self.mesh_parts.append(mesh_obj)
         return mesh_obj
@@ -278,28 +344,35 @@ class MeshAutoFitter:
         self.mesh_parts.append(mesh_obj)
         return mesh_obj
 
+    def create_part(self, create, *args, **kwargs):
+        """Run one legacy create_* call as its own profiler stage"""
+        with self.profiler.stage(args[0] if args else create.__name__):
+            mesh_obj = create(*args, **kwargs)
+            self.profiler.record_mesh(mesh_obj.data)
+        return mesh_obj
+
     def generate_all_meshes(self):
         """Generate meshes for all bones"""
         print("\n  Generating meshes:")
 
         # Head
         print("    - Head")
-        self.create_head_sphere()
+        self.create_part(self.create_head_sphere)
 
         # Torso
         print("    - Torso")
-        self.create_torso_cone()
+        self.create_part(self.create_torso_cone)
 
         # Pelvis
         print("    - Pelvis")
-        self.create_pelvis_box()
+        self.create_part(self.create_pelvis_box)
 
         # Arms - both sides
         for side in [".L", ".R"]:
             print(f"    - Arm{side}")
-            self.create_limb_cylinder(f"UpperArm{side}", radius=0.06)
-            self.create_limb_cylinder(f"ForeArm{side}", radius=0.05)
-            self.create_hand_box(f"Hand{side}")
+            self.create_part(self.create_limb_cylinder, f"UpperArm{side}", radius=0.06)
+            self.create_part(self.create_limb_cylinder, f"ForeArm{side}", radius=0.05)
+            self.create_part(self.create_hand_box, f"Hand{side}")
 
         # Fingers - both sides
         for side in [".L", ".R"]:
@@ -307,15 +380,15 @@ class MeshAutoFitter:
                 for joint in ["01", "02", "03"]:
                     bone_name = f"{finger}_{joint}{side}"
                     if bone_name in self.armature.data.bones:
-                        self.create_finger_mesh(bone_name)
+                        self.create_part(self.create_finger_mesh, bone_name)
 
         # Legs - both sides
         for side in [".L", ".R"]:
             print(f"    - Leg{side}")
-            self.create_limb_cylinder(f"UpperLeg{side}", radius=0.08)
-            self.create_limb_cylinder(f"LowerLeg{side}", radius=0.06)
-            self.create_foot_box(f"Foot{side}")
-            self.create_limb_cylinder(f"Toe{side}", radius=0.04)
+            self.create_part(self.create_limb_cylinder, f"UpperLeg{side}", radius=0.08)
+            self.create_part(self.create_limb_cylinder, f"LowerLeg{side}", radius=0.06)
+            self.create_part(self.create_foot_box, f"Foot{side}")
+            self.create_part(self.create_limb_cylinder, f"Toe{side}", radius=0.04)
 
         print(f"  ✓ Generated {len(self.mesh_parts)} mesh segments")
 
@@ -324,39 +397,160 @@ class MeshAutoFitter:
         if not self.mesh_parts:
             return None
 
-        bpy.ops.object.select_all(action='DESELECT')
-        for part in self.mesh_parts:
-            part.select_set(True)
-
-        bpy.context.view_layer.objects.active = self.mesh_parts[0]
-        bpy.ops.object.join()
-
-        unified_mesh = bpy.context.active_object
-        unified_mesh.name = "PlayerMesh"
+        # Object transforms are baked into the vertices, like join does
+        with self.profiler.stage("Join", parts=len(self.mesh_parts)):
+            unified_mesh = scene_data.join_objects(self.mesh_parts, "PlayerMesh")
+            self.mesh_parts = []
+            self.profiler.record_mesh(unified_mesh.data)
 
         # Add subdivision for smoother deformation
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.subdivide(number_cuts=2)
-        bpy.ops.object.mode_set(mode='OBJECT')
+        with self.profiler.stage("Subdivide", cuts=2):
+            scene_data.subdivide(unified_mesh.data, 2)
+            self.profiler.record_mesh(unified_mesh.data)
 
         return unified_mesh
 
+    # ------------------------------------------------------------------
+    # Direct-geometry mode: one mesh datablock, no per-segment objects, no join
+    # ------------------------------------------------------------------
+
+    def read_bone_arrays(self):
+        """Read every bone head/tail at once and transform them to world space"""
+        bones = self.armature.data.bones
+        count = len(bones)
+
+        heads = np.empty(count * 3, dtype=np.float32)
+        tails = np.empty(count * 3, dtype=np.float32)
+        bones.foreach_get("head_local", heads)
+        bones.foreach_get("tail_local", tails)
+
+        world = np.array(self.armature.matrix_world, dtype=np.float64)
+        heads = heads.reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+        tails = tails.reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+
+        names = [bone.name for bone in bones]
+        index = {name: i for i, name in enumerate(names)}
+        parents = np.array([index[bone.parent.name] if bone.parent else -1 for bone in bones], dtype=np.int64)
+
+        return names, parents, heads, tails
+
+    def create_segment_object(self, name, plan, templates, bone_names, parents, heads, tails):
+        """Place a segment plan into a new linked mesh object, with analytic weights"""
+        if self.symmetric:
+            # Weights come with the mirrored half, so they are always computed
+            with self.profiler.stage(f"Place + weight half, mirror ({name})", segments=len(plan)):
+                geometry = mesh_mirror.place_symmetric(heads, tails, parents, bone_names, plan, templates,
+                                                       self.blend)
+        else:
+            with self.profiler.stage(f"Place segments ({name})", segments=len(plan)):
+                geometry = fit_kernel.place_segments(heads, tails, plan, templates)
+        with self.profiler.stage(f"Write mesh ({name})"):
+            mesh_obj = scene_data.new_mesh_object(name, geometry)
+            self.profiler.record_mesh(mesh_obj.data)
+
+        if self.weighting == 'ANALYTIC':
+            # Weights are known per segment - write them before subdividing,
+            # the bmesh subdivide interpolates them onto the new vertices
+            with self.profiler.stage(f"Analytic weights ({name})"):
+                if self.symmetric:
+                    joints, weights = geometry["joints"], geometry["weights"]
+                else:
+                    joints, weights = skin_weights.segment_weights(
+                        geometry["vertices"], geometry["vertex_offsets"], plan,
+                        parents, heads, tails, blend=self.blend
+                    )
+                self.write_vertex_groups(mesh_obj, bone_names, joints, weights)
+        return mesh_obj, geometry
+
+    def build_direct_mesh(self, subdivide_cuts=None):
+        """Build the unified mesh from the vectorized kernel into a single datablock"""
+        if subdivide_cuts is None:
+            subdivide_cuts = self.subdivide_cuts
+        print("\n  Placing all segments with the vectorized kernel:")
+        bone_names, parents, heads, tails = self.read_bone_arrays()
+
+        self.segment_plan = fit_kernel.build_segment_plan(bone_names, self.rules)
+        self.segment_templates = None
+        lods = []
+        if self.tessellation == 'ADAPTIVE':
+            # Resolution is already where it is needed - no subdivide pass
+            with self.profiler.stage("Plan tessellation"):
+                if self.lod_ratios and len(self.lod_ratios) > 1:
+                    lods = tess.plan_lods(heads, tails, parents, self.segment_plan, self.lod_ratios,
+                                          self.max_error, self.triangle_budget)
+                    tessellated = lods[0]
+                else:
+                    tessellated = tess.plan_tessellation(heads, tails, parents, self.segment_plan,
+                                                         self.max_error, self.triangle_budget)
+                self.profiler.record(triangles=tessellated["triangles"])
+            self.segment_plan = tessellated["plan"]
+            self.segment_templates = tessellated["templates"]
+            subdivide_cuts = 0
+            print(f"  ✓ Adaptive tessellation: {tessellated['triangles']} triangles "
+                  f"at {tessellated['max_error'] * 1000.0:.2f} mm max error")
+
+        mesh_obj, geometry = self.create_segment_object("PlayerMesh", self.segment_plan, self.segment_templates,
+                                                        bone_names, parents, heads, tails)
+        mesh = mesh_obj.data
+        self.segment_names = list(self.segment_plan.names)
+        self.vertex_offsets = geometry["vertex_offsets"]
+
+        # Same smoothing pass join_meshes runs (bmesh, no edit mode)
+        if subdivide_cuts > 0:
+            with self.profiler.stage("Subdivide", cuts=subdivide_cuts):
+                scene_data.subdivide(mesh, subdivide_cuts)
+                self.profiler.record_mesh(mesh)
+
+        print(f"  ✓ Wrote {len(self.segment_names)} segments "
+              f"({len(mesh.vertices)} verts, {len(mesh.polygons)} faces)")
+
+        # Coarser levels from the same segments; the view distance ranges are
+        # custom properties, exported as glTF extras for CharacterLods.gd
+        self.lod_objects = []
+        if lods:
+            ranges = tess.lod_ranges(lods)
+            mesh_obj["lod"] = 0
+            mesh_obj["lod_range"] = list(ranges[0])
+            for lod, lod_range in zip(lods[1:], ranges[1:]):
+                lod_obj, _ = self.create_segment_object(f"PlayerMesh_LOD{lod['lod']}", lod["plan"], lod["templates"],
+                                                        bone_names, parents, heads, tails)
+                lod_obj["lod"] = lod["lod"]
+                lod_obj["lod_range"] = list(lod_range)
+                self.lod_objects.append(lod_obj)
+                print(f"  ✓ LOD{lod['lod']}: {lod['triangles']} triangles (target {lod['target']})")
+        return mesh_obj
+
+    def write_vertex_groups(self, mesh_obj, bone_names, joints, weights):
+        """Create one vertex group per bone and fill them with bulk add() calls"""
+        calls = bone_heat.write_bone_groups(mesh_obj, bone_names, joints, weights)
+        print(f"  ✓ Wrote analytic weights ({len(bone_names)} groups, {calls} bulk assignments)")
+
     def parent_to_armature(self, mesh_obj):
-        """Parent mesh to armature with automatic weights"""
-        bpy.ops.object.select_all(action='DESELECT')
-        mesh_obj.select_set(True)
-        self.armature.select_set(True)
-        bpy.context.view_layer.objects.active = self.armature
+        """Parent mesh to armature (analytic or bone_heat.py weights, or automatic weights)"""
+        with self.profiler.stage(f"Parent {mesh_obj.name}", weighting=self.weighting):
+            self.parent_with_weights(mesh_obj)
+
+    def parent_with_weights(self, mesh_obj):
+        """parent_to_armature() body, one branch per weighting mode"""
+        if self.weighting == 'HEAT':
+            # One sparse factorization for all bones, then a plain parent
+            bone_heat.apply_bone_heat(mesh_obj, self.armature)
+            print("  ✓ Parented mesh to armature with bone heat weights")
+            return
+
+        if self.weighting == 'ANALYTIC' and mesh_obj.vertex_groups:
+            # Plain parent + Armature modifier - no bone-heat solve
+            scene_data.parent_to_armature(mesh_obj, self.armature)
+            print("  ✓ Parented mesh to armature with analytic weights")
+            return
 
         # Parent with automatic weights
-        bpy.ops.object.parent_set(type='ARMATURE_AUTO')
+        scene_data.parent_with_automatic_weights(mesh_obj, self.armature)
         print("  ✓ Parented mesh to armature with automatic weights")
 
     def setup_material(self, mesh_obj):
-        """Add basic material"""
-        mat = bpy.data.materials.new(name="PlayerMaterial")
-        mat.use_nodes = True
+        """Add basic material (the same PlayerMaterial on every run)"""
+        mat = scene_data.reuse_material("PlayerMaterial")
 
         bsdf = mat.node_tree.nodes["Principled BSDF"]
         bsdf.inputs['Base Color'].default_value = (0.3, 0.4, 0.5, 1.0)
@@ -370,13 +564,24 @@ class MeshAutoFitter:
 
         print("  ✓ Applied material")
 
-    def generate(self):
-        """Main generation function"""
+    def generate(self, profile_path=None):
+        """Main generation function (profile_path: also write a Chrome trace there)"""
+        self.profiler = stage_profiler.StageProfiler("mesh_auto_fit")
+        with self.profiler.capture():
+            self.run_stages()
+        self.profiler.report()
+        if profile_path:
+            print(f"✓ Profile written: {self.profiler.write(profile_path)}")
+
+    def run_stages(self):
+        """The numbered generation stages"""
         print("\n" + "=" * 80)
         print("KHAOS AUTO MESH FITTER")
         print("=" * 80)
+        before = scene_data.datablock_stats()
 
         print("\n1. Finding armature...")
+        self.profiler.step("1. Find armature")
         if not self.find_armature():
             print("  ERROR: No armature found!")
             print("  Run skeleton_generator_clean.py first!")
@@ -386,19 +591,42 @@ class MeshAutoFitter:
         print(f"  Total bones: {len(self.armature.data.bones)}")
 
         print("\n2. Clearing existing meshes...")
+        self.profiler.step("2. Clear meshes")
         self.delete_existing_meshes()
 
-        print("\n3. Generating fitted meshes...")
-        self.generate_all_meshes()
+        if self.direct_geometry:
+            print("\n3. Generating fitted meshes (direct geometry)...")
+            self.profiler.step("3. Generate meshes (direct)")
+            unified_mesh = self.build_direct_mesh()
+
+            print("\n4. Joining mesh parts... skipped (already one mesh)")
+        else:
+            print("\n3. Generating fitted meshes...")
+            self.profiler.step("3. Generate meshes")
+            self.generate_all_meshes()
 
-        print("\n4. Joining mesh parts...")
-        unified_mesh = self.join_meshes()
+            print("\n4. Joining mesh parts...")
+            self.profiler.step("4. Join + subdivide")
+            unified_mesh = self.join_meshes()
 
         print("\n5. Setting up material...")
+        self.profiler.step("5. Material")
         self.setup_material(unified_mesh)
 
         print("\n6. Parenting to armature...")
+        self.profiler.step("6. Parent + weights")
         self.parent_to_armature(unified_mesh)
+        self.mesh_obj = unified_mesh
+
+        for lod_obj in self.lod_objects:
+            lod_obj.data.materials.append(unified_mesh.data.materials[0])
+            self.parent_to_armature(lod_obj)
+
+        # Stage boundary: the previous run's meshes were reused or are orphans now
+        print("\n7. Purging orphaned datablocks...")
+        self.profiler.step("7. Purge")
+        scene_data.purge_and_report(before, "Mesh fit")
+        self.profiler.close(0)
 
         print("\n" + "=" * 80)
         print("MESH AUTO-FIT COMPLETE!")
@@ -407,7 +635,7 @@ class MeshAutoFitter:
         print("\nNext steps:")
         print("1. Test in Pose Mode - meshes should follow bones")
         print("2. Adjust weight painting if needed")
-        print("3. Tweak bones? Re-run this script to regenerate meshes!")
+        print("3. Tweak bones? Run live_refit.py for real-time refitting, or re-run this script")
         print("4. Export as .glb when satisfied")
         print("=" * 80 + "\n")
 
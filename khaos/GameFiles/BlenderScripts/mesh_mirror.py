@@ -0,0 +1,124 @@
+"""
+Symmetric Mesh Fitting for Khaos Project
+Fits and weights the center + left segments only, then mirrors them onto the right side
+
+USAGE:
+    spec = SkeletonSpec.load(DEFAULT_SKELETON).symmetrized()
+    plan = build_segment_plan(spec.names)
+    mesh = place_symmetric(spec.heads, spec.tails, spec.parents, spec.names, plan)
+    mesh["vertices"], mesh["loops"], ..., mesh["joints"], mesh["weights"]
+
+HOW IT WORKS:
+1. A ".R" segment whose bones are the twins of a ".L" segment's bones
+   (skeleton_spec.mirror_indices) is not fitted; every other segment goes
+   through fit_kernel.place_segments and skin_weights.segment_weights as
+   usual - roughly half the body
+2. The right blocks are copies of their left twins with one vectorized
+   transform over all of them: X negated on the vertices, joints swapped
+   to their twin bones, weights unchanged
+3. Mirroring flips handedness, so the copies use their template with every
+   polygon's loop order reversed (cached per template) to keep the faces
+   pointing outwards
+4. Blocks are laid out in the full plan order, so vertex_offsets and the
+   segment -> bone table mean the same as for a full fit (live_refit.py,
+   skeleton_reduction.py and the LOD chain work unchanged)
+
+The right side is the exact mirror of the left, so the skeleton must be
+symmetric too (SkeletonSpec.symmetrized(), or a spec saved with
+symmetric=True). Twisted segments mirror with the opposite twist.
+
+Pure NumPy - no bpy import.
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+# Sibling modules (fit_kernel, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+from fit_kernel import TEMPLATES, MeshTemplate, segment_transforms, template_topology, transform_templates
+from skeleton_spec import MIRROR_X, bone_side, mirror_indices
+from skin_weights import DEFAULT_BLEND, segment_weights
+
+# Reflection across the X = 0 plane, as a 4x4 for the segment matrices
+MIRROR_MATRIX = np.diag([-1.0, 1.0, 1.0, 1.0])
+
+
+def mirror_sources(plan, names, twin=None):
+    """Per segment, the ".L" segment it mirrors (-1 = fitted directly); twin = mirror_indices(names)"""
+    if twin is None:
+        twin = mirror_indices(names)
+    sides = [bone_side(names[bone]) for bone in plan.bones]
+    segments = {(int(b), int(e)): s for s, (b, e) in enumerate(zip(plan.bones, plan.end_bones))}
+    sources = np.full(len(plan), -1, dtype=np.int64)
+    for s in (s for s, side in enumerate(sides) if side == 'R'):
+        source = segments.get((int(twin[plan.bones[s]]), int(twin[plan.end_bones[s]])))
+        if source is not None and sides[source] == 'L':
+            sources[s] = source
+    return sources
+
+
+@lru_cache(maxsize=None)
+def mirrored_template(template):
+    """Template with every polygon's loop order reversed (faces of a reflected copy point outwards)"""
+    totals = template.loop_totals.astype(np.int64)
+    starts = np.concatenate([[0], np.cumsum(totals)])
+    corner = np.arange(starts[-1]) - np.repeat(starts[:-1], totals)
+    reversed_loops = template.loops[np.repeat(starts[:-1] + totals - 1, totals) - corner]
+    return MeshTemplate(template.vertices, reversed_loops, template.loop_totals)
+
+
+def block_gather(offsets, blocks):
+    """Source indices that lay out ranges [offsets[b], offsets[b + 1]) of `blocks` back to back"""
+    counts = np.diff(offsets)[blocks]
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    return np.arange(starts[-1]) + np.repeat(offsets[blocks] - starts[:-1], counts)
+
+
+def place_symmetric(heads, tails, parents, names, plan, templates=None, blend=DEFAULT_BLEND):
+    """
+    place_segments() + segment_weights() for a symmetric skeleton, fitting only
+    the center and left segments and mirroring the rest.
+
+    Returns place_segments() arrays plus joints and weights, in full plan order.
+    """
+    if templates is None:
+        templates = {key: factory() for key, factory in TEMPLATES.items()}
+
+    twin = mirror_indices(names)
+    sources = mirror_sources(plan, names, twin)
+    flipped = sources >= 0
+    fitted = np.flatnonzero(~flipped)
+    half = plan.subset(fitted)
+
+    # Fit + weight the half exactly as place_segments / segment_weights would
+    matrices = segment_transforms(heads, tails, half)
+    vertices = transform_templates(matrices, [templates[key] for key in half.templates]).astype(np.float32)
+    offsets = np.zeros(len(half) + 1, dtype=np.int64)
+    np.cumsum([templates[key].vertex_count for key in half.templates], out=offsets[1:])
+    joints, weights = segment_weights(vertices, offsets, half, parents, heads, tails, blend=blend)
+
+    # Full layout: mirrored segments use loop-reversed templates, same vertex counts
+    geometry = template_topology([mirrored_template(templates[key]) if flip else templates[key]
+                                  for key, flip in zip(plan.templates, flipped)])
+    position = np.full(len(plan), -1, dtype=np.int64)
+    position[fitted] = np.arange(len(fitted))
+    blocks = position[np.where(flipped, sources, np.arange(len(plan)))]
+    gather = block_gather(offsets, blocks)
+    mirrored = np.repeat(flipped, np.diff(geometry["vertex_offsets"]))
+
+    # The one mirror transform: X negated on every copied vertex, joints swapped to their twins
+    geometry["vertices"] = vertices[gather]
+    geometry["vertices"][mirrored] *= MIRROR_X
+    geometry["joints"] = joints[gather]
+    geometry["joints"][mirrored] = twin[geometry["joints"][mirrored]]
+    geometry["weights"] = weights[gather]
+
+    geometry["matrices"] = matrices[blocks]
+    geometry["matrices"][flipped] = MIRROR_MATRIX @ geometry["matrices"][flipped]
+    return geometry
@@ -0,0 +1,230 @@
+"""
+Character Population Generator for Khaos Project
+Samples hundreds of proportion variants and builds a rigged .glb for each
+
+USAGE:
+    python population.py --count 200 --preset minion --seed 7 --output population/minions
+    python population.py --count 20 --preset boss --blender /opt/blender/blender
+    python population.py --count 20 --blender /opt/blender/blender --profile   # + <variant>.trace.json
+
+HOW IT WORKS:
+1. Proportions (height, head, torso, arm, leg, hand, girth) for all N
+   variants are drawn in one call from a seeded RNG, within a preset's ranges
+2. character_layout.layout_bones() turns them into (N, bones, 3) heads and
+   tails in one vectorized pass - the same layout CharacterBuilder uses
+3. Every variant's skeleton spec is saved, then mesh fitting + .glb export
+   fan out over a process pool (headless_character.py, no Blender), or over
+   persistent Blender workers with --blender (worker_pool.py)
+4. manifest.json lists every variant with its proportions and outputs
+
+Same seed + preset + count = same population. With --cache, variants whose
+inputs did not change since the last bake are copied from the build cache.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache
+from character_layout import CHARACTER_HEIGHT, DEFAULT_PROPORTIONS, layout_bones
+from fit_kernel import humanoid_segment_rules
+from headless_character import build_character_glb
+from skeleton_reduction import POLICIES
+from skeleton_spec import SkeletonSpec, categorize_bones
+
+MANIFEST_FORMAT = "khaos-population"
+MANIFEST_VERSION = 1
+
+# Uniform (low, high) ranges per proportion. Lengths are at the 1.8 m
+# reference; height scales the result, segment thickness scales with
+# height / 1.8 m * girth (CharacterBuilder's part_scale is the same height factor).
+PRESETS = {
+    "default": {
+        "height": (1.65, 1.95), "head": (0.115, 0.135), "torso": (0.63, 0.77),
+        "arm": (0.82, 0.98), "leg": (0.82, 0.98), "hand": (0.18, 0.22), "girth": (0.9, 1.1),
+    },
+    "minion": {
+        "height": (1.0, 1.5), "head": (0.13, 0.17), "torso": (0.55, 0.7),
+        "arm": (0.75, 0.95), "leg": (0.6, 0.8), "hand": (0.18, 0.25), "girth": (0.8, 1.3),
+    },
+    "boss": {
+        "height": (2.4, 3.4), "head": (0.1, 0.13), "torso": (0.75, 0.95),
+        "arm": (0.9, 1.15), "leg": (0.85, 1.05), "hand": (0.22, 0.3), "girth": (1.3, 1.9),
+    },
+}
+
+
+def sample_proportions(count, seed=0, preset="default"):
+    """Draw `count` proportion sets at once; returns a dict of (count,) arrays"""
+    ranges = PRESETS[preset]
+    keys = list(DEFAULT_PROPORTIONS) + ["girth"]
+    low = np.array([ranges[key][0] for key in keys])
+    high = np.array([ranges[key][1] for key in keys])
+
+    samples = np.random.default_rng(seed).uniform(low, high, size=(count, len(keys)))
+    return {key: samples[:, i] for i, key in enumerate(keys)}
+
+
+def thickness_scales(proportions):
+    """Per variant segment thickness factor: height relative to the reference, times girth"""
+    return proportions["height"] / CHARACTER_HEIGHT * proportions["girth"]
+
+
+def scaled_rules(thickness):
+    """humanoid_segment_rules() with every segment's thickness scaled by `thickness` (thickness_scales())"""
+    rules = humanoid_segment_rules()
+    for rule in rules:
+        rule["const"] = tuple(value * thickness for value in rule["const"])
+    return rules
+
+
+def build_variant(task):
+    """Process-pool task: save one variant's spec and write its .glb"""
+    start = time.perf_counter()
+    variant_id, names, parents, heads, tails, thickness, folder, cache_dir, cache_bytes, lod_ratios, reduction = task
+
+    spec = SkeletonSpec(names, parents, heads, tails, categories=categorize_bones(names))
+    spec_base = spec.save(os.path.join(folder, "specs", variant_id))
+
+    glb_path = os.path.join(folder, f"{variant_id}.glb")
+    cache = BuildCache(cache_dir, cache_bytes) if cache_dir else None
+    result = build_character_glb(spec, glb_path, rules=scaled_rules(thickness), cache=cache,
+                                 lod_ratios=lod_ratios, reduction=reduction)
+
+    return {
+        "spec": os.path.relpath(spec_base, folder),
+        "glb": os.path.relpath(glb_path, folder),
+        "vertices": result["vertices"],
+        "bytes": int(result["bytes"]),
+        "cached": result["cached"],
+        "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+    }
+
+
+def save_spec_only(task):
+    """Process-pool task for --blender runs: only the skeleton spec is written here"""
+    variant_id, names, parents, heads, tails, _, folder = task[:7]
+    spec = SkeletonSpec(names, parents, heads, tails, categories=categorize_bones(names))
+    spec_base = spec.save(os.path.join(folder, "specs", variant_id))
+    return {"spec": os.path.relpath(spec_base, folder), "glb": f"{variant_id}.glb"}
+
+
+def generate_population(count, folder, seed=0, preset="default", processes=None, blender=None, workers=4,
+                        cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES, lod_ratios=None, reduction=None,
+                        profile=False):
+    """Sample, lay out and build a whole population; returns the manifest dict"""
+    start = time.perf_counter()
+    proportions = sample_proportions(count, seed, preset)
+    names, parents, heads, tails = layout_bones(proportions)
+    layout_ms = (time.perf_counter() - start) * 1000.0
+
+    os.makedirs(os.path.join(folder, "specs"), exist_ok=True)
+    ids = [f"{preset}_{i:04d}" for i in range(count)]
+    thickness = thickness_scales(proportions).tolist()
+    tasks = [
+        (ids[i], names, parents, heads[i], tails[i], thickness[i], folder, cache_dir, cache_bytes,
+         lod_ratios, reduction)
+        for i in range(count)
+    ]
+
+    task = save_spec_only if blender else build_variant
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        outputs = list(pool.map(task, tasks, chunksize=max(1, count // (4 * (processes or os.cpu_count() or 1)))))
+
+    if blender:
+        # Mesh fitting + export inside persistent Blender workers
+        from worker_pool import WorkerPool
+        # Height and girth go in through the segment rules, the same ones headless builds use
+        jobs = [{"id": ids[i], "kind": "fit",
+                 "fitter": {"lod_ratios": lod_ratios, "rules": scaled_rules(thickness[i])},
+                 "skeleton": os.path.abspath(os.path.join(folder, outputs[i]["spec"])),
+                 "export": os.path.abspath(os.path.join(folder, outputs[i]["glb"])), "profile": profile}
+                for i in range(count)]
+        cache = BuildCache(cache_dir, cache_bytes) if cache_dir else None
+        for output, result in zip(outputs, WorkerPool(blender, workers, cache=cache).run(jobs)):
+            output.update(ok=result["ok"], vertices=result.get("vertices"), cached=result.get("cached"),
+                          elapsed_ms=result.get("elapsed_ms"), error=result.get("error"),
+                          bpy_ops=result.get("bpy_ops"), profile=result.get("profile"))
+
+    variants = []
+    for i, output in enumerate(outputs):
+        variant = {"id": ids[i], "proportions": {key: float(values[i]) for key, values in proportions.items()}}
+        variant.update({key: value for key, value in output.items() if value is not None})
+        variants.append(variant)
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "preset": preset,
+        "seed": seed,
+        "count": count,
+        "bone_count": len(names),
+        "backend": "blender" if blender else "headless",
+        "layout_ms": layout_ms,
+        "elapsed_s": time.perf_counter() - start,
+        "variants": variants,
+    }
+    with open(os.path.join(folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def parse_args(argv=None):
+    """Command line for population bakes"""
+    parser = argparse.ArgumentParser(description="Generate a population of rigged character variants")
+    parser.add_argument("--count", type=int, default=100, help="number of variants")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default", help="proportion ranges")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed")
+    parser.add_argument("--output", default="population", help="output folder (specs, .glb files, manifest)")
+    parser.add_argument("--processes", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--blender", default=None, help="fit + export in Blender workers instead of headless")
+    parser.add_argument("--workers", type=int, default=4, help="Blender workers (with --blender)")
+    parser.add_argument("--lods", type=float, nargs="+", default=None, metavar="RATIO",
+                        help="LOD chain triangle targets relative to LOD0, e.g. 1 0.5 0.2 0.05")
+    parser.add_argument("--reduce", choices=sorted(POLICIES), default=None,
+                        help="headless only: skin to a reduced rig (skeleton_reduction.py), e.g. crowd")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                        help=f"reuse unchanged variants from a build cache (default folder {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help="cache size limit in MiB")
+    parser.add_argument("--profile", action="store_true",
+                        help="with --blender: write a Chrome trace next to every .glb (stage_profiler.py)")
+    args = parser.parse_args(argv)
+    if args.reduce and args.blender:
+        parser.error("--reduce is headless only and cannot be combined with --blender")
+    return args
+
+
+def main(argv=None):
+    """Generate one population and summarize it"""
+    args = parse_args(argv)
+
+    print("=" * 80)
+    print(f"KHAOS POPULATION - {args.count} x {args.preset} (seed {args.seed})")
+    print("=" * 80)
+
+    manifest = generate_population(args.count, args.output, args.seed, args.preset,
+                                   args.processes, args.blender, args.workers,
+                                   args.cache, args.cache_size * 1024 ** 2, args.lods, args.reduce,
+                                   args.profile)
+
+    failed = sum(1 for variant in manifest["variants"] if variant.get("ok") is False)
+    cached = sum(1 for variant in manifest["variants"] if variant.get("cached"))
+    heights = [variant["proportions"]["height"] for variant in manifest["variants"]]
+    print(f"✓ Layout of {args.count} variants x {manifest['bone_count']} bones in {manifest['layout_ms']:.1f} ms")
+    if heights:
+        print(f"✓ Heights {min(heights):.2f} - {max(heights):.2f} m")
+    print(f"✓ {args.count - failed}/{args.count} variants built in {manifest['elapsed_s']:.1f} s "
+          f"({manifest['backend']}, {cached} from cache)")
+    print(f"✓ Manifest: {os.path.join(args.output, 'manifest.json')}")
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Vectorized Rig Math for Khaos Project
+Blender bone-matrix conventions reimplemented in NumPy
+
+Pure NumPy - no bpy import. Every function works on whole bone arrays
+at once, so the headless pipeline stages (GLB reader/writer, exporters)
+agree with what Blender computes for the same head/tail/roll data.
+"""
+
+import numpy as np
+
+# glTF is +Y up, Blender is +Z up: (x, y, z)_gltf -> (x, -z, y)_blender
+Y_UP_TO_Z_UP = np.array([
+    [1.0, 0.0, 0.0, 0.0],
+    [0.0, 0.0, -1.0, 0.0],
+    [0.0, 1.0, 0.0, 0.0],
+    [0.0, 0.0, 0.0, 1.0],
+])
+Z_UP_TO_Y_UP = Y_UP_TO_Z_UP.T
+
+
+def normalize(vectors, eps=1e-12):
+    """Normalize (..., 3) vectors, leaving zero vectors at zero"""
+    vectors = np.asarray(vectors, dtype=np.float64)
+    length = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(length, eps)
+
+
+def vec_roll_to_mat3(directions, rolls):
+    """
+    (N, 3, 3) bone rotation matrices from unit Y directions and rolls.
+
+    Port of Blender's vec_roll_to_mat3_normalized: the bone's Y axis is its
+    direction, X/Z come from the shortest rotation of +Y onto it, then the
+    whole frame is rolled around the direction.
+    """
+    nor = normalize(directions).reshape(-1, 3)
+    rolls = np.asarray(rolls, dtype=np.float64).reshape(-1)
+    x, y, z = nor[:, 0], nor[:, 1], nor[:, 2]
+
+    safe_threshold = 6.1e-3
+    critical_threshold = 2.5e-4
+
+    theta = 1.0 + y
+    theta_alt = x * x + z * z
+    regular = (theta > safe_threshold) | (theta_alt > critical_threshold * critical_threshold)
+    # Close to -Y the theta precision is bad, recompute it from x and z
+    theta = np.where(theta <= safe_threshold, theta_alt * 0.5 + theta_alt * theta_alt * 0.125, theta)
+    theta = np.where(regular, theta, 1.0)
+
+    b = np.zeros((len(nor), 3, 3))
+    b[:, 0, 0] = 1.0 - x * x / theta
+    b[:, 1, 0] = -x
+    b[:, 2, 0] = -x * z / theta
+    b[:, 0, 1] = x
+    b[:, 1, 1] = y
+    b[:, 2, 1] = z
+    b[:, 0, 2] = -x * z / theta
+    b[:, 1, 2] = -z
+    b[:, 2, 2] = 1.0 - z * z / theta
+    # Pointing straight down -Y: simple symmetry around Z
+    b[~regular] = np.diag([-1.0, -1.0, 1.0])
+
+    return axis_angle_to_mat3(nor, rolls) @ b
+
+
+def axis_angle_to_mat3(axes, angles):
+    """(N, 3, 3) rotations about unit axes (Rodrigues)"""
+    axes = np.asarray(axes, dtype=np.float64).reshape(-1, 3)
+    angles = np.asarray(angles, dtype=np.float64).reshape(-1)
+    x, y, z = axes[:, 0], axes[:, 1], axes[:, 2]
+    zero = np.zeros_like(x)
+    k = np.stack([
+        np.stack([zero, -z, y], axis=1),
+        np.stack([z, zero, -x], axis=1),
+        np.stack([-y, x, zero], axis=1),
+    ], axis=1)
+    sin = np.sin(angles)[:, None, None]
+    cos = np.cos(angles)[:, None, None]
+    return np.eye(3) + sin * k + (1.0 - cos) * (k @ k)
+
+
+def mat3_to_rolls(matrices):
+    """
+    Bone rolls recovered from (N, 3, 3) bone rotation matrices.
+
+    Port of Blender's mat3_vec_to_roll.
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    base = vec_roll_to_mat3(matrices[:, :, 1], np.zeros(len(matrices)))
+    roll_matrix = np.swapaxes(base, 1, 2) @ matrices  # base is orthonormal
+    return np.arctan2(roll_matrix[:, 0, 2], roll_matrix[:, 2, 2])
+
+
+def bone_rest_matrices(heads, tails, rolls):
+    """(N, 4, 4) armature-space rest matrices (Blender's Bone.matrix_local)"""
+    heads = np.asarray(heads, dtype=np.float64).reshape(-1, 3)
+    tails = np.asarray(tails, dtype=np.float64).reshape(-1, 3)
+
+    matrices = np.zeros((len(heads), 4, 4))
+    matrices[:, :3, :3] = vec_roll_to_mat3(tails - heads, rolls)
+    matrices[:, :3, 3] = heads
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def transform_points(matrix, points):
+    """Apply one 4x4 matrix to (N, 3) points"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def quaternions_to_mat3(quaternions):
+    """(..., 3, 3) rotation matrices from (..., 4) unit quaternions in glTF (x, y, z, w) order"""
+    q = np.asarray(quaternions, dtype=np.float64)
+    q = q / np.maximum(np.linalg.norm(q, axis=-1, keepdims=True), 1e-12)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+
+    m = np.empty(q.shape[:-1] + (3, 3))
+    m[..., 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    m[..., 0, 1] = 2.0 * (x * y - z * w)
+    m[..., 0, 2] = 2.0 * (x * z + y * w)
+    m[..., 1, 0] = 2.0 * (x * y + z * w)
+    m[..., 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    m[..., 1, 2] = 2.0 * (y * z - x * w)
+    m[..., 2, 0] = 2.0 * (x * z - y * w)
+    m[..., 2, 1] = 2.0 * (y * z + x * w)
+    m[..., 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    return m
+
+
+def trs_matrices(translations, rotations, scales):
+    """(N, 4, 4) matrices from (N, 3) translations, (N, 4) xyzw quaternions and (N, 3) scales"""
+    translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3)
+    matrices = np.zeros((len(translations), 4, 4))
+    matrices[:, :3, :3] = quaternions_to_mat3(rotations) * np.asarray(scales, dtype=np.float64)[:, None, :]
+    matrices[:, :3, 3] = translations
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def hierarchy_levels(parents):
+    """
+    Group node indices by depth (roots first).
+
+    Every node in level d has its parent in level d - 1, so a whole level
+    can be processed with one batched operation.
+    """
+    parents = np.asarray(parents, dtype=np.int64).reshape(-1)
+    depth = np.where(parents < 0, 0, -1)
+
+    while (depth < 0).any():
+        pending = depth < 0
+        ready = pending & (depth[parents] >= 0)
+        if not ready.any():
+            raise ValueError("Parent cycle detected in hierarchy")
+        depth[ready] = depth[parents[ready]] + 1
+
+    if len(depth) == 0:
+        return []
+    return [np.flatnonzero(depth == d) for d in range(depth.max() + 1)]
+
+
+def main_children(parents, heads, tails):
+    """Per bone, the child whose head is closest to its tail (-1 for leaf bones)"""
+    parents = np.asarray(parents)
+    child_of = np.full(len(parents), -1, dtype=np.int64)
+
+    children = np.flatnonzero(parents >= 0)
+    if len(children):
+        owner = parents[children]
+        gap = np.linalg.norm(heads[children] - tails[owner], axis=1)
+        # Sort by (parent, -gap) so the closest child per parent comes last
+        order = np.lexsort((-gap, owner))
+        owner, children = owner[order], children[order]
+        best = np.append(owner[1:] != owner[:-1], True)
+        child_of[owner[best]] = children[best]
+    return child_of
+
+
+def accumulate_world_matrices(parents, local_matrices, levels=None):
+    """
+    World matrices for a hierarchy, one batched matmul per depth level.
+
+    local_matrices is (..., N, 4, 4); any leading batch dimensions (frames,
+    characters, ...) are carried through unchanged.
+    """
+    parents = np.asarray(parents, dtype=np.int64).reshape(-1)
+    local_matrices = np.asarray(local_matrices, dtype=np.float64)
+    if levels is None:
+        levels = hierarchy_levels(parents)
+
+    world = local_matrices.copy()
+    for level in levels[1:]:
+        world[..., level, :, :] = world[..., parents[level], :, :] @ local_matrices[..., level, :, :]
+    return world
+
+
+def mat3_to_quaternions(matrices):
+    """(N, 4) unit quaternions in glTF (x, y, z, w) order from (N, 3, 3) rotation matrices"""
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+
+    # Pick the numerically largest of w, x, y, z per matrix (Shepperd's method)
+    candidates = np.stack([trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=1)
+    case = np.argmax(candidates, axis=1)
+    q = np.empty((len(m), 4))
+
+    w_case = case == 0
+    s = np.sqrt(np.maximum(1.0 + trace[w_case], 1e-12)) * 2.0
+    q[w_case] = np.stack([
+        (m[w_case, 2, 1] - m[w_case, 1, 2]) / s,
+        (m[w_case, 0, 2] - m[w_case, 2, 0]) / s,
+        (m[w_case, 1, 0] - m[w_case, 0, 1]) / s,
+        0.25 * s,
+    ], axis=1)
+
+    x_case = case == 1
+    mx = m[x_case]
+    s = np.sqrt(np.maximum(1.0 + mx[:, 0, 0] - mx[:, 1, 1] - mx[:, 2, 2], 1e-12)) * 2.0
+    q[x_case] = np.stack([
+        0.25 * s,
+        (mx[:, 0, 1] + mx[:, 1, 0]) / s,
+        (mx[:, 0, 2] + mx[:, 2, 0]) / s,
+        (mx[:, 2, 1] - mx[:, 1, 2]) / s,
+    ], axis=1)
+
+    y_case = case == 2
+    my = m[y_case]
+    s = np.sqrt(np.maximum(1.0 + my[:, 1, 1] - my[:, 0, 0] - my[:, 2, 2], 1e-12)) * 2.0
+    q[y_case] = np.stack([
+        (my[:, 0, 1] + my[:, 1, 0]) / s,
+        0.25 * s,
+        (my[:, 1, 2] + my[:, 2, 1]) / s,
+        (my[:, 0, 2] - my[:, 2, 0]) / s,
+    ], axis=1)
+
+    z_case = case == 3
+    mz = m[z_case]
+    s = np.sqrt(np.maximum(1.0 + mz[:, 2, 2] - mz[:, 0, 0] - mz[:, 1, 1], 1e-12)) * 2.0
+    q[z_case] = np.stack([
+        (mz[:, 0, 2] + mz[:, 2, 0]) / s,
+        (mz[:, 1, 2] + mz[:, 2, 1]) / s,
+        0.25 * s,
+        (mz[:, 1, 0] - mz[:, 0, 1]) / s,
+    ], axis=1)
+
+    # Keep w >= 0 so identical rotations give identical quaternions
+    q[q[:, 3] < 0] *= -1.0
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def local_rest_matrices(parents, world_matrices):
+    """(N, 4, 4) parent-relative matrices from world (or armature-space) matrices"""
+    parents = np.asarray(parents, dtype=np.int64).reshape(-1)
+    world_matrices = np.asarray(world_matrices, dtype=np.float64)
+
+    local = world_matrices.copy()
+    has_parent = parents >= 0
+    local[has_parent] = np.linalg.inv(world_matrices[parents[has_parent]]) @ world_matrices[has_parent]
+    return local
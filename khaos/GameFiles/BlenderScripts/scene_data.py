@@ -0,0 +1,302 @@
+"""
+Direct Scene Layer for Khaos Project
+bpy.data replacements for the context-dependent operators the generators used
+
+USAGE:
+    import scene_data
+
+    scene_data.clear_objects()
+    armature = scene_data.new_armature_object("PlayerArmature")
+    with scene_data.edit_bones(armature) as edit_bones:
+        ...                     # every bone of the rig in one edit session
+    mesh_obj = scene_data.new_mesh_object("PlayerMesh", geometry)
+    scene_data.parent_to_armature(mesh_obj, armature)
+
+HOW IT WORKS:
+1. Objects are created with bpy.data.*.new() and linked to the scene
+   collection, and removed with one bpy.data.batch_remove() - no selection,
+   no active object, no select_all/delete
+2. Geometry is written with foreach_set from flat arrays (fit_kernel.py
+   layout) and transformed with plain matrices, so primitives, transform_apply
+   and join are not needed
+3. The only operators left are the ones with no data-level equivalent:
+   mode_set (edit bones exist only in Edit Mode; edit_bones() enters it once
+   for the whole rig) and ARMATURE_AUTO parenting. Both run under
+   context.temp_override() with the objects they need, so they work in
+   `blender --background` without a window or a selection
+
+DATABLOCK REUSE:
+Re-running a generator used to leave PlayerMaterial.001, .002, ... and the
+orphaned meshes/armatures of the deleted objects behind. Named meshes,
+armatures and materials are now reused in place (geometry and bones are
+cleared, not recreated), and every generator ends its run with
+purge_and_report(), which purges what is still orphaned and prints the
+datablock counts and process memory before/after the run.
+
+Every function here is safe to call with no UI context.
+"""
+
+import contextlib
+import os
+import sys
+
+import bmesh
+import bpy
+import numpy as np
+from mathutils import Matrix
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# bpy.data collections counted in run reports
+DATABLOCK_COLLECTIONS = ("objects", "meshes", "armatures", "materials", "actions", "images", "node_groups")
+
+
+def context_override(obj, selected=None):
+    """Context with obj active (and `selected` selected) for the few operators still used"""
+    bpy.context.view_layer.objects.active = obj
+    if not hasattr(bpy.context, "temp_override"):
+        # Before Blender 3.2: the active object set above is all mode_set needs
+        return contextlib.nullcontext()
+    selected = selected if selected is not None else [obj]
+    return bpy.context.temp_override(active_object=obj, object=obj,
+                                     selected_objects=selected, selected_editable_objects=selected)
+
+
+def link_object(name, data):
+    """New object for a datablock, linked to the scene collection"""
+    obj = bpy.data.objects.new(name, data)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def remove_objects(objects):
+    """Remove objects in one batch (their data stays until purged)"""
+    objects = list(objects)
+    if objects:
+        bpy.data.batch_remove(objects)
+    return len(objects)
+
+
+def clear_objects(types=None):
+    """Remove every object, or only those whose type is in `types`"""
+    return remove_objects(obj for obj in bpy.data.objects if types is None or obj.type in types)
+
+
+def ensure_object_mode():
+    """Leave Edit/Pose Mode so bone and mesh data are synced and writable"""
+    obj = bpy.context.object
+    if obj is not None and obj.mode != 'OBJECT':
+        with context_override(obj):
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+
+def reuse_armature(name):
+    """Orphaned armature datablock of that name (bones cleared by edit_bones), or a new one"""
+    armature = bpy.data.armatures.get(name)
+    if armature is None or armature.users > 0:
+        return bpy.data.armatures.new(name)
+    return armature
+
+
+def reuse_mesh(name):
+    """Orphaned mesh datablock of that name with its geometry and slots cleared, or a new one"""
+    mesh = bpy.data.meshes.get(name)
+    if mesh is None or mesh.users > 0:
+        return bpy.data.meshes.new(name)
+    mesh.clear_geometry()
+    mesh.materials.clear()
+    return mesh
+
+
+def reuse_material(name):
+    """Material of that name (shared by every run), or a new node material"""
+    material = bpy.data.materials.get(name)
+    if material is None:
+        material = bpy.data.materials.new(name=name)
+    material.use_nodes = True
+    return material
+
+
+def new_armature_object(name, location=(0.0, 0.0, 0.0)):
+    """Empty armature object (no default bone), linked and made active"""
+    obj = link_object(name, reuse_armature(name))
+    obj.location = location
+    bpy.context.view_layer.objects.active = obj
+    return obj
+
+
+@contextlib.contextmanager
+def edit_bones(armature_obj, clear=False):
+    """One Edit Mode session on armature_obj; yields its edit_bones (emptied first with clear)"""
+    ensure_object_mode()
+    with context_override(armature_obj):
+        bpy.ops.object.mode_set(mode='EDIT')
+    try:
+        if clear:
+            # Reused armature data still holds the previous run's bones
+            for bone in list(armature_obj.data.edit_bones):
+                armature_obj.data.edit_bones.remove(bone)
+        yield armature_obj.data.edit_bones
+    finally:
+        with context_override(armature_obj):
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+
+def write_mesh_arrays(mesh, geometry):
+    """Fill an empty mesh datablock from flat vertex/loop/polygon arrays"""
+    mesh.vertices.add(len(geometry["vertices"]))
+    mesh.vertices.foreach_set("co", np.asarray(geometry["vertices"], dtype=np.float32).ravel())
+
+    mesh.loops.add(len(geometry["loops"]))
+    mesh.loops.foreach_set("vertex_index", geometry["loops"])
+
+    mesh.polygons.add(len(geometry["loop_starts"]))
+    mesh.polygons.foreach_set("loop_start", geometry["loop_starts"])
+    if bpy.app.version < (4, 0, 0):
+        # loop_total is derived from loop_start since 4.0
+        mesh.polygons.foreach_set("loop_total", geometry["loop_totals"])
+
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+
+def new_mesh_object(name, geometry):
+    """Mesh datablock (reused when orphaned) from flat arrays plus its linked object"""
+    mesh = reuse_mesh(name)
+    write_mesh_arrays(mesh, geometry)
+    return link_object(name, mesh)
+
+
+def read_mesh_arrays(obj):
+    """Flat arrays of a mesh object with its world matrix baked into the vertices"""
+    mesh = obj.data
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.vertices.foreach_get("co", vertices)
+    mesh.loops.foreach_get("vertex_index", loops)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+
+    world = np.array(obj.matrix_world, dtype=np.float64)
+    vertices = vertices.reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+    return {"vertices": vertices, "loops": loops, "loop_starts": loop_starts, "loop_totals": loop_totals}
+
+
+def join_objects(objects, name):
+    """
+    Merge mesh objects into one new object and remove the parts.
+
+    Replaces select_set + bpy.ops.object.join for parts without vertex
+    groups (group indices differ per part, join_objects drops them).
+    """
+    parts = [read_mesh_arrays(obj) for obj in objects]
+    vertex_offsets = np.cumsum([0] + [len(part["vertices"]) for part in parts])
+    loop_offsets = np.cumsum([0] + [len(part["loops"]) for part in parts])
+
+    geometry = {
+        "vertices": np.concatenate([part["vertices"] for part in parts]),
+        "loops": np.concatenate([part["loops"] + vertex_offsets[i] for i, part in enumerate(parts)]),
+        "loop_starts": np.concatenate([part["loop_starts"] + loop_offsets[i] for i, part in enumerate(parts)]),
+        "loop_totals": np.concatenate([part["loop_totals"] for part in parts]),
+    }
+    meshes = [obj.data for obj in objects]
+    remove_objects(objects)
+    bpy.data.batch_remove(meshes)
+    return new_mesh_object(name, geometry)
+
+
+def apply_scale(obj):
+    """transform_apply(scale=True) without the operator: bake obj.scale into its mesh"""
+    obj.data.transform(Matrix.Diagonal(obj.scale).to_4x4())
+    obj.scale = (1.0, 1.0, 1.0)
+
+
+def subdivide(mesh, cuts):
+    """Edit-mode 'Subdivide' on every edge, through bmesh (vertex groups are interpolated)"""
+    if cuts <= 0:
+        return
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=cuts, use_grid_fill=True)
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+
+def parent_to_armature(mesh_obj, armature):
+    """Plain parent + Armature modifier, for meshes that already have their weights"""
+    mesh_obj.parent = armature
+    mesh_obj.matrix_parent_inverse = armature.matrix_world.inverted()
+    modifier = mesh_obj.modifiers.new(name="Armature", type='ARMATURE')
+    modifier.object = armature
+
+
+def parent_with_automatic_weights(mesh_obj, armature):
+    """Blender's ARMATURE_AUTO bone-heat parenting, without touching the selection"""
+    ensure_object_mode()
+    with context_override(armature, selected=[mesh_obj, armature]):
+        bpy.ops.object.parent_set(type='ARMATURE_AUTO')
+
+
+def datablock_counts():
+    """Number of datablocks in each DATABLOCK_COLLECTIONS collection"""
+    return {name: len(getattr(bpy.data, name)) for name in DATABLOCK_COLLECTIONS}
+
+
+def process_memory():
+    """Resident memory of this Blender process in bytes (None when it cannot be read)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def process_peak_memory():
+    """Peak resident memory of this Blender process so far in bytes (None when it cannot be read)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)
+    return None
+
+
+def datablock_stats():
+    """Datablock counts and process memory, taken at the start of a run"""
+    return {"counts": datablock_counts(), "memory": process_memory()}
+
+
+def purge_orphans():
+    """Remove every datablock without users (recursively); returns how many went"""
+    return bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=False, do_recursive=True)
+
+
+def format_memory(memory):
+    """Bytes as MB text"""
+    return "?" if memory is None else f"{memory / (1024 * 1024):.1f} MB"
+
+
+def purge_and_report(before, label="Run"):
+    """End-of-run stage boundary: purge orphans, print and return before/after stats"""
+    purged = purge_orphans()
+    after = datablock_stats()
+    changes = ", ".join(f"{name} {before['counts'][name]} -> {count}"
+                        for name, count in after["counts"].items()
+                        if count or before["counts"][name])
+    print(f"  ✓ {label} datablocks: {changes or 'none'} ({purged} orphans purged)")
+    print(f"  ✓ {label} memory: {format_memory(before['memory'])} -> {format_memory(after['memory'])}")
+    return {"before": before, "after": after, "purged": purged}
@@ -0,0 +1,173 @@
+"""
+Skeleton Reduction for Khaos Project
+Collapses bone chains distant characters don't need (fingers, toes)
+
+USAGE:
+    python skeleton_reduction.py --policy mitten_hands
+    python skeleton_reduction.py --policy crowd --output skeletons/khaos_humanoid_crowd
+    python skeleton_reduction.py --keep Root Spine_01 Head --skeleton skeletons/khaos_humanoid
+
+HOW IT WORKS:
+1. A policy (or an explicit keep-set / max depth) marks the bones to keep;
+   roots are always kept
+2. reduce_skeleton() drops the rest and records, for every original bone,
+   its nearest kept ancestor (itself when kept)
+3. remap_weights() moves every influence of a removed bone onto that
+   ancestor, merges influences that now hit the same bone and renormalizes,
+   so the mesh deforms like the full rig with the collapsed chains held rigid
+
+Every skinned joint costs a matrix per frame in Godot, so crowds of distant
+agents use the reduced rig (headless_character.py / population.py
+--reduce crowd). In Blender, load a spec written with --output in
+skeleton_generator_clean.py; MeshAutoFitter fits it as usual (the hand and
+foot boxes stay, the finger/toe segments go with their bones).
+
+Pure NumPy - no bpy import.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from skeleton_spec import DEFAULT_SKELETON, SkeletonSpec, categorize_bones
+from skin_weights import MAX_INFLUENCES, sort_influences
+
+FINGER_KEYWORDS = ("Thumb", "Index", "Middle", "Ring", "Pinky")
+TOE_KEYWORDS = ("Toe",)
+
+# Policy -> bone name keywords to drop
+POLICIES = {
+    "full": (),
+    "mitten_hands": FINGER_KEYWORDS,
+    "no_toes": TOE_KEYWORDS,
+    "crowd": FINGER_KEYWORDS + TOE_KEYWORDS,
+}
+
+
+def bone_depths(parents):
+    """Hierarchy depth of every bone (roots are 0); parents must precede children"""
+    depths = np.zeros(len(parents), dtype=np.int32)
+    for i, parent in enumerate(parents):
+        if parent >= 0:
+            depths[i] = depths[parent] + 1
+    return depths
+
+
+def keep_mask(spec, policy=None, keep=None, max_depth=None):
+    """
+    Boolean mask of the bones to keep.
+
+    policy drops the bones whose name contains one of POLICIES[policy];
+    keep is an explicit set of names to keep (overrides policy); max_depth
+    additionally drops everything deeper than that in the hierarchy.
+    """
+    if keep is not None:
+        unknown = sorted(set(keep) - set(spec.names))
+        if unknown:
+            raise ValueError(f"Unknown bones in keep-set: {', '.join(unknown)}")
+        mask = np.array([name in keep for name in spec.names])
+    else:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown reduction policy '{policy}' (choose from {', '.join(sorted(POLICIES))})")
+        keywords = POLICIES[policy]
+        mask = np.array([not any(keyword in name for keyword in keywords) for name in spec.names])
+
+    if max_depth is not None:
+        mask &= bone_depths(spec.parents) <= max_depth
+    return mask | (spec.parents < 0)
+
+
+def reduce_skeleton(spec, mask):
+    """
+    Drop the bones outside mask.
+
+    spec must be sorted (parents first). Returns (reduced spec, remap) where
+    remap[i] is the reduced index of bone i's nearest kept ancestor (or of
+    bone i itself when kept).
+    """
+    mask = np.asarray(mask, dtype=bool) | (spec.parents < 0)
+    new_index = np.cumsum(mask) - 1
+
+    remap = np.empty(len(spec), dtype=np.int32)
+    for i, parent in enumerate(spec.parents):
+        remap[i] = new_index[i] if mask[i] else remap[parent]
+
+    kept = np.flatnonzero(mask)
+    parents = np.array([remap[spec.parents[i]] if spec.parents[i] >= 0 else -1 for i in kept], dtype=np.int32)
+    reduced = SkeletonSpec(
+        names=[spec.names[i] for i in kept],
+        parents=parents,
+        heads=spec.heads[kept],
+        tails=spec.tails[kept],
+        rolls=spec.rolls[kept],
+        categories=[spec.categories[i] for i in kept] if spec.categories else None,
+    )
+    return reduced, remap
+
+
+def remap_weights(joints, weights, remap, max_influences=MAX_INFLUENCES):
+    """
+    Move influences onto the reduced skeleton.
+
+    joints/weights are (V, K) influences on the original bones. Influences
+    that land on the same reduced bone are summed; the result is sorted,
+    trimmed to max_influences and renormalized like skin_weights.py output.
+    """
+    joints = np.asarray(remap)[np.asarray(joints, dtype=np.int64)]
+    weights = np.asarray(weights, dtype=np.float64).copy()
+
+    # Fold every duplicate into its first occurrence (K is tiny, pairwise is cheapest)
+    count = joints.shape[1]
+    for a in range(count):
+        for b in range(a + 1, count):
+            same = (joints[:, b] == joints[:, a]) & (weights[:, b] > 0)
+            weights[same, a] += weights[same, b]
+            weights[same, b] = 0.0
+
+    return sort_influences(joints, weights, max_influences)
+
+
+def reduce_for_policy(spec, policy=None, keep=None, max_depth=None):
+    """Sorted spec -> (reduced spec, remap) in one call"""
+    spec = spec.sorted()
+    return reduce_skeleton(spec, keep_mask(spec, policy, keep, max_depth))
+
+
+def parse_args(argv=None):
+    """Command line for reduced specs"""
+    parser = argparse.ArgumentParser(description="Write a reduced skeleton spec (collapsed fingers/toes)")
+    parser.add_argument("--skeleton", default=DEFAULT_SKELETON, help="skeleton spec path (without extension)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="crowd", help="which chains to collapse")
+    parser.add_argument("--keep", nargs="+", default=None, help="explicit bone names to keep (overrides --policy)")
+    parser.add_argument("--max-depth", type=int, default=None, help="also drop bones deeper than this")
+    parser.add_argument("--output", default=None, help="write the reduced spec here (without extension)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Reduce one spec and report what was collapsed"""
+    args = parse_args(argv)
+    spec = SkeletonSpec.load(args.skeleton).sorted()
+    reduced, remap = reduce_skeleton(spec, keep_mask(spec, args.policy, args.keep, args.max_depth))
+
+    print("=" * 80)
+    print(f"KHAOS SKELETON REDUCTION - {args.policy if args.keep is None else 'keep-set'}")
+    print("=" * 80)
+    print(f"✓ {len(spec)} -> {len(reduced)} bones ({len(spec) - len(reduced)} collapsed)")
+    targets = {}
+    for i, name in enumerate(spec.names):
+        if name not in reduced.names:
+            targets.setdefault(reduced.names[remap[i]], []).append(name)
+    for target, removed in targets.items():
+        print(f"  {target} <- {len(removed)} bones ({', '.join(removed[:3])}{', ...' if len(removed) > 3 else ''})")
+
+    if args.output:
+        reduced.categories = categorize_bones(reduced.names)
+        print(f"✓ Saved {reduced.save(args.output)}.json/.npz")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
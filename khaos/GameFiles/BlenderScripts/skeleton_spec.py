@@ -0,0 +1,451 @@
+"""
+Compact Skeleton Spec for Khaos Project
+Array-backed bone data shared by every pipeline script
+
+A skeleton spec is:
+- a name table
+- a parent index array (-1 = root)
+- float32 head / tail arrays (N, 3) and a roll array (N,)
+
+On disk it is stored as two files next to each other:
+- <name>.json : format header, bone names, parent indices (and categories)
+- <name>.npz  : the float32 head/tail/roll arrays (and parents again, int32)
+
+A symmetric spec (save(path, symmetric=True)) stores only the center and
+left (".L") bones; load() derives every ".R" bone from its left twin with
+one vectorized mirror across the X = 0 plane, so the two sides cannot
+drift apart. symmetry_report() / joint_gaps() measure how far an
+asymmetric spec is from that.
+
+Pure NumPy - no bpy import, so specs can be loaded, validated and
+transformed outside Blender.
+"""
+
+import heapq
+import json
+import os
+
+import numpy as np
+
+from rig_math import main_children
+
+SPEC_FORMAT = "khaos-skeleton"
+# 2: "symmetric" files store the center + left bones only
+SPEC_VERSION = 2
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SKELETON_LIBRARY = os.path.join(SCRIPT_DIR, "skeletons")
+DEFAULT_SKELETON = os.path.join(SKELETON_LIBRARY, "khaos_humanoid")
+
+# Side suffixes; the left side is the one a symmetric spec stores
+LEFT_SUFFIX = ".L"
+RIGHT_SUFFIX = ".R"
+# Armature space is +X to the character's right: mirroring negates X
+MIRROR_X = np.array([-1.0, 1.0, 1.0], dtype=np.float32)
+# Pairs / joints further apart than this (meters) are reported
+SYMMETRY_TOLERANCE = 1e-4
+
+
+def bone_side(name):
+    """'L', 'R' or None (center bone) from the name suffix"""
+    if name.endswith(LEFT_SUFFIX):
+        return 'L'
+    if name.endswith(RIGHT_SUFFIX):
+        return 'R'
+    return None
+
+
+def mirror_name(name):
+    """Name of the twin bone on the other side ("Hand.L" <-> "Hand.R"); center names are unchanged"""
+    side = bone_side(name)
+    if side == 'L':
+        return name[:-len(LEFT_SUFFIX)] + RIGHT_SUFFIX
+    if side == 'R':
+        return name[:-len(RIGHT_SUFFIX)] + LEFT_SUFFIX
+    return name
+
+
+def mirror_indices(names):
+    """Per bone, the index of its twin (itself for center bones and bones without one)"""
+    index = {name: i for i, name in enumerate(names)}
+    return np.array([index.get(mirror_name(name), i) for i, name in enumerate(names)], dtype=np.int64)
+
+
+class SkeletonSpec:
+    """Bone name table + parent indices + float32 head/tail/roll arrays"""
+
+    def __init__(self, names, parents, heads, tails, rolls=None, categories=None):
+        self.names = list(names)
+        self.parents = np.asarray(parents, dtype=np.int32).reshape(-1)
+        self.heads = np.asarray(heads, dtype=np.float32).reshape(-1, 3)
+        self.tails = np.asarray(tails, dtype=np.float32).reshape(-1, 3)
+        if rolls is None:
+            rolls = np.zeros(len(self.names), dtype=np.float32)
+        self.rolls = np.asarray(rolls, dtype=np.float32).reshape(-1)
+        # Optional BONE_GROUPS label per bone (filled by the analysis/export tools)
+        self.categories = list(categories) if categories is not None else None
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_bones(cls, bones):
+        """
+        Build a spec from (name, parent_name, head, tail[, roll]) tuples.
+
+        Parents are resolved by name, so the tuples may come in any order.
+        """
+        bones = list(bones)
+        index = {bone[0]: i for i, bone in enumerate(bones)}
+
+        parents = []
+        for bone in bones:
+            parent_name = bone[1]
+            if parent_name is None:
+                parents.append(-1)
+            elif parent_name in index:
+                parents.append(index[parent_name])
+            else:
+                raise ValueError(f"Bone '{bone[0]}' has unknown parent '{parent_name}'")
+
+        return cls(
+            names=[bone[0] for bone in bones],
+            parents=parents,
+            heads=[bone[2] for bone in bones],
+            tails=[bone[3] for bone in bones],
+            rolls=[bone[4] if len(bone) > 4 else 0.0 for bone in bones],
+        )
+
+    def index(self, name):
+        """Index of a bone by name"""
+        return self.names.index(name)
+
+    def parent_name(self, i):
+        """Parent bone name of bone i, or None for roots"""
+        parent = self.parents[i]
+        return self.names[parent] if parent >= 0 else None
+
+    def validate(self):
+        """Raise ValueError if the spec is not a well-formed bone forest"""
+        count = len(self.names)
+
+        if len(set(self.names)) != count:
+            duplicates = sorted({n for n in self.names if self.names.count(n) > 1})
+            raise ValueError(f"Duplicate bone names: {', '.join(duplicates)}")
+
+        for label, array, shape in (
+            ("parents", self.parents, (count,)),
+            ("heads", self.heads, (count, 3)),
+            ("tails", self.tails, (count, 3)),
+            ("rolls", self.rolls, (count,)),
+        ):
+            if array.shape != shape:
+                raise ValueError(f"{label} has shape {array.shape}, expected {shape}")
+
+        bad_parent = (self.parents < -1) | (self.parents >= count)
+        if bad_parent.any():
+            i = int(np.flatnonzero(bad_parent)[0])
+            raise ValueError(f"Bone '{self.names[i]}' has out-of-range parent index {self.parents[i]}")
+
+        for label, array in (("heads", self.heads), ("tails", self.tails), ("rolls", self.rolls)):
+            if not np.isfinite(array).all():
+                raise ValueError(f"{label} contains non-finite values")
+
+        # Blender silently deletes zero-length bones when leaving edit mode
+        lengths = np.linalg.norm(self.tails - self.heads, axis=1)
+        if (lengths < 1e-6).any():
+            i = int(np.flatnonzero(lengths < 1e-6)[0])
+            raise ValueError(f"Bone '{self.names[i]}' has zero length")
+
+        if self.categories is not None and len(self.categories) != count:
+            raise ValueError(f"categories has {len(self.categories)} entries, expected {count}")
+
+        # Raises on cycles
+        self.topological_order()
+
+    def topological_order(self):
+        """Bone indices ordered so every parent comes before its children
+
+        Stable: among bones whose parents are already placed, the one with the
+        lowest original index goes first, so an already-sorted spec is unchanged.
+        """
+        count = len(self.names)
+        children = [[] for _ in range(count)]
+        ready = []
+        for i, parent in enumerate(self.parents):
+            if parent < 0:
+                ready.append(i)
+            else:
+                children[parent].append(i)
+
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            i = heapq.heappop(ready)
+            order.append(i)
+            for child in children[i]:
+                heapq.heappush(ready, child)
+
+        if len(order) != count:
+            cyclic = sorted(set(range(count)) - set(order))
+            names = ", ".join(self.names[i] for i in cyclic[:5])
+            raise ValueError(f"Parent cycle detected involving: {names}")
+
+        return np.array(order, dtype=np.int32)
+
+    def sorted(self):
+        """Return a copy reordered so parents always precede children"""
+        return self.reordered(self.topological_order())
+
+    def reordered(self, order):
+        """Copy with the bones in the given index order (a subset must keep every parent it uses)"""
+        order = np.asarray(order, dtype=np.int32)
+        remap = np.full(len(self.names), -1, dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+
+        old_parents = self.parents[order]
+        parents = np.where(old_parents >= 0, remap[np.maximum(old_parents, 0)], -1)
+
+        return SkeletonSpec(
+            names=[self.names[i] for i in order],
+            parents=parents,
+            heads=self.heads[order],
+            tails=self.tails[order],
+            rolls=self.rolls[order],
+            categories=[self.categories[i] for i in order] if self.categories else None,
+        )
+
+    def half(self):
+        """Copy without the ".R" bones that have a ".L" twin (what a symmetric spec stores)"""
+        index = {name: i for i, name in enumerate(self.names)}
+        keep = [i for i, name in enumerate(self.names)
+                if bone_side(name) != 'R' or mirror_name(name) not in index]
+        kept = set(keep)
+        for i in keep:
+            if self.parents[i] >= 0 and self.parents[i] not in kept:
+                raise ValueError(f"Bone '{self.names[i]}' is parented to right-side bone "
+                                 f"'{self.names[self.parents[i]]}'")
+        return self.reordered(keep)
+
+    def mirrored(self):
+        """
+        Copy with a ".R" twin added for every ".L" bone that has none.
+
+        One vectorized transform for the whole side: X negated on heads and
+        tails, rolls negated (Blender's Symmetrize), parents swapped to their
+        twins. Existing bones are kept as they are.
+        """
+        index = {name: i for i, name in enumerate(self.names)}
+        left = np.array([i for i, name in enumerate(self.names)
+                         if bone_side(name) == 'L' and mirror_name(name) not in index], dtype=np.int64)
+        count = len(self.names)
+
+        # Twin of every existing bone in the extended table (new bones follow the old ones)
+        twin = mirror_indices(self.names)
+        twin[left] = count + np.arange(len(left))
+        parents = self.parents[left]
+        right_parents = np.where(parents >= 0, twin[np.maximum(parents, 0)], -1)
+
+        names = [mirror_name(self.names[i]) for i in left]
+        categories = None
+        if self.categories is not None:
+            categories = self.categories + categorize_bones(names)
+        return SkeletonSpec(
+            names=self.names + names,
+            parents=np.concatenate([self.parents, right_parents]),
+            heads=np.concatenate([self.heads, self.heads[left] * MIRROR_X]),
+            tails=np.concatenate([self.tails, self.tails[left] * MIRROR_X]),
+            rolls=np.concatenate([self.rolls, -self.rolls[left]]),
+            categories=categories,
+        )
+
+    def symmetrized(self):
+        """Copy whose ".R" bones are rebuilt from their ".L" twins, bones in the original order"""
+        full = self.half().mirrored()
+        index = {name: i for i, name in enumerate(full.names)}
+        return full.reordered([index[name] for name in self.names])
+
+    def save(self, path, symmetric=False):
+        """
+        Write <path>.json (names/parents) and <path>.npz (float32 arrays).
+
+        symmetric=True stores only the center and left bones; load() mirrors
+        the right side back.
+        """
+        base = os.path.splitext(path)[0]
+        folder = os.path.dirname(base)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        spec = self.half() if symmetric else self
+        header = {
+            "format": SPEC_FORMAT,
+            "version": SPEC_VERSION,
+            "bone_count": len(spec.names),
+            "symmetric": bool(symmetric),
+            "arrays": os.path.basename(base) + ".npz",
+            "names": spec.names,
+            "parents": spec.parents.tolist(),
+        }
+        if spec.categories is not None:
+            header["categories"] = spec.categories
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2)
+            f.write("\n")
+
+        np.savez(
+            base + ".npz",
+            parents=spec.parents,
+            heads=spec.heads,
+            tails=spec.tails,
+            rolls=spec.rolls,
+        )
+        return base
+
+    @classmethod
+    def load(cls, path, validate=True):
+        """Load a spec saved by save() (symmetric files come back whole); path may omit the extension"""
+        base = os.path.splitext(path)[0]
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            header = json.load(f)
+
+        if header.get("format") != SPEC_FORMAT:
+            raise ValueError(f"{base}.json is not a {SPEC_FORMAT} file")
+        if header.get("version", 0) > SPEC_VERSION:
+            raise ValueError(f"{base}.json uses spec version {header['version']}, "
+                             f"this loader supports up to {SPEC_VERSION}")
+
+        arrays_path = os.path.join(os.path.dirname(base), header.get("arrays", os.path.basename(base) + ".npz"))
+        with np.load(arrays_path, allow_pickle=False) as arrays:
+            spec = cls(
+                names=header["names"],
+                parents=arrays["parents"],
+                heads=arrays["heads"],
+                tails=arrays["tails"],
+                rolls=arrays["rolls"],
+                categories=header.get("categories"),
+            )
+
+        if list(spec.parents) != list(header["parents"]):
+            raise ValueError(f"{base}.json and {arrays_path} disagree on parent indices")
+
+        if header.get("symmetric"):
+            spec = spec.mirrored()
+        if validate:
+            spec.validate()
+        return spec
+
+
+# ----------------------------------------------------------------------
+# Bone categories (same grouping analyze_skeleton.py prints)
+# ----------------------------------------------------------------------
+
+BONE_GROUPS = [
+    'Spine', 'Head', 'Arms_L', 'Arms_R', 'Fingers_L', 'Fingers_R', 'Legs_L', 'Legs_R', 'Other'
+]
+
+# (group, keywords, side) checked in order - first match wins
+CATEGORY_RULES = [
+    ('Spine', ('Root', 'Spine', 'Neck'), None),
+    ('Head', ('Head',), None),
+    ('Arms_L', ('Shoulder', 'Arm', 'Hand'), '.L'),
+    ('Arms_R', ('Shoulder', 'Arm', 'Hand'), '.R'),
+    ('Fingers_L', ('Thumb', 'Index', 'Middle', 'Ring', 'Pinky'), '.L'),
+    ('Fingers_R', ('Thumb', 'Index', 'Middle', 'Ring', 'Pinky'), '.R'),
+    ('Legs_L', ('Leg', 'Foot', 'Toe'), '.L'),
+    ('Legs_R', ('Leg', 'Foot', 'Toe'), '.R'),
+]
+
+
+def categorize_bone(name):
+    """BONE_GROUPS label for a bone name"""
+    for group, keywords, side in CATEGORY_RULES:
+        if side is not None and side not in name:
+            continue
+        if any(keyword in name for keyword in keywords):
+            return group
+    return 'Other'
+
+
+def categorize_bones(names):
+    """BONE_GROUPS label for every name (one pass over the table)"""
+    return [categorize_bone(name) for name in names]
+
+
+def format_report(spec, title="KHAOS SKELETON ANALYSIS"):
+    """Human-readable bone report grouped by category, as a list of lines"""
+    categories = spec.categories or categorize_bones(spec.names)
+    heads = spec.heads.tolist()
+    tails = spec.tails.tolist()
+
+    lines = ["=" * 80, title, "=" * 80, f"Total bones: {len(spec)}",
+             "", "-" * 80, "BONE POSITIONS (World Space)", "-" * 80]
+
+    for group in BONE_GROUPS:
+        members = [i for i, category in enumerate(categories) if category == group]
+        if not members:
+            continue
+
+        lines.append(f"\n### {group} ###")
+        for i in members:
+            head, tail = heads[i], tails[i]
+            lines.append(f"\n  {spec.names[i]}:")
+            lines.append(f"    Head: ({head[0]:.4f}, {head[1]:.4f}, {head[2]:.4f})")
+            lines.append(f"    Tail: ({tail[0]:.4f}, {tail[1]:.4f}, {tail[2]:.4f})")
+            parent = spec.parent_name(i)
+            if parent:
+                lines.append(f"    Parent: {parent}")
+
+    return lines + format_symmetry_report(spec)
+
+
+# ----------------------------------------------------------------------
+# Symmetry and chain checks
+# ----------------------------------------------------------------------
+
+def symmetry_report(spec):
+    """
+    Per ".L"/".R" pair, how far the right bone is from the mirrored left one.
+
+    Returns a list of {"left", "right", "head", "tail", "roll"}: head / tail
+    distances in meters and the roll mismatch in radians.
+    """
+    twin = mirror_indices(spec.names)
+    left = np.array([i for i, name in enumerate(spec.names) if bone_side(name) == 'L' and twin[i] != i],
+                    dtype=np.int64)
+    if not len(left):
+        return []
+    right = twin[left]
+    heads = np.linalg.norm(spec.heads[left] * MIRROR_X - spec.heads[right], axis=1)
+    tails = np.linalg.norm(spec.tails[left] * MIRROR_X - spec.tails[right], axis=1)
+    rolls = np.abs(spec.rolls[left] + spec.rolls[right])
+    return [{"left": spec.names[l], "right": spec.names[r], "head": float(h), "tail": float(t), "roll": float(o)}
+            for l, r, h, t, o in zip(left, right, heads, tails, rolls)]
+
+
+def joint_gaps(spec, tolerance=SYMMETRY_TOLERANCE):
+    """(parent, child, gap meters) where a chain's next bone does not start at its parent's tail"""
+    children = main_children(spec.parents, spec.heads, spec.tails)
+    parents = np.flatnonzero(children >= 0)
+    gaps = np.linalg.norm(spec.heads[children[parents]] - spec.tails[parents], axis=1)
+    return [(spec.names[p], spec.names[children[p]], float(gap))
+            for p, gap in zip(parents, gaps) if gap > tolerance]
+
+
+def format_symmetry_report(spec, tolerance=SYMMETRY_TOLERANCE):
+    """Asymmetric pairs and broken chains of a spec, as a list of lines"""
+    lines = ["", "-" * 80, "SYMMETRY (right side vs mirrored left side)", "-" * 80]
+    pairs = symmetry_report(spec)
+    skewed = [pair for pair in pairs if max(pair["head"], pair["tail"]) > tolerance or pair["roll"] > tolerance]
+    for pair in skewed:
+        lines.append(f"  ✗ {pair['left']} / {pair['right']}: head {pair['head'] * 1000.0:.2f} mm, "
+                     f"tail {pair['tail'] * 1000.0:.2f} mm, roll {np.degrees(pair['roll']):.2f}°")
+    lines.append(f"  {'✗' if skewed else '✓'} {len(pairs) - len(skewed)}/{len(pairs)} pairs mirror within "
+                 f"{tolerance * 1000.0:.2f} mm")
+
+    lines += ["", "-" * 80, "JOINT GAPS (child head vs parent tail)", "-" * 80]
+    gaps = joint_gaps(spec, tolerance)
+    for parent, child, gap in gaps:
+        lines.append(f"  ✗ {parent} -> {child}: {gap * 1000.0:.2f} mm")
+    lines.append(f"  {'✗' if gaps else '✓'} {len(gaps)} disconnected joints")
+    return lines
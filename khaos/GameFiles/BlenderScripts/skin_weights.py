@@ -0,0 +1,188 @@
+"""
+Analytic Skin Weights for Khaos Project
+Weights every fitted vertex to the bone that produced it - no bone-heat solve
+
+The fitter already knows which bone owns each segment, so weighting is:
+1. Rigid: every vertex of a segment gets weight 1.0 on its source bone
+   (segments spanning several bones, like the torso, pick the nearest bone
+   of the span per vertex)
+2. Optional joint blending: vertices within `blend` of either end of their
+   bone fade smoothly into the parent bone (at the head) or the main child
+   bone (at the tail), reaching 50/50 exactly at the joint. Only joints
+   with skin on both sides blend (the arm does not fade into the bare
+   shoulder bone). DEFAULT_BLEND is wide enough for the stress poses of
+   skinning_check.py: narrower bands crease-collapse 140 degree knees and
+   elbows under linear blend skinning
+
+Everything is vectorized over vertices. quantized_groups() packs the
+result into (bone, weight) -> vertex index lists, so Blender vertex
+groups can be written with one VertexGroup.add() call per group instead
+of one per vertex.
+
+Pure NumPy - no bpy import.
+"""
+
+import numpy as np
+
+from rig_math import main_children
+
+MAX_INFLUENCES = 4
+# Fraction of a bone's length blended into its parent/child at each joint
+DEFAULT_BLEND = 0.75
+
+
+def point_segment_parameters(points, heads, tails):
+    """Unclamped projection parameter t of each point on its head->tail segment (0=head, 1=tail)"""
+    axis = tails - heads
+    length_sq = np.maximum(np.einsum("ij,ij->i", axis, axis), 1e-12)
+    return np.einsum("ij,ij->i", points - heads, axis) / length_sq
+
+
+def point_segment_distances(points, heads, tails):
+    """Distance from each point to its head->tail segment"""
+    t = np.clip(point_segment_parameters(points, heads, tails), 0.0, 1.0)
+    closest = heads + (tails - heads) * t[:, None]
+    return np.linalg.norm(points - closest, axis=1)
+
+
+def span_chain(parents, bone, end_bone):
+    """Bones from end_bone up to bone (inclusive), following parents"""
+    chain = [end_bone]
+    while chain[-1] != bone:
+        parent = parents[chain[-1]]
+        if parent < 0:
+            return [bone]  # end_bone is not below bone - treat as a single-bone span
+        chain.append(parent)
+    return chain[::-1]
+
+
+def vertex_owners(vertices, vertex_offsets, plan, parents, heads, tails):
+    """Source bone per vertex; multi-bone spans pick the nearest bone of the span"""
+    vertex_offsets = np.asarray(vertex_offsets)
+    owners = np.repeat(plan.bones, np.diff(vertex_offsets)).astype(np.int64)
+
+    for s in np.flatnonzero(plan.bones != plan.end_bones):
+        chain = np.array(span_chain(parents, plan.bones[s], plan.end_bones[s]))
+        if len(chain) < 2:
+            continue
+        start, stop = vertex_offsets[s], vertex_offsets[s + 1]
+        points = vertices[start:stop]
+
+        # (V, C) distances to every bone of the chain, in one broadcast
+        v = len(points)
+        distances = point_segment_distances(
+            np.repeat(points, len(chain), axis=0),
+            np.tile(heads[chain], (v, 1)),
+            np.tile(tails[chain], (v, 1)),
+        ).reshape(v, len(chain))
+        owners[start:stop] = chain[np.argmin(distances, axis=1)]
+
+    return owners
+
+
+def skinned_bones(plan, parents):
+    """Mask of the bones some segment of the plan spans (the bones that carry skin)"""
+    skinned = np.zeros(len(parents), dtype=bool)
+    for bone, end_bone in set(zip(plan.bones.tolist(), plan.end_bones.tolist())):
+        skinned[span_chain(parents, bone, end_bone)] = True
+    return skinned
+
+
+def smoothstep(x):
+    """Hermite 0..1 ramp, clamped"""
+    x = np.clip(x, 0.0, 1.0)
+    return x * x * (3.0 - 2.0 * x)
+
+
+def segment_weights(vertices, vertex_offsets, plan, parents, heads, tails, blend=DEFAULT_BLEND):
+    """
+    Analytic weights for fitted segment geometry.
+
+    vertices/heads/tails must be in the same space. blend is the fraction
+    of a bone's length over which it fades into its parent/child at each
+    joint (0 = rigid weights).
+
+    Returns (joints, weights): (V, 4) uint16 bone indices and (V, 4) float32
+    weights that sum to 1, largest influence first.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    heads = np.asarray(heads, dtype=np.float64)
+    tails = np.asarray(tails, dtype=np.float64)
+    parents = np.asarray(parents, dtype=np.int64)
+
+    owners = vertex_owners(vertices, vertex_offsets, plan, parents, heads, tails)
+    count = len(vertices)
+
+    joints = np.zeros((count, MAX_INFLUENCES), dtype=np.int64)
+    weights = np.zeros((count, MAX_INFLUENCES), dtype=np.float64)
+    joints[:, 0] = owners
+    weights[:, 0] = 1.0
+
+    if blend > 0.0 and count:
+        t = point_segment_parameters(vertices, heads[owners], tails[owners])
+        # Only joints with skin on both sides blend - a bone without segments has no crease to smooth
+        skinned = skinned_bones(plan, parents)
+        parent = np.where(skinned[np.maximum(parents, 0)] & (parents >= 0), parents, -1)[owners]
+        child = main_children(parents, heads, tails)
+        child = np.where(skinned[np.maximum(child, 0)] & (child >= 0), child, -1)[owners]
+
+        # 0.5 at the joint, fading to 0 at `blend` of the bone length inside it
+        to_parent = np.where(parent >= 0, 0.5 * smoothstep(1.0 - t / blend), 0.0)
+        to_child = np.where(child >= 0, 0.5 * smoothstep(1.0 - (1.0 - t) / blend), 0.0)
+
+        joints[:, 1] = np.maximum(parent, 0)
+        weights[:, 1] = to_parent
+        joints[:, 2] = np.maximum(child, 0)
+        weights[:, 2] = to_child
+        weights[:, 0] = 1.0 - to_parent - to_child
+
+    return sort_influences(joints, weights)
+
+
+def sort_influences(joints, weights, max_influences=MAX_INFLUENCES):
+    """Order influences by weight, keep the largest max_influences and renormalize"""
+    order = np.argsort(-weights, axis=1, kind="stable")[:, :max_influences]
+    joints = np.take_along_axis(joints, order, axis=1)
+    weights = np.take_along_axis(weights, order, axis=1)
+
+    total = weights.sum(axis=1, keepdims=True)
+    weights = np.where(total > 0, weights / np.maximum(total, 1e-12), 0.0)
+    joints = np.where(weights > 0, joints, 0)
+
+    if weights.shape[1] < MAX_INFLUENCES:
+        pad = MAX_INFLUENCES - weights.shape[1]
+        joints = np.pad(joints, ((0, 0), (0, pad)))
+        weights = np.pad(weights, ((0, 0), (0, pad)))
+
+    return joints.astype(np.uint16), weights.astype(np.float32)
+
+
+def quantized_groups(joints, weights, levels=256):
+    """
+    Group (bone, weight) pairs for bulk vertex-group assignment.
+
+    Weights are rounded to 1/(levels - 1) steps so many vertices share one
+    value. Returns a list of (bone_index, weight, vertex_indices).
+    """
+    joints = np.asarray(joints, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    vertex = np.repeat(np.arange(len(joints)), joints.shape[1])
+    bone = joints.ravel()
+    level = np.rint(weights.ravel() * (levels - 1)).astype(np.int64)
+
+    keep = level > 0
+    vertex, bone, level = vertex[keep], bone[keep], level[keep]
+    if not len(vertex):
+        return []
+
+    key = bone * levels + level
+    order = np.argsort(key, kind="stable")
+    key, vertex = key[order], vertex[order]
+    starts = np.flatnonzero(np.append(True, key[1:] != key[:-1]))
+    ends = np.append(starts[1:], len(key))
+
+    return [
+        (int(key[s] // levels), float(key[s] % levels) / (levels - 1), vertex[s:e])
+        for s, e in zip(starts, ends)
+    ]
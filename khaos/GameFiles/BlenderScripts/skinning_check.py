@@ -0,0 +1,343 @@
+"""
+Skinning Cost and Deformation Check for Khaos Project
+CPU linear blend skinning of a generated character under stress poses
+
+USAGE:
+    python skinning_check.py                              # headless build of the default skeleton
+    python skinning_check.py --glb Untitled.glb                # Blender glTF export of PlayerMesh
+    python skinning_check.py --reduce crowd --max-influences 12000 --max-bad 0
+    python skinning_check.py --max-bad -1                 # report only, no deformation limit
+
+Reports, for the skinned PlayerMesh:
+- cost: vertices, vertices x influences (non-zero weights), bytes of
+  skinning data (JOINTS_0 + WEIGHTS_0 + inverse bind matrices + per-frame
+  bone palette) and the CPU time to skin each stress pose
+- deformation: per stress pose, triangles that collapse (area below
+  --collapse of their rest area) or invert (normal turned against the
+  rigid motion of their bone), with the bones they sit on
+
+The exit code is 1 when a limit (--max-influences, --max-bytes, --max-bad)
+is exceeded, so a build can reject the rig before it reaches Godot. Every
+limit has a default (DEFAULT_MAX_*); a negative value switches it off.
+
+HOW IT WORKS:
+1. The mesh comes from headless_character.build_character() or from the
+   first skinned mesh of a .glb (Blender's glTF export or the headless one)
+2. Stress poses push the joints the game bends hardest (deep knee and hip
+   flex, arms overhead, elbows, wrists, spine bend/twist, neck) in --steps
+   increments from rest; pose_kernel.py evaluates all of them in one batch
+3. Skinning matrices (posed joint @ inverse bind) are blended per vertex
+   and applied to all poses at once, the same LBS Godot's skinning does
+4. Triangle normals before/after give the area ratio and orientation of
+   every triangle in every pose
+
+Pure NumPy - no bpy import.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Sibling modules (pose_kernel, ...) live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+from animation_bake import clip_pose, mirrored, rotate, rig_from_character
+from glb_reader import GlbFile, skin_joint_parents
+from pose_kernel import PoseRig
+from rig_math import Y_UP_TO_Z_UP, Z_UP_TO_Y_UP
+from skeleton_reduction import POLICIES
+from skeleton_spec import DEFAULT_SKELETON, SkeletonSpec
+
+DEFAULT_STEPS = 4
+# A triangle whose area drops below this fraction of its rest area has collapsed
+DEFAULT_COLLAPSE = 0.1
+# Bytes per bone in the per-frame palette (3x4 float matrix, as Godot uploads it)
+PALETTE_BYTES = 48
+
+# Default limits: a player-character skinning budget, and no broken triangle in any stress pose
+DEFAULT_MAX_INFLUENCES = 200000
+DEFAULT_MAX_BYTES = 4 * 1024 ** 2
+DEFAULT_MAX_BAD = 0
+
+
+def ramp(angle):
+    """Curve from rest (u=0) to `angle` degrees (u=1)"""
+    return lambda u: angle * u
+
+
+def stress_poses():
+    """Named stress poses: rotation tracks at full extent (animation_bake.py axes; +Y abducts the left side)"""
+    spine = ["Spine_01", "Spine_02", "Spine_03"]
+    return {
+        "knees_deep": [*mirrored("UpperLeg", "x", ramp(90.0)), *mirrored("LowerLeg", "x", ramp(-140.0))],
+        "hips_split": mirrored("UpperLeg", "y", ramp(60.0)),
+        "arms_overhead": mirrored("UpperArm", "y", ramp(170.0)),
+        "arms_forward": [*mirrored("UpperArm", "x", ramp(90.0)), *mirrored("ForeArm", "x", ramp(140.0))],
+        "wrists": mirrored("Hand", "x", ramp(80.0)),
+        "spine_bend": [rotate(bone, "x", ramp(-35.0)) for bone in spine],
+        "spine_twist": [rotate(bone, "z", ramp(30.0)) for bone in spine],
+        "neck": [rotate("Neck", "z", ramp(45.0)), rotate("Head", "x", ramp(-40.0))],
+    }
+
+
+# ----------------------------------------------------------------------
+# Inputs
+# ----------------------------------------------------------------------
+
+def character_mesh_data(character):
+    """Skinning inputs from headless_character.build_character() arrays"""
+    return {
+        "positions": np.asarray(character["positions"], dtype=np.float64),
+        "indices": np.asarray(character["indices"], dtype=np.int64).reshape(-1, 3),
+        "joints": np.asarray(character["joints"], dtype=np.int64),
+        "weights": np.asarray(character["weights"], dtype=np.float64),
+        "inverse_bind_matrices": np.asarray(character["inverse_bind_matrices"], dtype=np.float64),
+        "joint_dtype": np.uint8 if len(character["names"]) < 256 else np.uint16,
+        "rig": rig_from_character(character),
+    }
+
+
+def glb_mesh_data(path):
+    """Skinning inputs from the first skinned mesh node of a .glb (all primitives merged)"""
+    glb = GlbFile.read(path)
+    nodes = glb.gltf["nodes"]
+    node = next((node for node in nodes if "mesh" in node and "skin" in node), None)
+    if node is None:
+        raise ValueError(f"{path}: no skinned mesh")
+    skin = glb.gltf["skins"][node["skin"]]
+    joint_nodes = np.asarray(skin["joints"], dtype=np.int64)
+
+    positions, indices, joints, weights = [], [], [], []
+    offset = 0
+    for primitive in glb.gltf["meshes"][node["mesh"]]["primitives"]:
+        attributes = primitive["attributes"]
+        points = glb.accessor(attributes["POSITION"]).astype(np.float64)
+        if "indices" in primitive:
+            triangles = glb.accessor(primitive["indices"]).reshape(-1, 3).astype(np.int64)
+        else:
+            triangles = np.arange(len(points)).reshape(-1, 3)
+        positions.append(points)
+        indices.append(triangles + offset)
+        joints.append(glb.accessor(attributes["JOINTS_0"]).astype(np.int64))
+        weights.append(glb.accessor(attributes["WEIGHTS_0"]).astype(np.float64))
+        offset += len(points)
+    joint_dtype = glb.accessor(attributes["JOINTS_0"]).dtype
+
+    world = glb.node_world_matrices()
+    names = [nodes[j].get("name", f"joint_{i}") for i, j in enumerate(joint_nodes)]
+    if "inverseBindMatrices" in skin:
+        inverse_bind = glb.accessor(skin["inverseBindMatrices"]).astype(np.float64).reshape(-1, 4, 4)
+        inverse_bind = inverse_bind.transpose(0, 2, 1)  # column-major
+    else:
+        inverse_bind = np.broadcast_to(np.eye(4), (len(joint_nodes), 4, 4))
+
+    weights = np.concatenate(weights)
+    return {
+        "positions": np.concatenate(positions),
+        "indices": np.concatenate(indices),
+        "joints": np.concatenate(joints),
+        "weights": weights / np.maximum(weights.sum(axis=1, keepdims=True), 1e-12),
+        "inverse_bind_matrices": inverse_bind,
+        "joint_dtype": joint_dtype,
+        "rig": PoseRig(skin_joint_parents(glb, joint_nodes), Y_UP_TO_Z_UP @ world[joint_nodes], names=names),
+    }
+
+
+# ----------------------------------------------------------------------
+# Skinning
+# ----------------------------------------------------------------------
+
+def stress_pose_batch(rig, poses, steps=DEFAULT_STEPS):
+    """(P, N, 3, 3) pose rotations for every pose at every step, plus the (name, fraction) labels"""
+    phases = np.arange(1, steps + 1) / steps
+    rotations, labels = [], []
+    for name, tracks in poses.items():
+        pose, _ = clip_pose(rig, {"tracks": tracks}, phases)
+        rotations.append(pose)
+        labels += [(name, float(u)) for u in phases]
+    return np.concatenate(rotations), labels
+
+
+def skinning_matrices(rig, inverse_bind, rotations):
+    """(P, J, 3, 4) glTF-space skinning matrices (posed joint @ inverse bind) for a pose batch"""
+    world = Z_UP_TO_Y_UP @ rig.evaluate(rotations)
+    return (world @ inverse_bind)[..., :3, :]
+
+
+def skin_vertices(positions, joints, weights, matrices):
+    """Linear blend skinning of (V, 3) positions for (P, J, 3, 4) matrices -> (P, V, 3)"""
+    posed = np.zeros((len(matrices), len(positions), 3))
+    # One pass per influence slot, over the vertices that use it (work ~ vertices x influences)
+    for slot in range(joints.shape[1]):
+        used = np.flatnonzero(weights[:, slot] > 0.0)
+        bone = matrices[:, joints[used, slot]]
+        moved = np.einsum("pvij,vj->pvi", bone[..., :3], positions[used]) + bone[..., 3]
+        posed[:, used] += weights[used, slot, None] * moved
+    return posed
+
+
+def triangle_normals(positions, indices):
+    """(..., T, 3) unnormalized triangle normals (length = twice the area)"""
+    a, b, c = positions[..., indices[:, 0], :], positions[..., indices[:, 1], :], positions[..., indices[:, 2], :]
+    return np.cross(b - a, c - a)
+
+
+def skinning_cost(mesh):
+    """Vertex/influence counts and bytes of skinning data for one mesh"""
+    vertices = len(mesh["positions"])
+    influences = int(np.count_nonzero(mesh["weights"] > 0.0))
+    slots = mesh["joints"].shape[1]
+    joints = len(mesh["inverse_bind_matrices"])
+    attribute_bytes = vertices * slots * (np.dtype(mesh["joint_dtype"]).itemsize + 4)  # JOINTS_0 + float WEIGHTS_0
+    return {
+        "vertices": vertices,
+        "triangles": len(mesh["indices"]),
+        "joints": joints,
+        "influences": influences,
+        "mean_influences": influences / max(vertices, 1),
+        "attribute_bytes": attribute_bytes,
+        "bind_bytes": joints * 64,
+        "palette_bytes": joints * PALETTE_BYTES,
+        "bytes": attribute_bytes + joints * 64 + joints * PALETTE_BYTES,
+    }
+
+
+def check_skinning(mesh, poses=None, steps=DEFAULT_STEPS, collapse=DEFAULT_COLLAPSE):
+    """
+    Skin the mesh in every stress pose and find collapsed/inverted triangles.
+
+    Returns {"cost", "poses", "batch_ms"}; "poses" has one entry per stress
+    pose with its skinning time and the bad triangles of its worst step.
+    """
+    rig = mesh["rig"]
+    positions, indices = mesh["positions"], mesh["indices"]
+    joints, weights = mesh["joints"], mesh["weights"]
+    poses = stress_poses() if poses is None else poses
+
+    rotations, labels = stress_pose_batch(rig, poses, steps)
+    rest_rotations = np.broadcast_to(rig.rest_pose(), (1, len(rig), 4))
+    rest = skin_vertices(positions, joints, weights, skinning_matrices(rig, mesh["inverse_bind_matrices"],
+                                                                       rest_rotations))[0]
+    start = time.perf_counter()
+    matrices = skinning_matrices(rig, mesh["inverse_bind_matrices"], rotations)
+    posed = skin_vertices(positions, joints, weights, matrices)
+    batch_ms = (time.perf_counter() - start) * 1000.0
+
+    # Each triangle follows the bone with the largest weight on its first vertex
+    rest_normals = triangle_normals(rest, indices)
+    rest_area = np.linalg.norm(rest_normals, axis=-1)
+    valid = rest_area > 1e-12
+    owner = joints[indices[:, 0], np.argmax(weights[indices[:, 0]], axis=1)]
+    expected = np.einsum("ptij,tj->pti", matrices[:, owner, :, :3], rest_normals)
+    normals = triangle_normals(posed, indices)
+    area_ratio = np.linalg.norm(normals, axis=-1) / np.maximum(rest_area, 1e-12)
+    collapsed = (area_ratio < collapse) & valid
+    inverted = (np.einsum("pti,pti->pt", normals, expected) < 0.0) & valid & ~collapsed
+
+    results = []
+    for name in poses:
+        rows = [i for i, label in enumerate(labels) if label[0] == name]
+        # Per-pose timing: skin the full-extent step on its own
+        start = time.perf_counter()
+        skin_vertices(positions, joints, weights,
+                      skinning_matrices(rig, mesh["inverse_bind_matrices"], rotations[rows[-1]:rows[-1] + 1]))
+        pose_ms = (time.perf_counter() - start) * 1000.0
+
+        bad = (collapsed[rows] | inverted[rows]).sum(axis=1)
+        worst = rows[int(np.argmax(bad))] if bad.any() else rows[-1]
+        bones = np.unique(owner[collapsed[worst] | inverted[worst]])
+        results.append({
+            "name": name,
+            "ms": pose_ms,
+            "worst_step": labels[worst][1],
+            "collapsed": int(collapsed[worst].sum()),
+            "inverted": int(inverted[worst].sum()),
+            "min_area_ratio": float(area_ratio[rows][:, valid].min()) if valid.any() else 1.0,
+            "bones": [rig.names[b] for b in bones],
+        })
+    return {"cost": skinning_cost(mesh), "poses": results, "batch_ms": batch_ms, "steps": len(labels)}
+
+
+def find_problems(report, max_influences=None, max_bytes=None, max_bad=None):
+    """Limit violations of one check report (empty when the rig passes)"""
+    cost = report["cost"]
+    problems = []
+    if max_influences is not None and cost["influences"] > max_influences:
+        problems.append(f"{cost['influences']} vertex influences > {max_influences}")
+    if max_bytes is not None and cost["bytes"] > max_bytes:
+        problems.append(f"{cost['bytes']} skinning bytes > {max_bytes}")
+    if max_bad is not None:
+        for pose in report["poses"]:
+            bad = pose["collapsed"] + pose["inverted"]
+            if bad > max_bad:
+                problems.append(f"{pose['name']}: {bad} bad triangles > {max_bad} ({', '.join(pose['bones'])})")
+    return problems
+
+
+def parse_args(argv=None):
+    """Command line for skinning checks"""
+    parser = argparse.ArgumentParser(description="Estimate skinning cost and check deformation under stress poses")
+    parser.add_argument("--glb", default=None, help="check the skinned mesh of a .glb instead of a headless build")
+    parser.add_argument("--skeleton", default=DEFAULT_SKELETON, help="skeleton spec path (without extension)")
+    parser.add_argument("--reduce", choices=sorted(POLICIES), default=None, help="build a reduced rig first")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="increments from rest per stress pose")
+    parser.add_argument("--collapse", type=float, default=DEFAULT_COLLAPSE,
+                        help="area ratio below which a triangle counts as collapsed")
+    parser.add_argument("--max-influences", type=int, default=DEFAULT_MAX_INFLUENCES,
+                        help="fail above this many vertex influences (negative = no limit)")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                        help="fail above this many bytes of skinning data (negative = no limit)")
+    parser.add_argument("--max-bad", type=int, default=DEFAULT_MAX_BAD,
+                        help="fail above this many bad triangles in any pose (negative = no limit)")
+    args = parser.parse_args(argv)
+    for name in ("max_influences", "max_bytes", "max_bad"):
+        if getattr(args, name) < 0:
+            setattr(args, name, None)
+    return args
+
+
+def main(argv=None):
+    """Check one rig and print the cost and deformation report"""
+    args = parse_args(argv)
+    if args.glb:
+        source, mesh = args.glb, glb_mesh_data(args.glb)
+    else:
+        from headless_character import build_character
+        source = os.path.basename(args.skeleton)
+        mesh = character_mesh_data(build_character(SkeletonSpec.load(args.skeleton), reduction=args.reduce))
+    report = check_skinning(mesh, steps=args.steps, collapse=args.collapse)
+    cost = report["cost"]
+
+    print("=" * 80)
+    print(f"KHAOS SKINNING CHECK - {source}")
+    print("=" * 80)
+    print(f"✓ {cost['vertices']} verts, {cost['triangles']} tris, {cost['joints']} joints")
+    print(f"✓ {cost['influences']} vertex influences ({cost['mean_influences']:.2f} per vertex)")
+    print(f"✓ Skinning data {cost['bytes'] / 1024:.1f} KiB (attributes {cost['attribute_bytes'] / 1024:.1f}, "
+          f"bind {cost['bind_bytes'] / 1024:.1f}, palette {cost['palette_bytes'] / 1024:.1f} per frame)")
+    print(f"✓ {report['steps']} poses skinned in {report['batch_ms']:.1f} ms")
+    print(f"\n  {'pose':<16}{'ms':>8}{'step':>7}{'collapsed':>11}{'inverted':>10}{'min area':>10}  bones")
+    for pose in report["poses"]:
+        print(f"  {pose['name']:<16}{pose['ms']:>8.2f}{pose['worst_step']:>7.2f}{pose['collapsed']:>11}"
+              f"{pose['inverted']:>10}{pose['min_area_ratio']:>10.2f}  {', '.join(pose['bones'][:6])}")
+
+    limits = (args.max_influences, args.max_bytes, args.max_bad)
+    problems = find_problems(report, *limits)
+    print()
+    for problem in problems:
+        print(f"  ✗ {problem}")
+    if all(limit is None for limit in limits):
+        print("- No limits set (report only)")
+    elif not problems:
+        print("✓ Within limits")
+    print("=" * 80)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Stage Profiler for Khaos Project
+Times every generation stage and writes a Chrome trace of the run
+
+USAGE:
+    profiler = StageProfiler("mesh_auto_fit")
+    with profiler.capture():
+        profiler.step("Find armature")          # top-level stage, ends at the next step
+        ...
+        with profiler.stage("Subdivide"):       # nested sub-step
+            ...
+            profiler.record(vertices=len(mesh.vertices), faces=len(mesh.polygons))
+    profiler.report()
+    profiler.write("out/character.trace.json")
+
+    MeshAutoFitter().generate(profile_path="fit.trace.json")
+    SkeletonGenerator().generate(profile_path="skeleton.trace.json")
+    blender_character_generator.main(profile_path="character.trace.json")
+
+Open the trace in chrome://tracing or https://ui.perfetto.dev.
+
+HOW IT WORKS:
+1. step()/stage() record wall time with perf_counter; stages nest, and
+   every finished stage becomes one complete ("X") trace event
+2. Inside Blender, capture() wraps bpy.ops._op_call (the single entry
+   point every bpy.ops.* call goes through) to count operator calls by
+   idname, and adds a depsgraph_update_post handler to count depsgraph
+   updates; both are removed again when capture() exits
+3. Each stage carries its own operator/depsgraph counts plus whatever was
+   passed to record() (vertex and face counts, segment counts, ...)
+
+Outside Blender only the timings and recorded values are collected.
+"""
+
+import contextlib
+import json
+import os
+import time
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+
+class StageProfiler:
+    """Nested stage timer with bpy.ops and depsgraph counters"""
+
+    def __init__(self, name="khaos"):
+        self.name = name
+        self.events = []
+        self.op_counts = {}
+        self.op_calls = 0
+        self.depsgraph_updates = 0
+        self.stack = []
+        self.origin = time.perf_counter()
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+
+    def count_op(self, idname):
+        """Count one bpy.ops call"""
+        self.op_calls += 1
+        self.op_counts[idname] = self.op_counts.get(idname, 0) + 1
+
+    def on_depsgraph_update(self, scene, depsgraph):
+        """depsgraph_update_post handler"""
+        self.depsgraph_updates += 1
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Hook the operator and depsgraph counters for the duration of a run"""
+        original = None
+        if bpy is not None and hasattr(bpy.ops, "_op_call"):
+            original = bpy.ops._op_call
+
+            def counted_op_call(idname, *args):
+                self.count_op(idname)
+                return original(idname, *args)
+
+            bpy.ops._op_call = counted_op_call
+            bpy.app.handlers.depsgraph_update_post.append(self.on_depsgraph_update)
+        try:
+            yield self
+        finally:
+            self.close(0)
+            if original is not None:
+                bpy.ops._op_call = original
+                bpy.app.handlers.depsgraph_update_post.remove(self.on_depsgraph_update)
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def open(self, name, args):
+        """Push a stage frame"""
+        self.stack.append({
+            "name": name,
+            "start": time.perf_counter(),
+            "ops": self.op_calls,
+            "depsgraph": self.depsgraph_updates,
+            "args": dict(args),
+        })
+
+    def close(self, depth):
+        """Finish every open stage down to `depth` (0 closes all)"""
+        while len(self.stack) > depth:
+            frame = self.stack.pop()
+            end = time.perf_counter()
+            args = frame["args"]
+            args["bpy_ops"] = self.op_calls - frame["ops"]
+            args["depsgraph_updates"] = self.depsgraph_updates - frame["depsgraph"]
+            self.events.append({
+                "name": frame["name"],
+                "depth": len(self.stack),
+                "start": frame["start"],
+                "duration": end - frame["start"],
+                "args": args,
+            })
+
+    def step(self, name, **args):
+        """Start a top-level stage, ending the previous one"""
+        self.close(0)
+        self.open(name, args)
+
+    @contextlib.contextmanager
+    def stage(self, name, **args):
+        """Time a nested sub-step"""
+        depth = len(self.stack)
+        self.open(name, args)
+        try:
+            yield self
+        finally:
+            self.close(depth)
+
+    def adopt(self, other):
+        """Nest another profiler's finished stages under the current stage (e.g. a job's generators)"""
+        for event in other.events:
+            self.events.append(dict(event, depth=event["depth"] + len(self.stack)))
+
+    def record(self, **values):
+        """Attach values (vertex/face counts, ...) to the innermost open stage"""
+        if self.stack:
+            self.stack[-1]["args"].update(values)
+
+    def record_mesh(self, mesh):
+        """Record the vertex and face counts of a mesh datablock"""
+        self.record(vertices=len(mesh.vertices), faces=len(mesh.polygons))
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def total_seconds(self):
+        """Wall time of all top-level stages"""
+        return sum(event["duration"] for event in self.events if event["depth"] == 0)
+
+    def to_trace(self):
+        """Chrome trace dict (complete events, microseconds)"""
+        pid = os.getpid()
+        events = sorted(self.events, key=lambda event: (event["start"], event["depth"]))
+        return {
+            "traceEvents": [{
+                "name": event["name"],
+                "cat": self.name,
+                "ph": "X",
+                "ts": round((event["start"] - self.origin) * 1e6, 3),
+                "dur": round(event["duration"] * 1e6, 3),
+                "pid": pid,
+                "tid": 0,
+                "args": event["args"],
+            } for event in events],
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "script": self.name,
+                "total_ms": self.total_seconds() * 1000.0,
+                "bpy_ops": self.op_calls,
+                "bpy_ops_by_idname": dict(sorted(self.op_counts.items(), key=lambda item: -item[1])),
+                "depsgraph_updates": self.depsgraph_updates,
+            },
+        }
+
+    def write(self, path):
+        """Write the Chrome trace JSON and return its path"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_trace(), f, indent=1)
+        return path
+
+    def report(self):
+        """Print the stage table"""
+        print("\n" + "=" * 80)
+        print(f"PROFILE - {self.name}")
+        print("=" * 80)
+        print(f"  {'stage':<44}{'ms':>10}{'ops':>7}{'dg':>6}{'verts':>8}{'faces':>8}")
+        for event in sorted(self.events, key=lambda event: (event["start"], event["depth"])):
+            args = event["args"]
+            label = "  " * event["depth"] + event["name"]
+            print(f"  {label[:44]:<44}{event['duration'] * 1000.0:>10.2f}{args['bpy_ops']:>7}"
+                  f"{args['depsgraph_updates']:>6}{args.get('vertices', ''):>8}{args.get('faces', ''):>8}")
+        print(f"  {'total':<44}{self.total_seconds() * 1000.0:>10.2f}{self.op_calls:>7}{self.depsgraph_updates:>6}")
+        for idname, count in sorted(self.op_counts.items(), key=lambda item: -item[1]):
+            print(f"    bpy.ops.{idname}: {count}")
+        print("=" * 80)
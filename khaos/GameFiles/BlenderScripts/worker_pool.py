@@ -0,0 +1,335 @@
+"""
+Blender Worker Pool for Khaos Project
+Keeps K persistent Blender workers busy with a queue of generation jobs
+
+USAGE:
+    python worker_pool.py jobs.jsonl --workers 4 --results results.jsonl
+    python worker_pool.py jobs.jsonl --blender /opt/blender/blender --recycle 200
+    python worker_pool.py jobs.jsonl --timeout 120      # kill a worker stuck on one job for 2 minutes
+
+jobs.jsonl holds one job per line in the blender_worker.py format. Jobs
+without an "id" get their line number. Results are written in job order.
+
+HOW IT WORKS:
+1. Each worker is `blender --background --python blender_worker.py`,
+   started once and fed jobs over its stdin pipe
+2. One feeder thread per worker pulls the next job from a shared queue,
+   sends it and waits for the marker-prefixed result line (a reader thread
+   queues the worker's stdout lines, so the wait has a deadline)
+3. A worker that dies mid-job, or gives no result within --timeout seconds
+   (e.g. an operator waiting on UI context), is killed and restarted; its
+   job is reported as failed
+4. --recycle N restarts a worker after N jobs to cap Blender's memory growth
+5. --cache DIR: jobs with an export are keyed on their parameters, the
+   skeleton spec files and the source of every Blender-side script
+   (build_cache.py); unchanged jobs are copied from the cache, no Blender
+
+Plain Python - Blender only runs inside the workers.
+"""
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+from build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache, copy_from_entry
+from skeleton_spec import DEFAULT_SKELETON
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT = os.path.join(SCRIPT_DIR, "blender_worker.py")
+
+# Must match blender_worker.RESULT_MARKER (the worker module needs bpy, so it is not imported here)
+RESULT_MARKER = "@@KHAOS@@ "
+# Seconds a worker may take to start or to answer one job before it is killed
+DEFAULT_JOB_TIMEOUT = 600.0
+
+# Scripts the worker runs; any edit to them invalidates cached job outputs
+BLENDER_SOURCES = (
+    "blender_worker.py", "skeleton_generator_clean.py", "mesh_auto_fit.py", "blender_character_generator.py",
+    "character_layout.py", "fit_kernel.py", "skin_weights.py", "bone_heat.py", "skeleton_spec.py", "rig_math.py",
+    "tessellation.py", "scene_data.py", "stage_profiler.py",
+)
+
+
+class WorkerCrashed(RuntimeError):
+    """The Blender process exited before answering"""
+
+
+class WorkerTimeout(WorkerCrashed):
+    """The Blender process did not answer in time and was killed"""
+
+
+class BlenderWorker:
+    """One persistent Blender process speaking the line protocol"""
+
+    def __init__(self, blender="blender", log_path=None, timeout=DEFAULT_JOB_TIMEOUT):
+        self.blender = blender
+        self.log_path = log_path
+        self.timeout = timeout
+        self.process = None
+        self.log = None
+        self.lines = None
+        self.jobs_done = 0
+
+    def start(self):
+        """Launch Blender and wait for its ready line"""
+        self.log = open(self.log_path, "a") if self.log_path else subprocess.DEVNULL
+        self.process = subprocess.Popen(
+            [self.blender, "--background", "--factory-startup", "--python", WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self.log,
+            text=True,
+            bufsize=1,
+        )
+        self.lines = queue.Queue()
+        threading.Thread(target=self.pump, args=(self.process.stdout, self.lines), daemon=True).start()
+        self.jobs_done = 0
+        return self.read_message()
+
+    @staticmethod
+    def pump(stream, lines):
+        """Reader thread: queue the worker's stdout lines, then None at end of stream"""
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+
+    def read_message(self):
+        """Next protocol message; Blender's own stdout chatter is skipped. Kills the worker past the timeout"""
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        while True:
+            try:
+                line = self.lines.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                self.process.kill()
+                self.process.wait()
+                raise WorkerTimeout(f"Blender worker gave no result within {self.timeout:g} s and was killed")
+            if line is None:
+                raise WorkerCrashed(f"Blender worker exited with code {self.process.wait()}")
+            if line.startswith(RESULT_MARKER):
+                return json.loads(line[len(RESULT_MARKER):])
+
+    def run(self, job):
+        """Send one job and wait for its result"""
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as error:
+            raise WorkerCrashed(f"Blender worker is gone: {error}")
+        result = self.read_message()
+        self.jobs_done += 1
+        return result
+
+    def stop(self):
+        """Ask the worker to exit, kill it if it does not"""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write(json.dumps({"kind": "shutdown"}) + "\n")
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (BrokenPipeError, OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        if self.log not in (None, subprocess.DEVNULL):
+            self.log.close()
+        self.process = None
+
+
+class WorkerPool:
+    """K persistent workers fed from one job queue"""
+
+    def __init__(self, blender="blender", workers=4, recycle=0, log_dir=None, cache=None,
+                 timeout=DEFAULT_JOB_TIMEOUT):
+        self.blender = blender
+        self.workers = max(1, workers)
+        self.recycle = recycle
+        self.log_dir = log_dir
+        self.cache = cache
+        # Per-job deadline in seconds (0/None = wait forever)
+        self.timeout = timeout
+
+    def job_key(self, job):
+        """Cache key of a job's export: parameters, skeleton spec files, Blender executable and scripts"""
+        params = {key: value for key, value in job.items() if key not in ("id", "export")}
+        params["blender"] = self.blender
+
+        files = []
+        if job.get("kind", "fit") in ("fit", "skeleton"):
+            spec = job.get("skeleton") or DEFAULT_SKELETON
+            files = [spec + ".json", spec + ".npz"]
+        return self.cache.key("blender-job", params=params, sources=BLENDER_SOURCES, files=files)
+
+    def cached_result(self, job):
+        """Copy a cached export into place; returns the stored result, or None on a miss"""
+        if self.cache is None or not job.get("export"):
+            return None
+        entry = self.cache.lookup(self.job_key(job))
+        if entry is None:
+            return None
+
+        copy_from_entry(entry, "export.glb", job["export"])
+        with open(os.path.join(entry, "result.json"), "r") as f:
+            result = json.load(f)
+        result.update(id=job.get("id"), ok=True, export=job["export"], cached=True, elapsed_ms=0.0)
+        return result
+
+    def store_result(self, job, result):
+        """Put a successful job's export into the cache"""
+        if self.cache is None or not result.get("ok") or not job.get("export") or not os.path.isfile(job["export"]):
+            return
+
+        def write_files(folder):
+            copy_from_entry(os.path.dirname(os.path.abspath(job["export"])), os.path.basename(job["export"]),
+                            os.path.join(folder, "export.glb"))
+            with open(os.path.join(folder, "result.json"), "w") as f:
+                json.dump({key: result[key] for key in ("bones", "vertices") if key in result}, f)
+
+        self.cache.store(self.job_key(job), write_files)
+
+    def worker_log(self, slot):
+        """stderr log path for a worker slot (None = discard)"""
+        if not self.log_dir:
+            return None
+        os.makedirs(self.log_dir, exist_ok=True)
+        return os.path.join(self.log_dir, f"worker_{slot}.log")
+
+    def feed(self, slot, jobs, results, on_result):
+        """Feeder thread: keep one worker busy until the queue is empty"""
+        worker = BlenderWorker(self.blender, self.worker_log(slot), self.timeout)
+        try:
+            worker.start()
+            while True:
+                try:
+                    index, job = jobs.get_nowait()
+                except queue.Empty:
+                    break
+
+                crashed = False
+                try:
+                    result = worker.run(job)
+                except WorkerCrashed as error:
+                    result = {"id": job.get("id"), "ok": False, "error": str(error)}
+                    crashed = True
+
+                self.store_result(job, result)
+                result["worker"] = slot
+                results[index] = result
+                if on_result:
+                    on_result(result)
+
+                # Restart only once the result is recorded: if the restart fails too,
+                # the crashed job still reports its own error
+                if crashed or (self.recycle and worker.jobs_done >= self.recycle):
+                    worker.stop()
+                    worker.start()
+        except (OSError, WorkerCrashed) as error:
+            # Other workers keep draining the queue
+            print(f"ERROR: worker {slot} could not start: {error}", file=sys.stderr)
+        finally:
+            worker.stop()
+
+    def run(self, jobs, on_result=None):
+        """Run every job and return the results in job order"""
+        jobs = list(jobs)
+        pending = queue.Queue()
+        results = [None] * len(jobs)
+        for index, job in enumerate(jobs):
+            cached = self.cached_result(job)
+            if cached is None:
+                pending.put((index, job))
+                continue
+            cached["worker"] = "cache"
+            results[index] = cached
+            if on_result:
+                on_result(cached)
+
+        threads = [
+            threading.Thread(target=self.feed, args=(slot, pending, results, on_result), daemon=True)
+            for slot in range(min(self.workers, pending.qsize()))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Jobs left behind by a worker that could not even start
+        for index, job in enumerate(jobs):
+            if results[index] is None:
+                results[index] = {"id": job.get("id"), "ok": False, "error": "no worker available"}
+        return results
+
+
+def load_jobs(path):
+    """Read a jobs .jsonl file; jobs without an id get their line number"""
+    jobs = []
+    with open(path, "r") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if line:
+                job = json.loads(line)
+                job.setdefault("id", str(number))
+                jobs.append(job)
+    return jobs
+
+
+def parse_args(argv=None):
+    """Command line for batch bakes"""
+    parser = argparse.ArgumentParser(description="Run generation jobs on persistent Blender workers")
+    parser.add_argument("jobs", help=".jsonl file with one job per line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="number of Blender workers")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--recycle", type=int, default=0, help="restart a worker after N jobs (0 = never)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_JOB_TIMEOUT,
+                        help="kill a worker that takes longer than this many seconds on one job (0 = no limit)")
+    parser.add_argument("--logs", default=None, help="folder for per-worker stderr logs")
+    parser.add_argument("--results", default=None, help="write results as .jsonl here")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                        help=f"reuse unchanged job exports from a build cache (default folder {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help="cache size limit in MiB")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run a jobs file and print one line per finished job"""
+    args = parse_args(argv)
+    jobs = load_jobs(args.jobs)
+
+    print("=" * 80)
+    print(f"KHAOS WORKER POOL - {len(jobs)} jobs on {min(args.workers, len(jobs))} workers")
+    print("=" * 80)
+
+    def report(result):
+        status = "✓" if result["ok"] else "✗"
+        detail = result.get("export") or result.get("error", "")
+        if result.get("cached"):
+            detail += " (cached)"
+        print(f"{status} [{result['worker']}] {result['id']}: {result.get('elapsed_ms', 0.0):.0f} ms {detail}")
+
+    start = time.perf_counter()
+    cache = BuildCache(args.cache, args.cache_size * 1024 ** 2) if args.cache else None
+    pool = WorkerPool(args.blender, args.workers, args.recycle, args.logs, cache, args.timeout)
+    results = pool.run(jobs, on_result=report)
+    elapsed = time.perf_counter() - start
+
+    if args.results:
+        with open(args.results, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    failed = sum(1 for result in results if not result["ok"])
+    print("=" * 80)
+    print(f"{len(results) - failed}/{len(results)} jobs succeeded in {elapsed:.1f} s "
+          f"({elapsed / max(len(results), 1) * 1000.0:.0f} ms/job)")
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
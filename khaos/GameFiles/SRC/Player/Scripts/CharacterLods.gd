@@ -0,0 +1,38 @@
+class_name CharacterLods
+extends RefCounted
+
+## Switches the LOD meshes of an imported Khaos character by view distance
+## The pipeline writes PlayerMesh, PlayerMesh_LOD1, ... with their range
+## in the glTF node extras: {"lod": n, "lod_range": [begin, end]}
+## PlayerController._ready calls apply() on its BakedPlayer instance; any other
+## scene that instances the character .glb should call it on that node too
+
+# Hysteresis around each switch distance, in meters
+const FADE_MARGIN: float = 0.5
+
+## Applies the exported ranges to every LOD mesh below root
+## scale multiplies the ranges (e.g. 2.0 keeps detail twice as far out)
+## Returns the number of meshes configured
+static func apply(root: Node, scale: float = 1.0) -> int:
+	var configured := 0
+	for node in root.find_children("*", "GeometryInstance3D", true, false):
+		var lod_range := _lod_range(node)
+		if lod_range.is_empty():
+			continue
+
+		var mesh := node as GeometryInstance3D
+		mesh.visibility_range_begin = lod_range[0] * scale
+		mesh.visibility_range_end = lod_range[1] * scale
+		mesh.visibility_range_begin_margin = FADE_MARGIN if lod_range[0] > 0.0 else 0.0
+		mesh.visibility_range_end_margin = FADE_MARGIN if lod_range[1] > 0.0 else 0.0
+		configured += 1
+	return configured
+
+## [begin, end] from the node's glTF extras, empty when it is not a LOD mesh
+static func _lod_range(node: Node) -> Array:
+	if not node.has_meta("extras"):
+		return []
+	var extras: Dictionary = node.get_meta("extras")
+	if not extras.has("lod_range"):
+		return []
+	return extras["lod_range"]
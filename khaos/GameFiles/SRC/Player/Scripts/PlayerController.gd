@@ -123,6 +123,11 @@ func _ready() -> void:
 	# Capture mouse for camera control
 	Input.set_mouse_mode(Input.MOUSE_MODE_CAPTURED)
 	
+	# Switch the baked character's LOD meshes by distance
+	var baked_player := get_node_or_null("BakedPlayer")
+	if baked_player:
+		CharacterLods.apply(baked_player)
+
 	# Connect to state changes
 	STATE_CHANGED.connect(_on_state_changed)
 	if animation_player: